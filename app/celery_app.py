@@ -4,7 +4,8 @@ from app.utils.config import settings
 celery_app = Celery(
     "freelance_ai",
     broker=settings.CELERY_BROKER_URL,
-    backend=settings.CELERY_RESULT_BACKEND
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.tasks.generation", "app.tasks.recommendations"]
 )
 
 celery_app.conf.update(
@@ -15,5 +16,14 @@ celery_app.conf.update(
     enable_utc=True,
 )
 
+if settings.RECOMMENDATION_REFRESH_MINUTES > 0:
+    # Incremental by default: only users whose recommendations could change are rescored
+    celery_app.conf.beat_schedule = {
+        "refresh-recommendations": {
+            "task": "recommendations.refresh",
+            "schedule": settings.RECOMMENDATION_REFRESH_MINUTES * 60.0,
+        }
+    }
+
 # Auto-discover tasks from all routers/modules if needed
 # celery_app.autodiscover_tasks(['app.routers.training'])
@@ -0,0 +1,44 @@
+"""
+Job event consumer: keeps job matching fresh between index rebuilds.
+
+    python -m app.job_events        # consume settings.JOB_EVENTS_STREAM until SIGTERM / SIGINT
+
+Run a single instance: it owns the published delta (settings.JOB_EVENTS_DELTA_DIR).
+The consumer group only tracks its offset and unacknowledged entries, so a restarted
+instance with the same JOB_EVENTS_CONSUMER name picks up where the last one stopped.
+"""
+import time
+import signal
+import logging
+from app.utils.config import settings
+from app.services.job_events_service import JobEventConsumer
+
+logger = logging.getLogger("app.job_events")
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    consumer = JobEventConsumer()
+    stopping = []
+
+    def stop(signum, frame):
+        logger.info(f"Received signal {signum}, stopping after the current batch")
+        stopping.append(signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    logger.info(f"Consuming {settings.JOB_EVENTS_STREAM} as {settings.JOB_EVENTS_GROUP}/{settings.JOB_EVENTS_CONSUMER}")
+
+    backoff = 1.0
+    while not stopping:
+        try:
+            if consumer.run_once() == 0 and settings.JOB_EVENTS_BACKEND == "memory":
+                # The in-memory source does not block on empty reads
+                time.sleep(settings.JOB_EVENTS_BLOCK_MS / 1000)
+            backoff = 1.0
+        except Exception as e:
+            logger.error(f"Job event batch failed, retrying in {backoff:.0f}s: {e}")
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import chat, generation, training, predictions, job_matching, resume_parser
+from app.routers import chat, generation, training, predictions, job_matching, resume_parser, metrics, profiling
+from app.utils.admission import AdmissionMiddleware
+from app.utils.resilience import DeadlineMiddleware
+from app.utils.profiling import ProfilingMiddleware
+from app.utils.inference import CancelOnDisconnectMiddleware, executor
 import uvicorn
 import os
 
@@ -12,6 +16,15 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Innermost, so a disconnect cancels only the handler and releases its admission slot
+app.add_middleware(CancelOnDisconnectMiddleware)
+# Load shedding; added before CORS so that 503 responses still carry CORS headers
+app.add_middleware(AdmissionMiddleware)
+# Outside admission control, so time spent queued counts against the request's budget
+app.add_middleware(DeadlineMiddleware)
+# Outermost of the three, so slow-request stacks include time spent queued
+app.add_middleware(ProfilingMiddleware)
+
 # Configure CORS
 origins = [
     "http://localhost:3000",
@@ -29,6 +42,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("shutdown")
+async def shutdown_inference_pools():
+    executor.shutdown()
+
 @app.get("/")
 async def root():
     return {"message": "Freelance Platform AI Service is running"}
@@ -44,6 +61,8 @@ app.include_router(training.router, prefix="/api/ai/training", tags=["Training"]
 app.include_router(predictions.router, prefix="/api/ai/predictions", tags=["Predictions"])
 app.include_router(job_matching.router, prefix="/api/ai/matching", tags=["Matching"])
 app.include_router(resume_parser.router, prefix="/api/ai/resume", tags=["Resume"])
+app.include_router(metrics.router, prefix="/api/ai/metrics", tags=["Metrics"])
+app.include_router(profiling.router, prefix="/api/ai/profiling", tags=["Profiling"])
 
 # Legacy v1 prefixes for backward compatibility if any
 app.include_router(chat.router, prefix="/api/v1/chat", tags=["Legacy Chat"])
@@ -51,5 +70,6 @@ app.include_router(generation.router, prefix="/api/v1/generation", tags=["Legacy
 app.include_router(training.router, prefix="/api/v1/training", tags=["Legacy Training"])
 
 if __name__ == "__main__":
+    # Development server; production runs `python -m app.server`
     port = int(os.getenv("PORT", 8000))
     uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=True)
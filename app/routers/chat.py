@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, WebSocket
 from pydantic import BaseModel
+from typing import Optional
 from app.services.chat_service import ChatService
+from app.services.chat_session_service import ChatSessionService
+from app.services.chat_socket_service import ChatSocketHandler
 
 router = APIRouter()
 
@@ -8,14 +11,35 @@ class ChatRequest(BaseModel):
     message: str
     locale: str = "en"
     context: str = None
+    session_id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     reply: str
+    session_id: str
 
 def get_chat_service():
     return ChatService()
 
+def get_chat_session_service():
+    return ChatSessionService()
+
 @router.post("/", response_model=ChatResponse)
-async def chat(request: ChatRequest, service: ChatService = Depends(get_chat_service)):
-    reply = await service.get_response(request.message, request.locale, request.context)
-    return ChatResponse(reply=reply)
+async def chat(
+    request: ChatRequest,
+    service: ChatService = Depends(get_chat_service),
+    sessions: ChatSessionService = Depends(get_chat_session_service)
+):
+    session = await sessions.get_or_create(request.session_id)
+    reply = await service.get_response(request.message, request.locale, request.context, session=session)
+    await sessions.record_exchange(session, request.message, reply)
+    return ChatResponse(reply=reply, session_id=session.session_id)
+
+@router.websocket("/ws")
+async def chat_socket(
+    websocket: WebSocket,
+    session_id: Optional[str] = None,
+    service: ChatService = Depends(get_chat_service),
+    sessions: ChatSessionService = Depends(get_chat_session_service)
+):
+    """One connection per chat session; replies stream back token by token"""
+    await ChatSocketHandler(websocket, service, sessions).run(session_id)
@@ -1,11 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+import json
 import logging
 
+from app.utils.config import settings
+from app.utils.skills import canonicalize_skills
 from app.services.generation_service import GenerationService
+from app.services.bulk_generation_service import BulkGenerationService, PROPOSAL, INTERVIEW_QUESTIONS
 from app.schemas.generation import (
     ProposalRequest, ProposalResponse,
     JobDescriptionRequest, JobDescriptionResponse,
-    InterviewQuestionsRequest, InterviewQuestionsResponse
+    InterviewQuestionsRequest, InterviewQuestionsResponse,
+    BulkGenerationRequest, BulkGenerationJobResponse
 )
 
 router = APIRouter()
@@ -14,6 +20,9 @@ logger = logging.getLogger(__name__)
 def get_generation_service():
     return GenerationService()
 
+def get_bulk_generation_service():
+    return BulkGenerationService()
+
 @router.post("/proposal", response_model=ProposalResponse)
 async def generate_proposal(
     request: ProposalRequest, 
@@ -24,7 +33,7 @@ async def generate_proposal(
         proposal = await service.generate_proposal(
             job_title=request.job_title,
             job_description=request.job_description,
-            user_skills=request.user_skills,
+            user_skills=canonicalize_skills(request.user_skills),
             user_bio=request.user_bio,
             tone=request.tone
         )
@@ -61,10 +70,70 @@ async def generate_interview_questions(
         questions = await service.generate_interview_questions(
             job_title=request.job_title,
             job_description=request.job_description,
-            candidate_skills=request.candidate_skills,
+            candidate_skills=canonicalize_skills(request.candidate_skills),
             candidate_bio=request.candidate_bio
         )
         return InterviewQuestionsResponse(questions=questions)
     except Exception as e:
         logger.error(f"Failed to generate interview questions: {e}")
         raise HTTPException(status_code=500, detail="Failed to generate interview questions")
+
+@router.post("/bulk", response_model=BulkGenerationJobResponse, status_code=202)
+async def submit_bulk_generation(
+    request: BulkGenerationRequest,
+    service: BulkGenerationService = Depends(get_bulk_generation_service)
+):
+    """Queue many proposal / interview question generations and return a job id"""
+    items = [
+        {"kind": PROPOSAL, "payload": {**item.model_dump(), "user_skills": canonicalize_skills(item.user_skills)}}
+        for item in request.proposals
+    ]
+    items += [
+        {"kind": INTERVIEW_QUESTIONS, "payload": {**item.model_dump(), "candidate_skills": canonicalize_skills(item.candidate_skills)}}
+        for item in request.interview_questions
+    ]
+    if not items:
+        raise HTTPException(status_code=400, detail="No generation items provided")
+    if len(items) > settings.GENERATION_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.GENERATION_BULK_MAX_ITEMS} items per job")
+    try:
+        return await service.submit(items)
+    except Exception as e:
+        logger.error(f"Failed to submit bulk generation: {e}")
+        raise HTTPException(status_code=500, detail="Failed to submit bulk generation")
+
+@router.get("/bulk/{job_id}", response_model=BulkGenerationJobResponse)
+async def get_bulk_generation(
+    job_id: str,
+    offset: int = 0,
+    service: BulkGenerationService = Depends(get_bulk_generation_service)
+):
+    """Poll a bulk job; `offset` skips results already received"""
+    try:
+        job = await service.get_job(job_id, offset=offset)
+    except Exception as e:
+        logger.error(f"Failed to load bulk generation job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load bulk generation job")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/bulk/{job_id}/stream")
+async def stream_bulk_generation(
+    job_id: str,
+    service: BulkGenerationService = Depends(get_bulk_generation_service)
+):
+    """Stream results of a bulk job as NDJSON as items finish"""
+    try:
+        job = await service.get_job(job_id)
+    except Exception as e:
+        logger.error(f"Failed to load bulk generation job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load bulk generation job")
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def ndjson_lines():
+        async for line in service.stream_job(job_id):
+            yield json.dumps(line, default=str) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
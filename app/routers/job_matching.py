@@ -1,7 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
 import logging
+from app.utils.config import settings
+from app.utils.skills import load_skill_index
 from app.services.job_matching_service import JobMatchingService
-from app.schemas.matching import SimilarityRequest
+from app.schemas.matching import (
+    SimilarityRequest, SemanticSearchRequest,
+    SkillNormalizeRequest, SkillNormalizeResponse, NormalizedSkills
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -17,10 +22,41 @@ async def get_similarity_score(
     """Calculate similarity score between job and resume"""
     try:
         score = await service.calculate_similarity(
-            job_description=request.job_description,
-            resume_text=request.resume_text
+            request.job_description,
+            request.resume_text
         )
         return {"similarity_score": score}
     except Exception as e:
         logger.error(f"Failed to calculate similarity score: {e}")
         raise HTTPException(status_code=500, detail="Failed to calculate similarity score")
+
+@router.post("/semantic-search")
+async def semantic_search(
+    request: SemanticSearchRequest,
+    service: JobMatchingService = Depends(get_matching_service)
+):
+    """Nearest jobs or candidate profiles to free text, from the dense embedding index"""
+    try:
+        results = await service.semantic_search(request.text, request.target, request.limit, request.nprobe)
+    except Exception as e:
+        logger.error(f"Semantic search failed: {e}")
+        raise HTTPException(status_code=500, detail="Semantic search failed")
+    if results is None:
+        raise HTTPException(status_code=503, detail="Matching index has not been trained yet")
+    return {"target": request.target, "results": results}
+
+@router.post("/skills/normalize", response_model=SkillNormalizeResponse)
+async def normalize_skills(request: SkillNormalizeRequest):
+    """Canonicalize the skill lists of many profiles, e.g. to backfill stored data"""
+    if len(request.items) > settings.SKILL_NORMALIZE_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.SKILL_NORMALIZE_MAX_ITEMS} items per request")
+    try:
+        index = load_skill_index()
+        items = []
+        for item in request.items:
+            skills, unmatched = index.resolve(item.skills)
+            items.append(NormalizedSkills(id=item.id, skills=skills, unmatched=unmatched))
+        return SkillNormalizeResponse(items=items)
+    except Exception as e:
+        logger.error(f"Failed to normalize skills: {e}")
+        raise HTTPException(status_code=500, detail="Failed to normalize skills")
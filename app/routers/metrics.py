@@ -0,0 +1,57 @@
+from fastapi import APIRouter
+from app.utils.cache import cache_stats
+from app.utils.admission import controller
+from app.utils.resilience import llm_breaker
+from app.utils.compression import compression_stats
+from app.utils.inference import executor
+from app.services.job_events_service import read_consumer_stats
+from app.services.chat_session_service import ChatSessionService
+from app.services.chat_socket_service import connections
+from app.services.chat_service import answer_cache
+
+router = APIRouter()
+
+@router.get("/cache")
+async def get_cache_metrics():
+    """Hit ratios and memory use of the result caches in this worker"""
+    return {"caches": cache_stats()}
+
+@router.get("/chat-sessions")
+async def get_chat_session_metrics():
+    """Number of live chat sessions and their memory footprint"""
+    return await ChatSessionService().stats()
+
+@router.get("/semantic-cache")
+async def get_semantic_cache_metrics():
+    """Hit ratio and size of the chat fallback answer cache in this worker"""
+    return answer_cache.stats()
+
+@router.get("/chat-sockets")
+async def get_chat_socket_metrics():
+    """Open chat WebSocket connections in this worker"""
+    return connections.stats()
+
+@router.get("/admission")
+async def get_admission_metrics():
+    """Concurrency, queue depth and rejection counts per priority class"""
+    return controller.stats()
+
+@router.get("/llm")
+async def get_llm_metrics():
+    """State of the circuit breaker guarding the LLM upstream"""
+    return llm_breaker.stats()
+
+@router.get("/prompt-compression")
+async def get_prompt_compression_metrics():
+    """Estimated prompt tokens saved by input compression, per endpoint"""
+    return compression_stats.stats()
+
+@router.get("/inference")
+async def get_inference_metrics():
+    """Queue and run times of CPU-bound inference, per workload"""
+    return executor.stats()
+
+@router.get("/job-events")
+async def get_job_event_metrics():
+    """Throughput, ingest lag and backlog of the job event consumer"""
+    return read_consumer_stats()
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 import logging
+from app.utils.skills import canonicalize_skills
 from app.services.prediction_service import PredictionService
 from app.schemas.predictions import SalaryPredictionRequest, SalaryPredictionResponse
 
@@ -17,7 +18,7 @@ async def predict_salary(
     """Predict market salary based on skills and experience"""
     try:
         result = await service.predict_salary(
-            skills=request.skills,
+            skills=canonicalize_skills(request.skills),
             experience_level=request.experience_level,
             location=request.location or "Remote",
             job_type=request.job_type or "Full-time"
@@ -26,3 +27,27 @@ async def predict_salary(
     except Exception as e:
         logger.error(f"Failed to predict salary: {e}")
         raise HTTPException(status_code=500, detail="Failed to predict salary")
+
+@router.get("/recommendations/{user_id}")
+async def get_recommendations(
+    user_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    service: PredictionService = Depends(get_prediction_service)
+):
+    """Precomputed job recommendations for a user"""
+    try:
+        return {"user_id": user_id, "recommendations": await service.get_recommendations(user_id, limit)}
+    except Exception as e:
+        logger.error(f"Failed to get recommendations: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get recommendations")
+
+@router.post("/recommendations/refresh")
+async def refresh_recommendations(dataset_path: str = None, incremental: bool = True):
+    """Queue a recommendation refresh on the Celery workers"""
+    try:
+        from app.tasks.recommendations import refresh_recommendations_task
+        task = refresh_recommendations_task.delay(dataset_path, incremental)
+        return {"status": "queued", "task_id": task.id}
+    except Exception as e:
+        logger.error(f"Failed to queue recommendation refresh: {e}")
+        raise HTTPException(status_code=500, detail="Failed to queue recommendation refresh")
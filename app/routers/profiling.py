@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+import os
+from typing import Optional
+from app.utils import profiling
+
+router = APIRouter()
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    # 404 rather than 401/403, so a disabled or unauthenticated surface looks absent
+    if not profiling.check_token(x_admin_token):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@router.get("/slow-requests", dependencies=[Depends(require_admin)])
+async def get_slow_requests():
+    """Stacks captured for requests that exceeded the slow-request threshold in this worker"""
+    return profiling.slow_sampler.stats()
+
+@router.post("/tracemalloc/start", dependencies=[Depends(require_admin)])
+async def start_tracemalloc():
+    """Start tracing allocations in this worker (adds noticeable overhead while on)"""
+    profiling.start_tracemalloc()
+    return {"pid": os.getpid(), "tracing": True}
+
+@router.get("/tracemalloc", dependencies=[Depends(require_admin)])
+async def get_tracemalloc(top: int = Query(25, ge=1, le=200)):
+    """Top allocators in this worker and the change since the previous snapshot"""
+    return profiling.tracemalloc_report(top)
+
+@router.post("/tracemalloc/stop", dependencies=[Depends(require_admin)])
+async def stop_tracemalloc():
+    profiling.stop_tracemalloc()
+    return {"pid": os.getpid(), "tracing": False}
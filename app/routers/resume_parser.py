@@ -1,4 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi.responses import StreamingResponse
+from typing import List
+import json
 import logging
 from app.services.resume_service import ResumeParserService
 
@@ -33,3 +36,23 @@ async def analyze_resume(
     except Exception as e:
         logger.error(f"Failed to analyze resume: {e}")
         raise HTTPException(status_code=500, detail="Failed to analyze resume")
+
+@router.post("/bulk")
+async def bulk_process_resumes(
+    files: List[UploadFile] = File(...),
+    analyze: bool = True,
+    service: ResumeParserService = Depends(get_resume_service)
+):
+    """
+    Parse and analyze many resumes (individual files and/or zip archives).
+
+    Streams one NDJSON line per resume as it finishes, then a summary line.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files uploaded")
+
+    async def ndjson_lines():
+        async for line in service.iter_bulk_results(files, analyze=analyze):
+            yield json.dumps(line, default=str) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
@@ -9,15 +9,19 @@ logger = logging.getLogger(__name__)
 def get_training_service():
     return TrainingService()
 
-async def train_model_task(model_type: str, dataset_path: str, training_service: TrainingService):
+async def train_model_task(model_type: str, dataset_path: str, training_service: TrainingService, search: bool = False):
     """Background task for model training"""
     try:
-        if model_type == "salary_prediction":
+        if model_type == "salary_prediction" and search:
+            await training_service.search_salary_model(dataset_path)
+        elif model_type == "salary_prediction":
             await training_service.train_salary_model(dataset_path)
         elif model_type == "fraud_detection":
             await training_service.train_fraud_model(dataset_path)
         elif model_type == "intent_classification":
             await training_service.train_intent_model(dataset_path)
+        elif model_type == "job_matching":
+            await training_service.train_matching_model(dataset_path)
         else:
             logger.error(f"Unknown model type: {model_type}")
     except Exception as e:
@@ -27,6 +31,7 @@ async def train_model_task(model_type: str, dataset_path: str, training_service:
 async def train_model(
     model_type: str,
     dataset_path: str = None,
+    search: bool = False,
     background_tasks: BackgroundTasks = BackgroundTasks(),
     training_service: TrainingService = Depends(get_training_service)
 ):
@@ -34,13 +39,14 @@ async def train_model(
     Train or retrain ML models
     
     - Runs in background
-    - Supports: salary_prediction, fraud_detection
+    - Supports: salary_prediction, fraud_detection, intent_classification, job_matching
+    - `search=true` (salary_prediction only) runs a parallel hyperparameter search
     """
     try:
         logger.info(f"Starting training for model: {model_type}")
         
         # Add training task to background
-        background_tasks.add_task(train_model_task, model_type, dataset_path, training_service)
+        background_tasks.add_task(train_model_task, model_type, dataset_path, training_service, search)
         
         return {
             "status": "training_started",
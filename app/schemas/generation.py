@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 class ProposalRequest(BaseModel):
     job_title: str
@@ -30,3 +30,25 @@ class InterviewQuestionsRequest(BaseModel):
 
 class InterviewQuestionsResponse(BaseModel):
     questions: List[str]
+
+class BulkGenerationRequest(BaseModel):
+    proposals: List[ProposalRequest] = []
+    interview_questions: List[InterviewQuestionsRequest] = []
+
+class BulkGenerationItemResult(BaseModel):
+    index: int
+    kind: str
+    status: str
+    attempts: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class BulkGenerationJobResponse(BaseModel):
+    job_id: str
+    status: str
+    backend: str
+    total: int
+    completed: int = 0
+    failed: int = 0
+    fallback: int = 0
+    results: List[BulkGenerationItemResult] = []
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Dict
 
 class JobMatchRequest(BaseModel):
     user_id: str
@@ -17,3 +17,26 @@ class JobMatchResponse(BaseModel):
 class SimilarityRequest(BaseModel):
     job_description: str
     resume_text: str
+
+class SemanticSearchRequest(BaseModel):
+    text: str
+    target: Literal["jobs", "profiles"] = "jobs"
+    limit: int = Field(10, ge=1, le=100)
+    # Lists scanned by the ANN index; higher improves recall at some latency cost
+    nprobe: Optional[int] = Field(None, ge=1)
+
+class SkillNormalizeItem(BaseModel):
+    id: str
+    skills: List[str]
+
+class SkillNormalizeRequest(BaseModel):
+    items: List[SkillNormalizeItem]
+
+class NormalizedSkills(BaseModel):
+    id: str
+    skills: List[str]
+    # Inputs with no close vocabulary entry; kept in `skills` as given
+    unmatched: List[str]
+
+class SkillNormalizeResponse(BaseModel):
+    items: List[NormalizedSkills]
@@ -11,6 +11,10 @@ class SalaryPredictionResponse(BaseModel):
     estimated_salary: float
     currency: str = "USD"
     confidence_score: float
+    # p10-p90 interval of the predicted distribution
+    range: Optional[Dict[str, float]] = None
+    # Predicted quantiles, e.g. {"p10", "p50", "p90"}; absent for point-estimate models
+    quantiles: Optional[Dict[str, float]] = None
 
 class FraudDetectionRequest(BaseModel):
     job_id: str
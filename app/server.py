@@ -0,0 +1,278 @@
+"""
+Production server: load models once in a master process, freeze the heap and
+fork N uvicorn workers that share it copy-on-write.
+
+    python -m app.server                     # serve with settings from the environment
+    python -m app.server --no-preload        # every worker imports and loads on its own
+    python -m app.server --measure-memory    # compare per-worker memory of both modes
+
+Signals handled by the master:
+    SIGTERM / SIGINT  graceful shutdown of all workers
+    SIGHUP            graceful reload: reload model artifacts in the master, start a
+                      fresh generation of workers, then retire the old one
+    SIGTTIN / SIGTTOU add / remove one worker
+Code changes still need a full restart.
+"""
+import gc
+import os
+import sys
+import time
+import random
+import signal
+import socket
+import logging
+import argparse
+import subprocess
+import urllib.request
+from typing import Dict, List, Optional
+import uvicorn
+from app.utils.config import settings
+
+logger = logging.getLogger("app.server")
+
+def read_memory(pid: int) -> Dict[str, float]:
+    """RSS, PSS and private (USS) memory of a process in MiB, from /proc."""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[0].endswith(":"):
+                    fields[parts[0][:-1]] = int(parts[1]) / 1024
+    except OSError:
+        return {}
+    return {
+        "rss_mb": round(fields.get("Rss", 0.0), 1),
+        "pss_mb": round(fields.get("Pss", 0.0), 1),
+        "private_mb": round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1),
+        "shared_mb": round(fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0), 1)
+    }
+
+class Arbiter:
+    def __init__(self, host: str, port: int, workers: int, preload: bool):
+        self.host = host
+        self.port = port
+        self.num_workers = max(1, workers)
+        self.preload = preload
+        self.workers: Dict[int, int] = {}  # pid -> generation
+        self.generation = 0
+        self.app = None
+        self.sock: Optional[socket.socket] = None
+        self._signals: List[int] = []
+
+    def run(self):
+        if self.preload:
+            self._load_app()
+        self.sock = self._bind()
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(sig, lambda signum, frame: self._signals.append(signum))
+
+        logger.info(f"Master {os.getpid()} listening on {self.host}:{self.port} with {self.num_workers} workers (preload={self.preload})")
+        self._spawn_missing()
+        try:
+            while True:
+                while self._signals:
+                    sig = self._signals.pop(0)
+                    if sig in (signal.SIGTERM, signal.SIGINT):
+                        return
+                    if sig == signal.SIGHUP:
+                        self._reload()
+                    elif sig == signal.SIGTTIN:
+                        self.num_workers += 1
+                    elif sig == signal.SIGTTOU and self.num_workers > 1:
+                        self.num_workers -= 1
+                        self._retire(list(self.workers)[:1])
+                self._reap()
+                self._spawn_missing()
+                time.sleep(0.5)
+        finally:
+            self._stop()
+
+    def _load_app(self):
+        from app.utils.model_registry import preload_models
+        from app.main import app
+        preload_models()
+        self.app = app
+        # Move everything allocated so far out of the collector's reach so that
+        # collections in workers don't touch (and thereby copy) the shared pages
+        gc.collect()
+        gc.freeze()
+
+    def _bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn_missing(self):
+        current = [pid for pid, gen in self.workers.items() if gen == self.generation]
+        for _ in range(self.num_workers - len(current)):
+            self._spawn()
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = self.generation
+            return
+        # Worker process
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(sig, signal.SIG_DFL)
+        random.seed()
+        if self.app is None:
+            # Without preloading each worker loads its own copy, before taking traffic
+            self._load_app()
+        max_requests = settings.WORKER_MAX_REQUESTS
+        if max_requests:
+            # Jitter keeps all workers from recycling at the same moment
+            max_requests += random.randint(0, max(0, settings.WORKER_MAX_REQUESTS_JITTER))
+        config = uvicorn.Config(
+            self.app,
+            limit_max_requests=max_requests or None,
+            timeout_graceful_shutdown=settings.WORKER_GRACEFUL_TIMEOUT,
+            proxy_headers=True
+        )
+        try:
+            uvicorn.Server(config).run(sockets=[self.sock])
+        finally:
+            os._exit(0)
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            if self.workers.pop(pid, None) is not None:
+                logger.info(f"Worker {pid} exited with status {status}")
+
+    def _reload(self):
+        logger.info("Reloading: starting a new worker generation")
+        if self.preload:
+            from app.utils.model_registry import preload_models
+            gc.unfreeze()
+            preload_models()
+            gc.collect()
+            gc.freeze()
+        old = list(self.workers)
+        self.generation += 1
+        self._spawn_missing()
+        self._retire(old)
+
+    def _retire(self, pids: List[int]):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.workers.pop(pid, None)
+
+    def _stop(self):
+        logger.info("Shutting down workers")
+        self._retire(list(self.workers))
+        deadline = time.monotonic() + settings.WORKER_GRACEFUL_TIMEOUT + 5
+        while self.workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self._reap()
+        if self.sock is not None:
+            self.sock.close()
+
+def _child_pids(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+def _wait_until_serving(proc: subprocess.Popen, workers: int, port: int, timeout: float) -> bool:
+    """Wait until every worker is up; workers load their models before they start serving."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and proc.poll() is None:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1):
+                pass
+            if len(_child_pids(proc.pid)) >= workers:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+def measure_memory(workers: int, port: int, settle_seconds: float = 5.0, timeout: float = 300.0):
+    """
+    Start the server with and without preloading and print per-worker memory once
+    every worker has loaded its models and served a health check.
+    """
+    results = {}
+    for preload in (False, True):
+        cmd = [sys.executable, "-m", "app.server", "--workers", str(workers), "--port", str(port)]
+        if not preload:
+            cmd.append("--no-preload")
+        proc = subprocess.Popen(cmd)
+        try:
+            if not _wait_until_serving(proc, workers, port, timeout):
+                raise RuntimeError(f"Server (preload={preload}) did not become ready within {timeout}s")
+            # One answered health check does not mean every worker has finished loading:
+            # wait until no worker's RSS moves between samples
+            previous = None
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                time.sleep(settle_seconds)
+                current = [read_memory(pid) for pid in _child_pids(proc.pid)]
+                rss = [round(row.get("rss_mb", 0)) for row in current]
+                if rss == previous:
+                    break
+                previous = rss
+            results[preload] = current
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait()
+
+    print(f"{'mode':<12}{'worker':>8}{'rss_mb':>10}{'pss_mb':>10}{'private_mb':>12}{'shared_mb':>11}")
+    for preload, rows in results.items():
+        mode = "preload" if preload else "no-preload"
+        for i, row in enumerate(rows):
+            print(f"{mode:<12}{i:>8}{row.get('rss_mb', 0):>10}{row.get('pss_mb', 0):>10}{row.get('private_mb', 0):>12}{row.get('shared_mb', 0):>11}")
+        if rows:
+            total_pss = sum(row.get("pss_mb", 0) for row in rows)
+            print(f"{mode:<12}{'total':>8}{'':>10}{round(total_pss, 1):>10}")
+
+# Per-process state that is wrong once requests of one client land on different workers
+SHARED_STATE_SETTINGS = ("CHAT_SESSION_BACKEND", "GENERATION_BULK_JOB_BACKEND")
+
+def check_shared_state(workers: int):
+    """Refuse to fork several workers when state is explicitly kept in each worker's memory."""
+    if workers <= 1:
+        return
+    local = [name for name in SHARED_STATE_SETTINGS if getattr(settings, name) == "memory"]
+    if local:
+        raise SystemExit(f"{', '.join(local)} must be 'redis' or 'auto' to run {workers} workers")
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-forking production server")
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", settings.PORT)))
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY)
+    parser.add_argument("--no-preload", action="store_true", help="Load the app separately in each worker")
+    parser.add_argument("--measure-memory", action="store_true", help="Compare per-worker memory with and without preloading")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(name)s %(levelname)s %(message)s")
+    if args.measure_memory:
+        measure_memory(args.workers, args.port)
+        return
+    check_shared_state(args.workers)
+    # "auto" state backends are resolved lazily in the workers from this
+    settings.SERVER_WORKERS = args.workers
+    Arbiter(args.host, args.port, args.workers, preload=settings.SERVER_PRELOAD and not args.no_preload).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import json
+import time
+import uuid
+import asyncio
+import logging
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from app.utils.config import settings, shared_state_backend
+from app.utils.resilience import deadline_scope
+from app.services.generation_service import GenerationService, GenerationUnavailable
+
+logger = logging.getLogger(__name__)
+
+PROPOSAL = "proposal"
+INTERVIEW_QUESTIONS = "interview_questions"
+
+# Key under which each kind's generated content is returned
+RESULT_KEYS = {PROPOSAL: "proposal", INTERVIEW_QUESTIONS: "questions"}
+
+async def generate_item(service: GenerationService, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    if kind == PROPOSAL:
+        proposal = await service.generate_proposal(
+            job_title=payload["job_title"],
+            job_description=payload["job_description"],
+            user_skills=payload["user_skills"],
+            user_bio=payload.get("user_bio"),
+            tone=payload.get("tone") or "professional"
+        )
+        return {RESULT_KEYS[kind]: proposal}
+    if kind == INTERVIEW_QUESTIONS:
+        questions = await service.generate_interview_questions(
+            job_title=payload["job_title"],
+            job_description=payload["job_description"],
+            candidate_skills=payload["candidate_skills"],
+            candidate_bio=payload.get("candidate_bio")
+        )
+        return {RESULT_KEYS[kind]: questions}
+    raise ValueError(f"Unknown generation kind: {kind}")
+
+async def run_items(items: List[Dict[str, Any]], on_result: Callable[[Dict[str, Any]], Awaitable[None]]):
+    """
+    Run generation items with at most GENERATION_BULK_CONCURRENCY in flight.
+
+    Each item is retried with exponential backoff; a failing item is reported and
+    never affects the others. An attempt answered with the local fallback content
+    counts as failed: if retries do not help, the item is reported with status
+    "fallback" and that content. `on_result` is awaited as each item finishes.
+    """
+    service = GenerationService(strict=True)
+    semaphore = asyncio.Semaphore(max(1, settings.GENERATION_BULK_CONCURRENCY))
+    max_attempts = 1 + max(0, settings.GENERATION_BULK_MAX_RETRIES)
+
+    async def run_one(index: int, item: Dict[str, Any]):
+        async with semaphore:
+            error = None
+            fallback = None
+            attempt = 0
+            while attempt < max_attempts:
+                attempt += 1
+                try:
+                    # Items outlive the submitting request, so each attempt gets its own budget
+                    with deadline_scope(settings.LLM_TIMEOUT_SECONDS, replace=True):
+                        result = await generate_item(service, item["kind"], item["payload"])
+                    await on_result({"index": index, "kind": item["kind"], "status": "ok", "attempts": attempt, "result": result})
+                    return
+                except GenerationUnavailable as e:
+                    error = str(e)
+                    fallback = {RESULT_KEYS[item["kind"]]: e.fallback}
+                    logger.warning(f"Bulk generation item {index} attempt {attempt} fell back: {e}")
+                    if service.client is None:
+                        # Nothing to retry against
+                        break
+                except Exception as e:
+                    error = str(e)
+                    fallback = None
+                    logger.warning(f"Bulk generation item {index} attempt {attempt} failed: {e}")
+                if attempt < max_attempts:
+                    await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+            if fallback is not None:
+                await on_result({"index": index, "kind": item["kind"], "status": "fallback", "attempts": attempt, "result": fallback, "error": error})
+            else:
+                await on_result({"index": index, "kind": item["kind"], "status": "error", "attempts": attempt, "error": error})
+
+    await asyncio.gather(*(run_one(i, item) for i, item in enumerate(items)))
+
+# Summary counter for each item status
+COUNTERS = {"ok": "completed", "error": "failed", "fallback": "fallback"}
+FINISHED = ("completed", "failed")
+
+def summarize(job_id: str, job: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "backend": job["backend"],
+        "total": int(job["total"]),
+        "completed": int(job.get("completed", 0)),
+        "failed": int(job.get("failed", 0)),
+        "fallback": int(job.get("fallback", 0)),
+        "results": results
+    }
+
+class InMemoryJobStore:
+    """Job state in this process only, for tests and single-worker setups."""
+
+    shared = False
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, List[Dict[str, Any]]] = {}
+
+    async def create(self, job_id: str, total: int, backend: str, status: str):
+        self._expire()
+        self._jobs[job_id] = {"status": status, "backend": backend, "total": total, "expires_at": time.monotonic() + self.ttl}
+        self._results[job_id] = []
+
+    async def add_result(self, job_id: str, result: Dict[str, Any]):
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        job[COUNTERS[result["status"]]] = job.get(COUNTERS[result["status"]], 0) + 1
+        self._results[job_id].append(result)
+
+    async def set_status(self, job_id: str, status: str):
+        if job_id in self._jobs:
+            self._jobs[job_id].update(status=status, expires_at=time.monotonic() + self.ttl)
+
+    async def get(self, job_id: str, offset: int = 0) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is None or job["expires_at"] < time.monotonic():
+            return None
+        return summarize(job_id, job, self._results[job_id][offset:])
+
+    def _expire(self):
+        now = time.monotonic()
+        # Running jobs are extended when they finish; only finished ones expire
+        for job_id in [j for j, job in self._jobs.items() if job["expires_at"] < now and job["status"] in FINISHED]:
+            del self._jobs[job_id]
+            del self._results[job_id]
+
+class RedisJobStore:
+    """
+    Job state shared by every server worker and the Celery workers: a hash with the
+    status and counters, and a list of results appended as items finish, so each
+    result is written once and polls read only what they have not seen.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, ttl: float, prefix: str = "generation:bulk:"):
+        import redis.asyncio as aioredis
+        self.client = aioredis.from_url(url, decode_responses=True)
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    def _keys(self, job_id: str):
+        return self.prefix + job_id, self.prefix + job_id + ":results"
+
+    async def create(self, job_id: str, total: int, backend: str, status: str):
+        key, _ = self._keys(job_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={"status": status, "backend": backend, "total": total})
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def add_result(self, job_id: str, result: Dict[str, Any]):
+        key, results_key = self._keys(job_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.rpush(results_key, json.dumps(result, default=str))
+            pipe.hincrby(key, COUNTERS[result["status"]], 1)
+            pipe.expire(results_key, self.ttl)
+            await pipe.execute()
+
+    async def set_status(self, job_id: str, status: str):
+        key, results_key = self._keys(job_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, "status", status)
+            pipe.expire(key, self.ttl)
+            pipe.expire(results_key, self.ttl)
+            await pipe.execute()
+
+    async def get(self, job_id: str, offset: int = 0) -> Optional[Dict[str, Any]]:
+        key, results_key = self._keys(job_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hgetall(key)
+            pipe.lrange(results_key, offset, -1)
+            job, results = await pipe.execute()
+        if not job:
+            return None
+        return summarize(job_id, job, [json.loads(r) for r in results])
+
+def create_job_store():
+    if shared_state_backend(settings.GENERATION_BULK_JOB_BACKEND) == "redis":
+        return RedisJobStore(settings.GENERATION_BULK_REDIS_URL, settings.GENERATION_BULK_JOB_TTL_SECONDS)
+    return InMemoryJobStore(settings.GENERATION_BULK_JOB_TTL_SECONDS)
+
+_store = None
+
+def get_job_store():
+    global _store
+    if _store is None:
+        _store = create_job_store()
+    return _store
+
+class LocalJob:
+    """A bulk job running on this worker's event loop; its state lives in the job store."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.task: Optional[asyncio.Task] = None
+        self._updated = asyncio.Event()
+
+    def notify(self):
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def wait_for_update(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._updated.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+# Jobs running on this worker, so its own streams wake up as soon as results land
+_local_jobs: Dict[str, LocalJob] = {}
+
+class BulkGenerationService:
+    def __init__(self, store=None):
+        self.store = store or get_job_store()
+
+    async def submit(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        threshold = settings.GENERATION_BULK_CELERY_THRESHOLD
+        if threshold and len(items) >= threshold:
+            if self.store.shared:
+                from app.tasks.generation import run_bulk_generation
+                await self.store.create(job_id, len(items), "celery", "queued")
+                # Publishing to the broker is a blocking call
+                await asyncio.get_running_loop().run_in_executor(
+                    None, partial(run_bulk_generation.apply_async, args=[job_id, items], task_id=job_id)
+                )
+                return await self.store.get(job_id)
+            logger.warning(f"Bulk job {job_id} runs locally: Celery workers cannot see an in-memory job store")
+
+        await self.store.create(job_id, len(items), "local", "running")
+        job = LocalJob(job_id)
+        _local_jobs[job_id] = job
+        job.task = asyncio.create_task(self._run_local(job, items))
+        return await self.store.get(job_id)
+
+    async def _run_local(self, job: LocalJob, items: List[Dict[str, Any]]):
+        async def record(result: Dict[str, Any]):
+            await self.store.add_result(job.job_id, result)
+            job.notify()
+
+        try:
+            await run_items(items, record)
+            status = "completed"
+        except Exception as e:
+            logger.error(f"Bulk generation job {job.job_id} failed: {e}")
+            status = "failed"
+        try:
+            await self.store.set_status(job.job_id, status)
+        except Exception as e:
+            logger.error(f"Could not record the end of bulk generation job {job.job_id}: {e}")
+        finally:
+            job.notify()
+            _local_jobs.pop(job.job_id, None)
+
+    async def get_job(self, job_id: str, offset: int = 0) -> Optional[Dict[str, Any]]:
+        """Job summary with the results after `offset`, or None for unknown or expired ids."""
+        return await self.store.get(job_id, max(0, offset))
+
+    async def stream_job(self, job_id: str, poll_interval: float = 1.0) -> AsyncIterator[Dict[str, Any]]:
+        """Yield each item result once as it becomes available, then a final summary"""
+        sent = 0
+        while True:
+            state = await self.get_job(job_id, offset=sent)
+            if state is None:
+                return
+            for result in state["results"]:
+                yield {"type": "result", **result}
+            sent += len(state["results"])
+            if state["status"] in FINISHED:
+                state.pop("results")
+                yield {"type": "summary", **state}
+                return
+            # Jobs running elsewhere (another worker, Celery) are polled
+            job = _local_jobs.get(job_id)
+            if job is not None:
+                await job.wait_for_update(poll_interval)
+            else:
+                await asyncio.sleep(poll_interval)
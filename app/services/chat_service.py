@@ -1,19 +1,57 @@
 import os
-import joblib
 import random
+import asyncio
 import logging
-from typing import Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional
 from app.utils.config import settings
-from openai import OpenAI
+from app.utils.cache import ResultCache, get_shared_store, make_key, model_version
+from app.utils.model_registry import load_model
+from app.utils.intent_model import CompactIntentModel
+from app.utils.semantic_cache import SemanticCache
+from app.utils.inference import executor
+from app.utils.resilience import call_with_fallback, llm_breaker, remaining_budget
+from app.utils.tokenizer import tokenize, tokenize_phrase, contains_phrase
+from app.services.chat_session_service import ChatSession
+from openai import AsyncOpenAI
 
 logger = logging.getLogger(__name__)
 
+intent_cache = ResultCache(
+    "intent",
+    max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    ttl=settings.CACHE_TTL_SECONDS,
+    shared_store=get_shared_store()
+)
+
+# LLM fallback answers to opening questions, reused for paraphrases in the same locale and page
+answer_cache = SemanticCache(
+    "chat_fallback",
+    max_entries=settings.CHAT_SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl=settings.CHAT_SEMANTIC_CACHE_TTL_SECONDS,
+    threshold=settings.CHAT_SEMANTIC_CACHE_THRESHOLD,
+    max_namespaces=settings.CHAT_SEMANTIC_CACHE_MAX_NAMESPACES
+)
+
+def load_intent_model(path: str):
+    if path.endswith(".npz"):
+        return load_model(path, loader=CompactIntentModel.load)
+    return load_model(path)
+
+def predict_intent(model_path: str, message: str) -> Dict[str, Any]:
+    """Runs on the inference executor; loads the model once per process."""
+    model = load_intent_model(model_path)
+    intent = model.predict([message])[0]
+    probs = model.predict_proba([message])[0]
+    return {"intent": str(intent), "confidence": float(max(probs))}
+
 class ChatService:
     def __init__(self):
-        self.model_path = "app/ml_models/intent_model.joblib"
+        self.model_path = settings.INTENT_MODEL_PATH
         self.model = self._load_model()
         self.api_key = settings.OPENAI_API_KEY
-        self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        # Retries and timeouts are handled by call_with_fallback, within the request deadline;
+        # for streamed replies a retry would restart a half-sent answer
+        self.async_client = AsyncOpenAI(api_key=self.api_key, max_retries=0) if self.api_key else None
         
         self.knowledge_base = {
             "jobs": [
@@ -104,15 +142,106 @@ class ChatService:
 
     def _load_model(self):
         try:
-            if os.path.exists(self.model_path):
-                logger.info(f"Loading intent model from {self.model_path}")
-                return joblib.load(self.model_path)
-            return None
+            # The compact export loads in milliseconds; use it unless the pipeline is newer
+            compact_path = settings.INTENT_COMPACT_MODEL_PATH
+            if os.path.exists(compact_path) and (
+                not os.path.exists(self.model_path) or os.path.getmtime(compact_path) >= os.path.getmtime(self.model_path)
+            ):
+                self.model_path = compact_path
+                return load_intent_model(compact_path)
+            # Loaded once per process and shared across requests
+            return load_model(self.model_path)
         except Exception as e:
             logger.error(f"Error loading intent model: {str(e)}")
             return None
 
-    async def get_response(self, message: str, locale: str = "en", context: str = None) -> str:
+    async def get_response(self, message: str, locale: str = "en", context: str = None, session: Optional[ChatSession] = None) -> str:
+        local = await self._local_reply(message, locale)
+        if local is not None:
+            return local
+            
+        # 4. Final Fallback: Ask OpenAI for an intelligent answer
+        if not self.async_client:
+            return self._unknown_reply(locale)
+        cached = self._cached_answer(message, locale, context, session)
+        if cached is not None:
+            return cached
+
+        async def call():
+            logger.info(f"Using OpenAI fallback for message: {message[:50]}... Locale: {locale}")
+            response = await self.async_client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=self._llm_messages(message, locale, context, session),
+                temperature=0.7,
+                max_tokens=150
+            )
+            answer = response.choices[0].message.content
+            # Only real answers are cached, never the fallback reply
+            self._store_answer(message, locale, context, session, answer)
+            return answer
+
+        return await call_with_fallback(call, lambda: self._unknown_reply(locale), "in OpenAI chat fallback")
+
+    async def stream_response(self, message: str, locale: str = "en", context: str = None, session: Optional[ChatSession] = None) -> AsyncIterator[str]:
+        """
+        Same answers as get_response, as chunks: local replies arrive as a single
+        chunk, LLM fallback tokens are forwarded as they arrive.
+        """
+        local = await self._local_reply(message, locale)
+        if local is not None:
+            yield local
+            return
+
+        cached = self._cached_answer(message, locale, context, session) if self.async_client else None
+        if cached is not None:
+            yield cached
+            return
+
+        if self.async_client and llm_breaker.allow():
+            streamed = False
+            parts = []
+            try:
+                logger.info(f"Streaming OpenAI fallback for message: {message[:50]}... Locale: {locale}")
+                stream = await asyncio.wait_for(
+                    self.async_client.chat.completions.create(
+                        model="gpt-3.5-turbo",
+                        messages=self._llm_messages(message, locale, context, session),
+                        temperature=0.7,
+                        max_tokens=150,
+                        stream=True
+                    ),
+                    remaining_budget(settings.LLM_TIMEOUT_SECONDS)
+                )
+                chunks = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), remaining_budget(settings.LLM_TIMEOUT_SECONDS))
+                    except StopAsyncIteration:
+                        break
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        streamed = True
+                        parts.append(delta)
+                        yield delta
+                llm_breaker.record_success()
+                if streamed:
+                    self._store_answer(message, locale, context, session, "".join(parts))
+                    return
+            except (asyncio.CancelledError, GeneratorExit):
+                llm_breaker.release_probe()
+                raise
+            except Exception as e:
+                reason = "timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+                logger.error(f"OpenAI Chat streaming failed: {reason}")
+                llm_breaker.record_failure()
+                if streamed:
+                    # Part of the answer is already on the client; end it there
+                    return
+
+        yield self._unknown_reply(locale)
+
+    async def _local_reply(self, message: str, locale: str) -> Optional[str]:
+        """Reply from intent detection and the knowledge base, or None when the LLM is needed."""
         message_low = message.lower().strip()
         
         if not message_low:
@@ -124,11 +253,11 @@ class ChatService:
         
         if self.model:
             try:
-                # Predict intent
-                intent = self.model.predict([message])[0]
-                # Get probability
-                probs = self.model.predict_proba([message])[0]
-                confidence = max(probs)
+                # The vectorizer lowercases and tokenizes on word boundaries, so
+                # case and whitespace variants of a message share one cache entry
+                key = make_key(model_version(self.model_path), " ".join(message_low.split()))
+                prediction = await intent_cache.get_or_compute(key, lambda: self._predict_intent(message))
+                intent, confidence = prediction["intent"], prediction["confidence"]
                 
                 # If confidence is too low, fall back
                 if confidence < 0.3:
@@ -160,42 +289,66 @@ class ChatService:
                 main_response = f"{main_response} {closer}"
             
             return main_response
-            
-        # 4. Final Fallback: Ask OpenAI for an intelligent answer
-        if self.client:
-            try:
-                logger.info(f"Using OpenAI fallback for message: {message[:50]}... Locale: {locale}")
-                context_info = f" The user is currently on the page: {context}." if context else ""
-                response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": f"You are the AI assistant for KhmerWork, a premium freelance platform in Cambodia. {lang_instruction}{context_info} Use this info to help: {str(self.knowledge_base)}. Be helpful, professional, and concise. If you don't know something about the platform specifically, give a general helpful freelance advice."},
-                        {"role": "user", "content": message}
-                    ],
-                    temperature=0.7,
-                    max_tokens=150
-                )
-                return response.choices[0].message.content
-            except Exception as e:
-                logger.error(f"OpenAI Chat fallback failed: {e}")
 
+        return None
+
+    def _llm_messages(self, message: str, locale: str, context: Optional[str], session: Optional[ChatSession]) -> List[Dict[str, str]]:
+        lang_instruction = "Always reply in Khmer." if locale == "km" else "Reply in the user's language."
+        context_info = f" The user is currently on the page: {context}." if context else ""
+        system_prompt = f"You are the AI assistant for KhmerWork, a premium freelance platform in Cambodia. {lang_instruction}{context_info} Use this info to help: {str(self.knowledge_base)}. Be helpful, professional, and concise. If you don't know something about the platform specifically, give a general helpful freelance advice."
+        # Earlier turns are included only as far as the token budget allows
+        if session is not None:
+            return session.build_messages(system_prompt, message)
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": message}
+        ]
+
+    def _cacheable(self, message: str, session: Optional[ChatSession]) -> bool:
+        # Answers after earlier turns are built from that user's conversation, so they are
+        # neither served from nor shared through the cache. Very short messages
+        # ("and in Khmer?") lean on the conversation, not their wording.
+        if session is not None and session.turns:
+            return False
+        return settings.CHAT_SEMANTIC_CACHE_ENABLED and len(tokenize(message)) >= 3
+
+    def _cached_answer(self, message: str, locale: str, context: Optional[str], session: Optional[ChatSession]) -> Optional[str]:
+        if not self._cacheable(message, session):
+            return None
+        answer = answer_cache.lookup(f"{locale}|{context or ''}", message)
+        if answer is not None:
+            logger.info(f"Semantic cache hit for fallback message: {message[:50]}...")
+        return answer
+
+    def _store_answer(self, message: str, locale: str, context: Optional[str], session: Optional[ChatSession], answer: Optional[str]):
+        if answer and self._cacheable(message, session):
+            answer_cache.store(f"{locale}|{context or ''}", message, answer)
+
+    def _unknown_reply(self, locale: str) -> str:
         if locale == "km":
             return random.choice(["ហ៊ឹម ខ្ញុំមិនទាន់ច្បាស់អំពីចំណុចនោះនៅឡើយទេ។ ខ្ញុំកំពុងរៀនបន្ថែម!", "នោះហួសពីអ្វីដែលខ្ញុំដឹងនៅពេលនេះ។ ចង់និយាយអំពីការងារ ឬតម្លៃជំនួសវិញទេ?", "ខ្ញុំមិនសូវយល់ទេ។ តើអ្នកអាចសាកល្បងនិយាយម្ដងទៀតបានទេ?"])
         return random.choice(self.unknown)
 
+    async def _predict_intent(self, message: str) -> Dict[str, Any]:
+        return await executor.run("intent", predict_intent, self.model_path, message)
+
     def _detect_intent_rules(self, message: str) -> str:
         patterns = {
             "greeting": ["hi", "hello", "hey", "greetings", "សួស្ដី", "ជម្រាបសួរ", "សុខសប្បាយ"],
             "jobs": ["job", "work", "find", "remote", "freelance", "ការងារ", "រកការងារ", "ស្វែងរក"],
             "pricing": ["price", "cost", "pay", "free", "តម្លៃ", "លុយ", "បង់"],
             "contact": ["contact", "support", "email", "ទំនាក់ទំនង", "ជំនួយ", "ផ្ញើសារ"],
-            "hiring": ["hire", "employer", "post", "រើសបុគ្គលិក", "ជួល", "ប្រកាស"],
+            "hiring": ["hire", "hiring", "employer", "post", "រើសបុគ្គលិក", "ជួល", "ប្រកាស"],
             "profile": ["profile", "resume", "cv", "ប្រវត្តិរូប", "ជំនាញ"],
             "ai": ["ai", "bot", "assistant", "ជំនួយការ", "ឆ្លាត"]
         }
 
+        # Match on word tokens so "hi" no longer fires inside "this" and Khmer
+        # sentences are split into words; longer Latin keywords also match as
+        # word prefixes ("job" -> "jobs", "pay" -> "payment")
+        tokens = tokenize(message)
         for intent, keywords in patterns.items():
-            if any(keyword in message for keyword in keywords):
+            if any(contains_phrase(tokens, tokenize_phrase(k), prefix=k.isascii() and len(k) > 2) for k in keywords):
                 return intent
                 
         return "unknown"
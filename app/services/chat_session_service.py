@@ -0,0 +1,243 @@
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from app.utils.config import settings, shared_state_backend
+from app.utils.tokens import estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+class ChatSession:
+    def __init__(self, session_id: str, turns: Optional[List[Dict[str, str]]] = None, summary: str = "", last_active: Optional[float] = None):
+        self.session_id = session_id
+        self.turns = turns or []
+        self.summary = summary
+        self.last_active = last_active or time.time()
+
+    def add_turn(self, role: str, content: str):
+        self.turns.append({"role": role, "content": content})
+        self.last_active = time.time()
+        self._compact()
+
+    def add_exchange(self, message: str, reply: str):
+        self.add_turn("user", message)
+        self.add_turn("assistant", reply)
+
+    def update_from(self, other: "ChatSession"):
+        self.turns, self.summary, self.last_active = other.turns, other.summary, other.last_active
+
+    def _compact(self):
+        """Fold turns beyond the verbatim window into a rolling, size-capped summary."""
+        max_turns = max(2, settings.CHAT_SESSION_MAX_TURNS)
+        if len(self.turns) <= max_turns:
+            return
+        old, self.turns = self.turns[:-max_turns], self.turns[-max_turns:]
+        lines = [self.summary] if self.summary else []
+        for turn in old:
+            label = "User" if turn["role"] == "user" else "Assistant"
+            lines.append(f"{label}: {truncate_to_tokens(turn['content'], 40)}")
+        # Keep the most recent part of the summary when it outgrows its budget
+        self.summary = truncate_to_tokens("\n".join(lines), settings.CHAT_SUMMARY_MAX_TOKENS, keep="tail")
+
+    def build_messages(self, system_prompt: str, message: str, budget: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Messages for the LLM that fit `budget` tokens: the system prompt and the new
+        message always go in, then the summary, then as many recent turns as fit.
+        """
+        budget = budget or settings.CHAT_CONTEXT_TOKEN_BUDGET
+        remaining = budget - estimate_tokens(system_prompt)
+        message = truncate_to_tokens(message, max(remaining // 2, 1), keep="tail")
+        remaining -= estimate_tokens(message)
+
+        history: List[Dict[str, str]] = []
+        for turn in reversed(self.turns):
+            cost = estimate_tokens(turn["content"])
+            if cost > remaining:
+                break
+            history.insert(0, turn)
+            remaining -= cost
+
+        messages = [{"role": "system", "content": system_prompt}]
+        header = "Earlier in this conversation:\n"
+        summary_budget = remaining - estimate_tokens(header)
+        if self.summary and summary_budget > 20:
+            summary = truncate_to_tokens(self.summary, summary_budget, keep="tail")
+            messages.append({"role": "system", "content": header + summary})
+        messages.extend(history)
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "session_id": self.session_id,
+            "turns": self.turns,
+            "summary": self.summary,
+            "last_active": self.last_active
+        }, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw) -> "ChatSession":
+        data = json.loads(raw)
+        return cls(data["session_id"], data["turns"], data["summary"], data["last_active"])
+
+class InMemorySessionStore:
+    """LRU of sessions bounded by count, with idle sessions expired on access."""
+
+    def __init__(self, max_sessions: int, idle_seconds: int):
+        self.max_sessions = max(1, max_sessions)
+        self.idle_seconds = idle_seconds
+        self._sessions: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    async def get(self, session_id: str) -> Optional[ChatSession]:
+        with self._lock:
+            raw = self._sessions.get(session_id)
+            if raw is None:
+                return None
+            session = ChatSession.from_json(raw)
+            if time.time() - session.last_active > self.idle_seconds:
+                del self._sessions[session_id]
+                self.expired += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return session
+
+    async def save(self, session: ChatSession):
+        with self._lock:
+            self._put(session)
+
+    async def append_exchange(self, session_id: str, message: str, reply: str) -> ChatSession:
+        """Add an exchange to the latest stored version of a session, atomically."""
+        with self._lock:
+            raw = self._sessions.get(session_id)
+            session = ChatSession.from_json(raw) if raw else ChatSession(session_id)
+            session.add_exchange(message, reply)
+            self._put(session)
+        return session
+
+    def _put(self, session: ChatSession):
+        # Sessions are stored serialized so the byte count below is the real footprint
+        self._sessions[session.session_id] = session.to_json()
+        self._sessions.move_to_end(session.session_id)
+        self._expire_idle()
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def _expire_idle(self):
+        cutoff = time.time() - self.idle_seconds
+        # Oldest-accessed first, so stop at the first session that is still active
+        for session_id in list(self._sessions):
+            if json.loads(self._sessions[session_id])["last_active"] >= cutoff:
+                break
+            del self._sessions[session_id]
+            self.expired += 1
+
+    async def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sizes = [len(raw.encode("utf-8")) for raw in self._sessions.values()]
+        return {
+            "backend": "memory",
+            "sessions": len(sizes),
+            "max_sessions": self.max_sessions,
+            "total_bytes": sum(sizes),
+            "avg_bytes_per_session": round(sum(sizes) / len(sizes), 1) if sizes else 0.0,
+            "max_bytes_per_session": max(sizes) if sizes else 0,
+            "evicted": self.evicted,
+            "expired": self.expired
+        }
+
+class RedisSessionStore:
+    """Sessions shared by all workers; Redis expires them after the idle timeout."""
+
+    def __init__(self, url: str, idle_seconds: int, prefix: str = "chat:session:"):
+        import redis.asyncio as aioredis
+        self.client = aioredis.from_url(url)
+        self.idle_seconds = idle_seconds
+        self.prefix = prefix
+
+    async def get(self, session_id: str) -> Optional[ChatSession]:
+        raw = await self.client.get(self.prefix + session_id)
+        return ChatSession.from_json(raw) if raw else None
+
+    async def save(self, session: ChatSession):
+        await self.client.set(self.prefix + session.session_id, session.to_json(), ex=self.idle_seconds)
+
+    async def append_exchange(self, session_id: str, message: str, reply: str) -> ChatSession:
+        """
+        Add an exchange to the latest stored version of a session. The key is watched,
+        so a write by another worker in between makes the transaction retry on fresh data.
+        """
+        from redis.exceptions import WatchError
+        key = self.prefix + session_id
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    raw = await pipe.get(key)
+                    session = ChatSession.from_json(raw) if raw else ChatSession(session_id)
+                    session.add_exchange(message, reply)
+                    pipe.multi()
+                    pipe.set(key, session.to_json(), ex=self.idle_seconds)
+                    await pipe.execute()
+                    return session
+                except WatchError:
+                    continue
+
+    async def stats(self) -> Dict[str, Any]:
+        count = 0
+        total_bytes = 0
+        async for key in self.client.scan_iter(match=self.prefix + "*", count=1000):
+            count += 1
+            total_bytes += await self.client.strlen(key)
+        return {
+            "backend": "redis",
+            "sessions": count,
+            "total_bytes": total_bytes,
+            "avg_bytes_per_session": round(total_bytes / count, 1) if count else 0.0
+        }
+
+_store = None
+
+def get_session_store():
+    global _store
+    if _store is None:
+        if shared_state_backend(settings.CHAT_SESSION_BACKEND) == "redis":
+            _store = RedisSessionStore(settings.CHAT_SESSION_REDIS_URL, settings.CHAT_SESSION_IDLE_SECONDS)
+        else:
+            _store = InMemorySessionStore(settings.CHAT_MAX_SESSIONS, settings.CHAT_SESSION_IDLE_SECONDS)
+    return _store
+
+class ChatSessionService:
+    def __init__(self, store=None):
+        self.store = store or get_session_store()
+
+    async def get_or_create(self, session_id: Optional[str]) -> ChatSession:
+        """The stored session, or a new one; ids are always minted here, never taken from the client."""
+        if session_id:
+            try:
+                session = await self.store.get(session_id)
+                if session is not None:
+                    return session
+            except Exception as e:
+                logger.error(f"Failed to load chat session {session_id}: {e}")
+        return ChatSession(uuid.uuid4().hex)
+
+    async def record_exchange(self, session: ChatSession, message: str, reply: str):
+        """
+        Append an exchange to the stored session, so concurrent requests on one session
+        each add theirs instead of overwriting each other, and refresh `session` from it.
+        """
+        try:
+            session.update_from(await self.store.append_exchange(session.session_id, message, reply))
+        except Exception as e:
+            logger.error(f"Failed to save chat session {session.session_id}: {e}")
+            session.add_exchange(message, reply)
+
+    async def stats(self) -> Dict[str, Any]:
+        return await self.store.stats()
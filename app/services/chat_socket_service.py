@@ -0,0 +1,158 @@
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+from fastapi import WebSocket, WebSocketDisconnect
+from app.utils.config import settings
+from app.utils.resilience import deadline_scope
+from app.services.chat_service import ChatService
+from app.services.chat_session_service import ChatSessionService
+
+logger = logging.getLogger(__name__)
+
+class ConnectionLimiter:
+    """Caps open chat sockets per worker."""
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max(1, max_connections)
+        self.active = 0
+        self.accepted = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        if self.active >= self.max_connections:
+            self.rejected += 1
+            return False
+        self.active += 1
+        self.accepted += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "max_connections": self.max_connections,
+            "accepted": self.accepted,
+            "rejected": self.rejected
+        }
+
+connections = ConnectionLimiter(settings.CHAT_WS_MAX_CONNECTIONS)
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Consume one token; returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+class ChatSocketHandler:
+    """
+    One chat session per connection. Client frames are JSON:
+    {"type": "message", "message", "locale", "context"} or {"type": "pong"}.
+    The server sends "session", then per message a run of "token" frames and an
+    "end" frame with the full reply; "ping" heartbeats; "error" for rejected input.
+    """
+
+    def __init__(self, websocket: WebSocket, service: ChatService, sessions: ChatSessionService):
+        self.websocket = websocket
+        self.service = service
+        self.sessions = sessions
+        self.bucket = TokenBucket(settings.CHAT_WS_MESSAGES_PER_MINUTE, settings.CHAT_WS_BURST)
+        self.last_seen = time.monotonic()
+        self.last_message = self.last_seen
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, payload: Dict[str, Any]):
+        # Heartbeats and replies are sent from different tasks
+        async with self._send_lock:
+            await self.websocket.send_json(payload)
+
+    async def run(self, session_id: Optional[str] = None):
+        await self.websocket.accept()
+        if not connections.try_acquire():
+            logger.warning("Rejecting chat socket: connection limit reached")
+            await self.websocket.close(code=1013, reason="Too many connections")
+            return
+        heartbeat = None
+        try:
+            session = await self.sessions.get_or_create(session_id)
+            await self.send({"type": "session", "session_id": session.session_id})
+            heartbeat = asyncio.create_task(self._heartbeat())
+            await self._receive_loop(session)
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.error(f"Chat socket failed: {e}")
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            connections.release()
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(settings.CHAT_WS_HEARTBEAT_SECONDS)
+            await self.send({"type": "ping"})
+
+    async def _receive_loop(self, session):
+        interval = settings.CHAT_WS_HEARTBEAT_SECONDS
+        while True:
+            try:
+                data = await asyncio.wait_for(self.websocket.receive_json(), interval)
+            except asyncio.TimeoutError:
+                data = None
+            except ValueError:
+                await self.send({"type": "error", "code": "invalid_json", "detail": "Frames must be JSON objects"})
+                continue
+
+            now = time.monotonic()
+            if data is None:
+                if now - self.last_seen > 2 * interval:
+                    await self.websocket.close(code=1001, reason="Heartbeat timeout")
+                    return
+                if now - self.last_message > settings.CHAT_WS_IDLE_TIMEOUT_SECONDS:
+                    await self.websocket.close(code=1000, reason="Idle timeout")
+                    return
+                continue
+
+            self.last_seen = now
+            kind = data.get("type") if isinstance(data, dict) else None
+            if kind == "pong":
+                continue
+            if kind == "ping":
+                await self.send({"type": "pong"})
+                continue
+            if kind != "message" or not isinstance(data.get("message"), str):
+                await self.send({"type": "error", "code": "invalid_frame", "detail": "Expected a message frame"})
+                continue
+
+            retry_after = self.bucket.take()
+            if retry_after:
+                await self.send({"type": "error", "code": "rate_limited", "retry_after": round(retry_after, 1)})
+                continue
+
+            self.last_message = now
+            await self._reply(session, data["message"], data.get("locale") or "en", data.get("context"))
+            # Time spent streaming counts as activity
+            self.last_seen = self.last_message = time.monotonic()
+
+    async def _reply(self, session, message: str, locale: str, context: Optional[str]):
+        parts = []
+        with deadline_scope(settings.REQUEST_DEADLINE_SECONDS, replace=True):
+            async for chunk in self.service.stream_response(message, locale, context, session=session):
+                parts.append(chunk)
+                await self.send({"type": "token", "content": chunk})
+        reply = "".join(parts)
+        await self.send({"type": "end", "reply": reply, "session_id": session.session_id})
+        await self.sessions.record_exchange(session, message, reply)
@@ -1,15 +1,28 @@
 import logging
 import json
-from typing import List, Optional
-from openai import OpenAI
+from typing import Any, Callable, List, Optional
+from openai import AsyncOpenAI
 from app.utils.config import settings
+from app.utils.resilience import call_with_fallback
+from app.utils.compression import compress_fields
 
 logger = logging.getLogger(__name__)
 
+class GenerationUnavailable(Exception):
+    """Raised in strict mode where the local fallback content would have been returned."""
+
+    def __init__(self, reason: str, fallback: Any):
+        super().__init__(reason)
+        self.fallback = fallback
+
 class GenerationService:
-    def __init__(self):
+    def __init__(self, strict: bool = False):
         self.api_key = settings.OPENAI_API_KEY
-        self.client = OpenAI(api_key=self.api_key) if self.api_key else None
+        # Retries and timeouts are handled by call_with_fallback, within the request deadline
+        self.client = AsyncOpenAI(api_key=self.api_key, max_retries=0) if self.api_key else None
+        # Strict callers (bulk jobs) retry themselves and must tell fallback content apart
+        self.strict = strict
+        self.hedge_delay = 0 if strict else None
 
     async def generate_proposal(
         self, 
@@ -22,7 +35,13 @@ class GenerationService:
         """Generate a personalized job proposal/cover letter"""
         
         if not self.client:
-            return self._mock_proposal(job_title, job_description, user_skills)
+            return self._fallback("no API key configured", lambda: self._mock_proposal(job_title, job_description, user_skills))
+
+        # Long postings/bios are cut down to their sentences most relevant to the title and skills
+        inputs = compress_fields("proposal", f"{job_title} {' '.join(user_skills)}", {
+            "description": (job_description, settings.PROPOSAL_DESCRIPTION_TOKEN_BUDGET),
+            "bio": (user_bio, settings.PROPOSAL_BIO_TOKEN_BUDGET)
+        })
 
         prompt = f"""
         Role: Expert Freelance Career Coach
@@ -30,11 +49,11 @@ class GenerationService:
         
         Job Details:
         Title: {job_title}
-        Description: {job_description}
+        Description: {inputs["description"]}
         
         Freelancer Details:
         Skills: {", ".join(user_skills)}
-        Bio: {user_bio or "N/A"}
+        Bio: {inputs["bio"] or "N/A"}
         
         Requirements:
         1. Tone should be {tone}.
@@ -44,16 +63,20 @@ class GenerationService:
         5. DO NOT use placeholders like [Name] - assume the recipient knows the freelancer's name.
         """
 
-        try:
-            response = self.client.chat.completions.create(
+        async def call():
+            response = await self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.7
             )
             return response.choices[0].message.content
-        except Exception as e:
-            logger.error(f"Error generating proposal: {e}")
-            return self._mock_proposal(job_title, job_description, user_skills)
+
+        return await call_with_fallback(
+            call,
+            lambda: self._fallback("proposal generation failed", lambda: self._mock_proposal(job_title, job_description, user_skills)),
+            "generating proposal",
+            hedge_delay=self.hedge_delay
+        )
 
     async def generate_job_description(
         self,
@@ -65,7 +88,7 @@ class GenerationService:
         """Generate a complete job description with responsibilities and requirements"""
         
         if not self.client:
-            return self._mock_job_description(title, industry)
+            return self._fallback("no API key configured", lambda: self._mock_job_description(title, industry))
 
         prompt = f"""
         Task: Create a professional job posting for the position of "{title}" in the "{industry}" industry.
@@ -78,17 +101,23 @@ class GenerationService:
         - "requirements": A list of 5-7 technical and soft skill requirements.
         """
 
-        try:
-            response = self.client.chat.completions.create(
+        async def call():
+            response = await self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}],
                 response_format={"type": "json_object"},
                 temperature=0.7
             )
-            return json.loads(response.choices[0].message.content)
+            return response.choices[0].message.content
+
+        content = await call_with_fallback(call, lambda: None, "generating job description", hedge_delay=self.hedge_delay)
+        if content is None:
+            return self._fallback("job description generation failed", lambda: self._mock_job_description(title, industry))
+        try:
+            return json.loads(content)
         except Exception as e:
-            logger.error(f"Error generating job description: {e}")
-            return self._mock_job_description(title, industry)
+            logger.error(f"Error parsing job description: {e}")
+            return self._fallback("unparseable job description", lambda: self._mock_job_description(title, industry))
 
     async def generate_interview_questions(
         self,
@@ -100,17 +129,22 @@ class GenerationService:
         """Generate tailored interview questions based on job and candidate profile"""
         
         if not self.client:
-            return self._mock_interview_questions(job_title)
+            return self._fallback("no API key configured", lambda: self._mock_interview_questions(job_title))
+
+        inputs = compress_fields("interview_questions", f"{job_title} {' '.join(candidate_skills)}", {
+            "description": (job_description, settings.INTERVIEW_DESCRIPTION_TOKEN_BUDGET),
+            "bio": (candidate_bio, settings.INTERVIEW_BIO_TOKEN_BUDGET)
+        })
 
         prompt = f"""
         Role: Expert Technical Interviewer
         Task: Generate 4 unique, challenging interview questions tailored to this specific candidate's profile for the given job.
         
         Job Title: {job_title}
-        Job Description: {job_description}
+        Job Description: {inputs["description"]}
         
         Candidate Skills: {", ".join(candidate_skills)}
-        Candidate Bio: {candidate_bio or "N/A"}
+        Candidate Bio: {inputs["bio"] or "N/A"}
         
         Requirements:
         1. Questions should probe the gap between the candidate's skills and the job requirements.
@@ -120,18 +154,32 @@ class GenerationService:
         Return the result as a JSON object with a single key "questions" containing a list of strings.
         """
 
-        try:
-            response = self.client.chat.completions.create(
+        async def call():
+            response = await self.client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[{"role": "user", "content": prompt}],
                 response_format={"type": "json_object"},
                 temperature=0.8
             )
-            data = json.loads(response.choices[0].message.content)
-            return data.get("questions", self._mock_interview_questions(job_title))
+            return response.choices[0].message.content
+
+        content = await call_with_fallback(call, lambda: None, "generating interview questions", hedge_delay=self.hedge_delay)
+        if content is None:
+            return self._fallback("interview question generation failed", lambda: self._mock_interview_questions(job_title))
+        try:
+            data = json.loads(content)
         except Exception as e:
-            logger.error(f"Error generating interview questions: {e}")
-            return self._mock_interview_questions(job_title)
+            logger.error(f"Error parsing interview questions: {e}")
+            data = {}
+        if not isinstance(data, dict) or not data.get("questions"):
+            return self._fallback("unparseable interview questions", lambda: self._mock_interview_questions(job_title))
+        return data["questions"]
+
+    def _fallback(self, reason: str, make: Callable[[], Any]) -> Any:
+        content = make()
+        if self.strict:
+            raise GenerationUnavailable(reason, content)
+        return content
 
     def _mock_proposal(self, job_title: str, job_description: str, skills: List[str]) -> str:
         skill_str = ", ".join(skills[:3]) if skills else "relevant technologies"
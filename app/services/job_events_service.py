@@ -0,0 +1,384 @@
+"""
+Near-real-time job updates for matching.
+
+The backend appends one entry per job change to a Redis stream
+(settings.JOB_EVENTS_STREAM) with string fields:
+
+    type                          "job.created" | "job.updated" | "job.deleted"
+    job_id
+    title, description, skills    for created/updated (skills comma-separated)
+    ts                            event time, epoch milliseconds
+
+One consumer process (`python -m app.job_events`) reads the stream in batches through
+a consumer group, embeds created and edited jobs with the matching embedder, and keeps
+a delta over the last built "jobs" ANN index: vectors for changed jobs and tombstones
+hiding the index's stale copies of them. After each batch the delta is published
+beside the index (arrays swapped in as a directory, like the index itself) and only
+then acknowledged, so after a restart the group redelivers exactly the unpublished
+entries. Events are applied idempotently per job by timestamp, so replays are safe.
+
+API workers reopen the delta when it changes and merge it into job searches. A newly
+trained index rebases the delta: changes well before the build are dropped and the
+rest are re-embedded with the new embedder.
+"""
+import os
+import json
+import time
+import shutil
+import logging
+import numpy as np
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from app.utils.config import settings
+from app.utils.cache import model_version
+from app.utils.model_registry import load_model
+from app.utils.ann_index import META_FILE
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = {"job.created", "job.updated", "job.deleted"}
+
+def parse_event(entry_id: str, fields: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """Normalized event, or None for entries that are not job events."""
+    kind = fields.get("type")
+    job_id = fields.get("job_id")
+    if kind not in EVENT_TYPES or not job_id:
+        return None
+    try:
+        ts = int(fields.get("ts") or 0)
+    except ValueError:
+        ts = 0
+    title = fields.get("title") or ""
+    text = " ".join(part for part in (title, fields.get("description"), fields.get("skills")) if part)
+    return {"entry_id": entry_id, "type": kind, "job_id": job_id, "title": title, "text": text, "ts": ts}
+
+class InMemoryStreamSource:
+    """Stand-in for a Redis stream and consumer group, for tests and local runs."""
+
+    def __init__(self):
+        self.entries: List[Tuple[str, Dict[str, str]]] = []
+        self.delivered = 0
+        self.pending: Dict[str, Dict[str, str]] = {}
+        self._seq = 0
+
+    def add(self, fields: Dict[str, Any]) -> str:
+        self._seq += 1
+        entry_id = f"{int(time.time() * 1000)}-{self._seq}"
+        self.entries.append((entry_id, {k: str(v) for k, v in fields.items()}))
+        return entry_id
+
+    def read(self, count: int, block_ms: int, pending: bool = False) -> List[Tuple[str, Dict[str, str]]]:
+        if pending:
+            return list(self.pending.items())[:count]
+        batch = self.entries[self.delivered:self.delivered + count]
+        self.delivered += len(batch)
+        self.pending.update(batch)
+        return batch
+
+    def ack(self, entry_ids: List[str]):
+        for entry_id in entry_ids:
+            self.pending.pop(entry_id, None)
+
+    def backlog(self) -> Dict[str, Any]:
+        return {"pending": len(self.pending), "lag": len(self.entries) - self.delivered}
+
+class RedisStreamSource:
+    """Consumer-group reader; Redis keeps the group's offset and unacknowledged entries."""
+
+    def __init__(self, url: str, stream: str, group: str, consumer: str):
+        import redis
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer
+        try:
+            self.client.xgroup_create(stream, group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def read(self, count: int, block_ms: int, pending: bool = False) -> List[Tuple[str, Dict[str, str]]]:
+        # "0" re-reads this consumer's delivered but unacknowledged entries, ">" new ones
+        response = self.client.xreadgroup(
+            self.group, self.consumer, {self.stream: "0" if pending else ">"},
+            count=count, block=None if pending else block_ms
+        )
+        # Pending entries trimmed from the stream come back without fields; they are acked as skipped
+        return [(entry_id, fields or {}) for _, entries in response or [] for entry_id, fields in entries]
+
+    def ack(self, entry_ids: List[str]):
+        if entry_ids:
+            self.client.xack(self.stream, self.group, *entry_ids)
+
+    def backlog(self) -> Dict[str, Any]:
+        for group in self.client.xinfo_groups(self.stream):
+            if group.get("name") == self.group:
+                # "lag" (entries not yet delivered) needs Redis 7
+                return {"pending": group.get("pending"), "lag": group.get("lag")}
+        return {}
+
+def get_event_source():
+    if settings.JOB_EVENTS_BACKEND == "memory":
+        return InMemoryStreamSource()
+    return RedisStreamSource(
+        settings.JOB_EVENTS_REDIS_URL, settings.JOB_EVENTS_STREAM, settings.JOB_EVENTS_GROUP, settings.JOB_EVENTS_CONSUMER
+    )
+
+def base_index_meta() -> Dict[str, Any]:
+    try:
+        with open(os.path.join(settings.MATCHING_INDEX_DIR, "jobs", META_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+class JobDelta:
+    """Read side, used by API workers: memory-mapped delta vectors and the set of tombstoned ids."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.tombstones = set(np.load(os.path.join(path, "tombstone_ids.npy")).tolist())
+        # Tombstoned jobs without a current version: deleted or closed
+        self.deleted = self.tombstones.difference(self.ids.tolist())
+
+    @classmethod
+    def load(cls, meta_path: str) -> "JobDelta":
+        return cls(os.path.dirname(meta_path))
+
+    def applies_to(self, index) -> bool:
+        return self.meta.get("base_built_at") == index.meta.get("built_at")
+
+    def merge(self, hits: List[Tuple[str, float]], query: np.ndarray, limit: int) -> List[Tuple[str, float]]:
+        """Drop stale base hits and add the best changed jobs, scored exactly."""
+        results = [(job_id, score) for job_id, score in hits if job_id not in self.tombstones]
+        if len(self.ids):
+            scores = self.vectors @ np.asarray(query, dtype=np.float32).ravel()
+            k = min(limit, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            results += [(str(self.ids[i]), float(scores[i])) for i in top]
+        results.sort(key=lambda hit: -hit[1])
+        return results[:limit]
+
+def load_job_delta() -> Optional[JobDelta]:
+    return load_model(os.path.join(settings.JOB_EVENTS_DELTA_DIR, META_FILE), loader=JobDelta.load)
+
+class JobDeltaState:
+    """
+    Write side, owned by the consumer. `tombstones` maps every job touched by an event
+    to the timestamp of its latest one, which also serves as the idempotency check;
+    `jobs` holds the current vector of those that still exist.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.tombstones: Dict[str, int] = {}
+        self.base_built_at = None
+        self.embedder_version = None
+        self.last_entry_id = None
+
+    @classmethod
+    def restore(cls, path: str) -> "JobDeltaState":
+        state = cls()
+        if not os.path.exists(os.path.join(path, META_FILE)):
+            return state
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy")) for name in
+                  ("ids", "vectors", "titles", "texts", "job_ts", "tombstone_ids", "tombstone_ts")}
+        for i, job_id in enumerate(arrays["ids"].tolist()):
+            state.jobs[job_id] = {
+                "vector": arrays["vectors"][i],
+                "title": str(arrays["titles"][i]),
+                "text": str(arrays["texts"][i]),
+                "ts": int(arrays["job_ts"][i])
+            }
+        state.tombstones = dict(zip(arrays["tombstone_ids"].tolist(), arrays["tombstone_ts"].tolist()))
+        state.base_built_at = meta.get("base_built_at")
+        state.embedder_version = meta.get("embedder_version")
+        state.last_entry_id = meta.get("last_entry_id")
+        logger.info(f"Restored job delta: {len(state.jobs)} jobs, {len(state.tombstones)} tombstones")
+        return state
+
+    def rebase(self, base_built_at: Optional[float], embedder_version: str, embedder) -> bool:
+        """Follow a newly trained index/embedder; returns True if anything changed."""
+        if base_built_at == self.base_built_at and embedder_version == self.embedder_version:
+            return False
+        if base_built_at is not None:
+            # Changes this old are part of the dataset the new index was built from
+            cutoff = (base_built_at - settings.JOB_EVENTS_REBASE_MARGIN_SECONDS) * 1000
+            self.tombstones = {job_id: ts for job_id, ts in self.tombstones.items() if ts >= cutoff}
+            self.jobs = {job_id: job for job_id, job in self.jobs.items() if job_id in self.tombstones}
+        if self.jobs:
+            vectors = embedder.transform([job["text"] for job in self.jobs.values()])
+            for job, vector in zip(self.jobs.values(), vectors):
+                job["vector"] = np.asarray(vector, dtype=np.float32)
+        logger.info(f"Rebased job delta on index built at {base_built_at}: {len(self.jobs)} jobs kept")
+        self.base_built_at = base_built_at
+        self.embedder_version = embedder_version
+        return True
+
+    def apply(self, events: List[Dict[str, Any]], embedder) -> Tuple[int, int]:
+        """Apply events in stream order; returns (applied, skipped as out of date)."""
+        applied = skipped = 0
+        upserts: Dict[str, Dict[str, Any]] = {}
+        for event in events:
+            job_id = event["job_id"]
+            if event["ts"] < self.tombstones.get(job_id, -1):
+                skipped += 1
+                continue
+            # Whatever the index holds for this job is stale from now on
+            self.tombstones[job_id] = event["ts"]
+            if event["type"] == "job.deleted":
+                self.jobs.pop(job_id, None)
+                upserts.pop(job_id, None)
+            else:
+                upserts[job_id] = event
+            applied += 1
+        if upserts:
+            # One embedder call per batch
+            vectors = embedder.transform([event["text"] for event in upserts.values()])
+            for event, vector in zip(upserts.values(), vectors):
+                self.jobs[event["job_id"]] = {
+                    "vector": np.asarray(vector, dtype=np.float32),
+                    "title": event["title"],
+                    "text": event["text"],
+                    "ts": event["ts"]
+                }
+        return applied, skipped
+
+    def publish(self, path: str, dim: int):
+        jobs = list(self.jobs.items())
+        arrays = {
+            "ids": np.asarray([job_id for job_id, _ in jobs], dtype=np.str_),
+            "vectors": np.stack([job["vector"] for _, job in jobs]) if jobs else np.zeros((0, dim), dtype=np.float32),
+            "titles": np.asarray([job["title"] for _, job in jobs], dtype=np.str_),
+            "texts": np.asarray([job["text"] for _, job in jobs], dtype=np.str_),
+            "job_ts": np.asarray([job["ts"] for _, job in jobs], dtype=np.int64),
+            "tombstone_ids": np.asarray(list(self.tombstones), dtype=np.str_),
+            "tombstone_ts": np.asarray(list(self.tombstones.values()), dtype=np.int64)
+        }
+        meta = {
+            "base_built_at": self.base_built_at,
+            "embedder_version": self.embedder_version,
+            "last_entry_id": self.last_entry_id,
+            "jobs": len(jobs),
+            "tombstones": len(self.tombstones),
+            "published_at": time.time()
+        }
+        staging = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), array)
+        with open(os.path.join(staging, META_FILE), "w") as f:
+            json.dump(meta, f)
+        previous = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.replace(path, previous)
+        os.replace(staging, path)
+        shutil.rmtree(previous, ignore_errors=True)
+
+class JobEventConsumer:
+    def __init__(self, source=None, delta_dir: str = None):
+        self.source = source or get_event_source()
+        self.delta_dir = delta_dir or settings.JOB_EVENTS_DELTA_DIR
+        self.state = JobDeltaState.restore(self.delta_dir)
+        # Entries delivered before a crash are re-read before any new ones
+        self._recovering = True
+        self.events = 0
+        self.applied = 0
+        self.skipped = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_batch_seconds = 0.0
+        self.started = time.time()
+        self.lag_ms = deque(maxlen=1000)
+
+    def run_once(self) -> int:
+        """Process one batch (or an idle poll); returns the number of entries consumed."""
+        entries = []
+        if self._recovering:
+            entries = self.source.read(settings.JOB_EVENTS_BATCH_SIZE, 0, pending=True)
+            self._recovering = bool(entries)
+        if not entries:
+            entries = self.source.read(settings.JOB_EVENTS_BATCH_SIZE, settings.JOB_EVENTS_BLOCK_MS)
+
+        embedder = load_model(settings.MATCHING_LSA_MODEL_PATH)
+        if embedder is None:
+            self.write_stats()
+            if entries:
+                # Leave the batch unacknowledged; it is redelivered once a model is trained
+                self._recovering = True
+                raise RuntimeError("Matching embedder has not been trained (model_type=job_matching)")
+            return 0
+        rebased = self.state.rebase(base_index_meta().get("built_at"), model_version(settings.MATCHING_LSA_MODEL_PATH), embedder)
+        if not entries and not rebased:
+            self.write_stats()
+            return 0
+
+        started = time.perf_counter()
+        events = [event for event in (parse_event(entry_id, fields) for entry_id, fields in entries) if event]
+        applied, skipped = self.state.apply(events, embedder) if events else (0, 0)
+        if entries:
+            self.state.last_entry_id = entries[-1][0]
+        self.state.publish(self.delta_dir, embedder.dim)
+        self.source.ack([entry_id for entry_id, _ in entries])
+
+        now_ms = time.time() * 1000
+        self.lag_ms.extend(now_ms - event["ts"] for event in events if event["ts"])
+        self.events += len(entries)
+        self.applied += applied
+        self.skipped += skipped + len(entries) - len(events)
+        self.batches += 1 if entries else 0
+        self.last_batch_size = len(entries)
+        self.last_batch_seconds = time.perf_counter() - started
+        if len(self.state.jobs) > settings.JOB_EVENTS_MAX_DELTA:
+            logger.warning(f"Job delta holds {len(self.state.jobs)} jobs; retrain the matching index to fold them in")
+        self.write_stats()
+        return len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lags = sorted(self.lag_ms)
+        uptime = time.time() - self.started
+        try:
+            backlog = self.source.backlog()
+        except Exception as e:
+            backlog = {"error": str(e)}
+        return {
+            "events": self.events,
+            "applied": self.applied,
+            "skipped": self.skipped,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_ms": round(self.last_batch_seconds * 1000, 2),
+            "last_batch_events_per_second": round(self.last_batch_size / self.last_batch_seconds, 1) if self.last_batch_seconds else 0.0,
+            "events_per_second": round(self.events / uptime, 2) if uptime else 0.0,
+            # Event time to applied-and-published, for recent events
+            "ingest_lag_ms_p50": round(lags[len(lags) // 2], 1) if lags else None,
+            "ingest_lag_ms_p95": round(lags[min(len(lags) - 1, int(0.95 * len(lags)))], 1) if lags else None,
+            "backlog": backlog,
+            "delta_jobs": len(self.state.jobs),
+            "delta_tombstones": len(self.state.tombstones),
+            "last_entry_id": self.state.last_entry_id,
+            "updated_at": time.time()
+        }
+
+    def write_stats(self):
+        # Read by /api/ai/metrics/job-events in the API workers
+        path = self.delta_dir + ".stats.json"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.stats(), f)
+        os.replace(path + ".tmp", path)
+
+def read_consumer_stats() -> Dict[str, Any]:
+    try:
+        with open(settings.JOB_EVENTS_DELTA_DIR + ".stats.json") as f:
+            stats = json.load(f)
+    except (OSError, ValueError):
+        return {"running": False}
+    age = time.time() - stats["updated_at"]
+    # The consumer writes stats at least once per poll
+    return {"running": age < max(30.0, 5 * settings.JOB_EVENTS_BLOCK_MS / 1000), "stats_age_seconds": round(age, 1), **stats}
@@ -1,7 +1,76 @@
-from typing import List, Dict, Any
+import os
+import logging
+import numpy as np
+from typing import List, Dict, Any, Optional
+from app.utils.config import settings
+from app.utils.cache import ResultCache, get_shared_store, make_key, model_version
+from app.utils.model_registry import load_model
+from app.utils.ann_index import ANNIndex, META_FILE
+from app.utils.tokenizer import tokenize
+from app.utils.inference import executor
+from app.services.job_events_service import load_job_delta
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_VERSION = "overlap-v2"
+
+similarity_cache = ResultCache(
+    "similarity",
+    max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    ttl=settings.CACHE_TTL_SECONDS,
+    shared_store=get_shared_store()
+)
+
+def load_index(kind: str) -> Optional[ANNIndex]:
+    """Memory-mapped index for "jobs" or "profiles"; reopened when a rebuild is published."""
+    meta_path = os.path.join(settings.MATCHING_INDEX_DIR, kind, META_FILE)
+    return load_model(meta_path, loader=lambda path: ANNIndex.load(path, nprobe=settings.MATCHING_NPROBE))
+
+# Run on the inference executor; arguments are paths and text so they work in either pool
+def search_index(model_path: str, kind: str, text: str, limit: int, nprobe: Optional[int]):
+    embedder = load_model(model_path)
+    index = load_index(kind)
+    if embedder is None or index is None:
+        return None
+    query = embedder.embed(text)
+    delta = load_job_delta() if kind == "jobs" else None
+    if delta is None or not delta.applies_to(index):
+        return index.search(query, k=limit, nprobe=nprobe)
+    # Over-fetch so hits hidden by tombstones (edited/closed jobs) can be replaced
+    hits = index.search(query, k=limit + min(len(delta.tombstones), 4 * limit), nprobe=nprobe)
+    return delta.merge(hits, query, limit)
+
+def embedding_similarity(model_path: str, text1: str, text2: str) -> float:
+    vectors = load_model(model_path).transform([text1, text2])
+    return max(0.0, float(np.dot(vectors[0], vectors[1])))
+
+def overlap_similarity(text1: str, text2: str) -> float:
+    # Simple overlap coefficient for mock
+    words1 = set(tokenize(text1))
+    words2 = set(tokenize(text2))
+    intersection = words1.intersection(words2)
+    union = words1.union(words2)
+    return len(intersection) / len(union) if union else 0.0
 
 class JobMatchingService:
+    def _embedder(self):
+        return load_model(settings.MATCHING_LSA_MODEL_PATH)
+
+    async def semantic_search(self, text: str, kind: str, limit: int, nprobe: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Nearest jobs or profiles to `text` by embedding; None when no index is trained."""
+        hits = await executor.run("embedding", search_index, settings.MATCHING_LSA_MODEL_PATH, kind, text, limit, nprobe)
+        if hits is None:
+            return None
+        return [{"id": item_id, "score": round(max(0.0, score), 4)} for item_id, score in hits]
+
     async def find_matching_jobs(self, user_id: str, skills: List[str], preferences: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+        if skills:
+            hits = await self.semantic_search(" ".join(skills), "jobs", limit)
+            if hits is not None:
+                return [
+                    {"job_id": hit["id"], "similarity_score": hit["score"], "matching_skills": [], "missing_skills": []}
+                    for hit in hits
+                ]
         # Mock implementation adapting to user's skills for global departments
         matching_skills_1 = skills[:2] if len(skills) >= 2 else (skills if skills else ["Project Management", "Communication"])
         matching_skills_2 = skills[:1] if len(skills) >= 1 else (skills if skills else ["Analysis"])
@@ -30,9 +99,17 @@ class JobMatchingService:
         ]
 
     async def calculate_similarity(self, text1: str, text2: str) -> float:
-        # Simple overlap coefficient for mock
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        return len(intersection) / len(union) if union else 0.0
+        embedder = self._embedder()
+        # Keys carry the embedder version, so retraining invalidates cached scores
+        version = f"lsa-{model_version(settings.MATCHING_LSA_MODEL_PATH)}" if embedder is not None else SIMILARITY_VERSION
+        # The score is symmetric, so the pair is ordered to share one cache entry
+        key = make_key(version, sorted([text1, text2]))
+        if embedder is not None:
+            return await similarity_cache.get_or_compute(key, lambda: self._embedding_similarity(text1, text2))
+        return await similarity_cache.get_or_compute(key, lambda: self._calculate_similarity(text1, text2))
+
+    async def _embedding_similarity(self, text1: str, text2: str) -> float:
+        return await executor.run("embedding", embedding_similarity, settings.MATCHING_LSA_MODEL_PATH, text1, text2)
+
+    async def _calculate_similarity(self, text1: str, text2: str) -> float:
+        return await executor.run("similarity", overlap_similarity, text1, text2)
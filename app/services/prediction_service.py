@@ -1,16 +1,51 @@
 import os
-import joblib
 import pandas as pd
 import logging
 from typing import List, Dict, Any
+from app.utils.config import settings
+from app.utils.cache import ResultCache, get_shared_store, make_key, model_version
+from app.utils.model_registry import load_model
+from app.utils.inference import executor
+from app.utils.sparse_features import predict_sparse
+from app.utils.quantiles import SALARY_QUANTILES, interval_confidence, summarize
+from app.services.recommendation_service import get_store
+from app.services.job_events_service import load_job_delta
 
 logger = logging.getLogger(__name__)
 
+salary_cache = ResultCache(
+    "salary",
+    max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+    ttl=settings.CACHE_TTL_SECONDS,
+    shared_store=get_shared_store()
+)
+
+def load_keras_model(path: str):
+    import tensorflow as tf
+    # Serving needs no optimizer or loss (the quantile loss is a custom function)
+    return tf.keras.models.load_model(path, compile=False)
+
+# Run on the inference executor; artifacts are loaded once per process.
+# Both return the SALARY_QUANTILES values, or a single point estimate for models
+# trained before quantile outputs existed.
+def predict_salary_dl(dl_model_path: str, preprocessor_path: str, row: Dict[str, str]) -> List[float]:
+    model = load_model(dl_model_path, loader=load_keras_model)
+    preprocessor = load_model(preprocessor_path)
+    X_encoded = preprocessor.transform(pd.DataFrame([row]))
+    return predict_sparse(model, X_encoded)[0].tolist()
+
+def predict_salary_sklearn(model_path: str, row: Dict[str, str]) -> List[float]:
+    model = load_model(model_path)
+    estimator = model.steps[-1][1] if hasattr(model, "steps") else model
+    if hasattr(estimator, "predict_quantiles"):
+        return estimator.predict_quantiles(model[:-1].transform(pd.DataFrame([row])))[0].tolist()
+    return [float(model.predict(pd.DataFrame([row]))[0])]
+
 class PredictionService:
     def __init__(self):
-        self.model_path = "app/ml_models/salary_model.joblib"
-        self.dl_model_path = "app/ml_models/salary_dl_model.h5"
-        self.preprocessor_path = "app/ml_models/salary_preprocessor.joblib"
+        self.model_path = settings.SALARY_MODEL_PATH
+        self.dl_model_path = settings.SALARY_DL_MODEL_PATH
+        self.preprocessor_path = settings.SALARY_PREPROCESSOR_PATH
         
         self.model = self._load_model()
         self.dl_model = self._load_dl_model()
@@ -18,9 +53,7 @@ class PredictionService:
 
     def _load_model(self):
         try:
-            if os.path.exists(self.model_path):
-                return joblib.load(self.model_path)
-            return None
+            return load_model(self.model_path)
         except Exception as e:
             logger.error(f"Error loading scikit model: {e}")
             return None
@@ -28,8 +61,7 @@ class PredictionService:
     def _load_dl_model(self):
         try:
             if os.path.exists(self.dl_model_path):
-                import tensorflow as tf
-                return tf.keras.models.load_model(self.dl_model_path)
+                return load_model(self.dl_model_path, loader=load_keras_model)
             return None
         except Exception as e:
             logger.error(f"Error loading DL model: {e}")
@@ -37,46 +69,72 @@ class PredictionService:
 
     def _load_preprocessor(self):
         try:
-            if os.path.exists(self.preprocessor_path):
-                return joblib.load(self.preprocessor_path)
-            return None
+            return load_model(self.preprocessor_path)
         except Exception as e:
             logger.error(f"Error loading preprocessor: {e}")
             return None
 
     async def predict_salary(self, skills: List[str], experience_level: str, location: str, job_type: str) -> Dict[str, Any]:
+        # The TF-IDF step lowercases and ignores order, so sorting/lowercasing skills
+        # cannot change the prediction; categorical fields are used verbatim.
+        # job_type is not a model feature and is left out of the key.
+        key = make_key(
+            model_version(self.model_path, self.dl_model_path, self.preprocessor_path),
+            sorted(skill.strip().lower() for skill in skills),
+            experience_level,
+            location
+        )
+        return await salary_cache.get_or_compute(
+            key,
+            lambda: self._predict_salary(skills, experience_level, location),
+            should_cache=lambda result: result["model_used"] != "fallback"
+        )
+
+    async def _predict_salary(self, skills: List[str], experience_level: str, location: str) -> Dict[str, Any]:
         skills_str = ", ".join(skills)
-        input_data = pd.DataFrame([{
+        row = {
             "skills": skills_str,
             "experience_level": experience_level,
             "location": location
-        }])
+        }
 
         # 1. Try Deep Learning model first
         if self.dl_model and self.preprocessor:
             try:
-                X_encoded = self.preprocessor.transform(input_data)
-                prediction = float(self.dl_model.predict(X_encoded)[0][0])
-                return self._format_response(prediction, 0.95, "deep_learning")
+                values = await executor.run("salary", predict_salary_dl, self.dl_model_path, self.preprocessor_path, row)
+                return self._format_response(values, 0.95, "deep_learning")
             except Exception as e:
                 logger.error(f"DL Prediction failed: {e}")
 
         # 2. Try Scikit-learn model second
         if self.model:
             try:
-                prediction = float(self.model.predict(input_data)[0])
-                return self._format_response(prediction, 0.85, "random_forest")
+                values = await executor.run("salary", predict_salary_sklearn, self.model_path, row)
+                return self._format_response(values, 0.85, "random_forest")
             except Exception as e:
                 logger.error(f"Scikit Prediction failed: {e}")
         
         # 3. Last Fallback
-        return self._format_response(85000, 0.5, "fallback")
+        return self._format_response([85000], 0.5, "fallback")
 
-    def _format_response(self, value: float, confidence: float, model_type: str) -> Dict[str, Any]:
+    def _format_response(self, values: List[float], default_confidence: float, model_type: str) -> Dict[str, Any]:
+        if len(values) == len(SALARY_QUANTILES):
+            quantiles = summarize(values)
+            low, median, high = quantiles["p10"], quantiles["p50"], quantiles["p90"]
+            return {
+                "estimated_salary": median,
+                "currency": "USD",
+                "confidence_score": interval_confidence(low, median, high),
+                "model_used": model_type,
+                "range": {"min": low, "max": high},
+                "quantiles": quantiles
+            }
+        # Point estimate only (fallback or a pre-quantile artifact): nominal range and confidence
+        value = float(values[0])
         return {
             "estimated_salary": value,
             "currency": "USD",
-            "confidence_score": confidence,
+            "confidence_score": default_confidence,
             "model_used": model_type,
             "range": {
                 "min": value * 0.9,
@@ -92,6 +150,13 @@ class PredictionService:
         }
 
     async def get_recommendations(self, user_id: str, limit: int) -> List[Dict[str, Any]]:
+        store = get_store()
+        if store is not None:
+            # Jobs deleted or closed since the last refresh are dropped via the job event delta
+            delta = load_job_delta()
+            hidden = delta.deleted if delta is not None else frozenset()
+            # Users unknown to the last refresh get an empty feed until the next one
+            return store.get(user_id, limit, hidden) or []
         return [
             {
                 "job_id": "rec_1",
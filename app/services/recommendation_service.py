@@ -0,0 +1,262 @@
+"""
+Precomputed job recommendations.
+
+An offline refresh embeds every active user and open job with the matching embedder,
+scores them in vectorized chunks and keeps the top-K jobs per user. The result is a
+handful of .npy arrays served memory-mapped, so a request is one dict lookup plus one
+row read. Incremental refreshes fully rescore only users whose profile text changed or
+whose top-K lost a job (removed or edited); other users are scored against the new and
+edited jobs alone and keep their rows unless one of those jobs beats their K-th.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from typing import AbstractSet, Any, Dict, List, Optional, Tuple
+from app.utils.config import settings
+from app.utils.cache import model_version
+from app.utils.model_registry import load_model
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+
+def text_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+def jobs_digest(job_ids: List[str], texts: List[str]) -> str:
+    h = hashlib.sha256()
+    for job_id, text in sorted(zip(job_ids, texts)):
+        h.update(job_id.encode("utf-8") + b"\0" + text.encode("utf-8") + b"\0")
+    return h.hexdigest()
+
+def top_k_scores(users: np.ndarray, jobs: np.ndarray, k: int, user_chunk: int = 2048, job_chunk: int = 50000) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k job indices and scores per user by inner product. Works through the score
+    matrix in user x job blocks so memory stays bounded by the chunk sizes.
+    """
+    k = min(k, len(jobs))
+    top_idx = np.empty((len(users), k), dtype=np.int32)
+    top_scores = np.empty((len(users), k), dtype=np.float32)
+    for u0 in range(0, len(users), user_chunk):
+        block = users[u0:u0 + user_chunk]
+        best_idx = np.empty((len(block), 0), dtype=np.int64)
+        best_scores = np.empty((len(block), 0), dtype=np.float32)
+        for j0 in range(0, len(jobs), job_chunk):
+            scores = block @ jobs[j0:j0 + job_chunk].T
+            # Merge this job block's candidates with the running top-k
+            cand_scores = np.concatenate([best_scores, scores], axis=1)
+            cand_idx = np.concatenate([best_idx, np.broadcast_to(np.arange(j0, j0 + scores.shape[1]), scores.shape)], axis=1)
+            keep = np.argpartition(-cand_scores, k - 1, axis=1)[:, :k] if cand_scores.shape[1] > k else np.argsort(-cand_scores, axis=1)
+            best_scores = np.take_along_axis(cand_scores, keep, axis=1)
+            best_idx = np.take_along_axis(cand_idx, keep, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        top_scores[u0:u0 + len(block)] = np.take_along_axis(best_scores, order, axis=1)
+        top_idx[u0:u0 + len(block)] = np.take_along_axis(best_idx, order, axis=1)
+    return top_idx, top_scores
+
+class RecommendationStore:
+    """
+    Read side: memory-mapped arrays shared by all workers on a host, plus an in-memory
+    user id -> row map for O(1) lookups.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.user_ids = np.load(os.path.join(path, "user_ids.npy"), mmap_mode="r")
+        self.user_hashes = np.load(os.path.join(path, "user_hashes.npy"), mmap_mode="r")
+        self.job_ids = np.load(os.path.join(path, "job_ids.npy"), mmap_mode="r")
+        self.job_titles = np.load(os.path.join(path, "job_titles.npy"), mmap_mode="r")
+        # Stores written before job hashes were kept can only be refreshed in full
+        job_hashes = os.path.join(path, "job_hashes.npy")
+        self.job_hashes = np.load(job_hashes, mmap_mode="r") if os.path.exists(job_hashes) else None
+        self.top_idx = np.load(os.path.join(path, "top_idx.npy"), mmap_mode="r")
+        self.top_scores = np.load(os.path.join(path, "top_scores.npy"), mmap_mode="r")
+        self.rows = {str(user_id): row for row, user_id in enumerate(self.user_ids)}
+
+    @classmethod
+    def load(cls, meta_path: str) -> "RecommendationStore":
+        return cls(os.path.dirname(meta_path))
+
+    def get(self, user_id: str, limit: int, hidden: AbstractSet[str] = frozenset()) -> Optional[List[Dict[str, Any]]]:
+        """Top jobs for a user, skipping `hidden` ids (jobs removed since the refresh) and backfilling from the rest of the row."""
+        row = self.rows.get(user_id)
+        if row is None:
+            return None
+        results = []
+        for j, s in zip(self.top_idx[row], self.top_scores[row]):
+            if len(results) >= limit:
+                break
+            job_id = str(self.job_ids[j])
+            if job_id not in hidden:
+                results.append({"job_id": job_id, "title": str(self.job_titles[j]), "score": round(float(s), 4)})
+        return results
+
+    @staticmethod
+    def publish(path: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+        """Write a new version beside the live one and swap it in."""
+        staging = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), array)
+        with open(os.path.join(staging, META_FILE), "w") as f:
+            json.dump(meta, f)
+        previous = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.replace(path, previous)
+        os.replace(staging, path)
+        shutil.rmtree(previous, ignore_errors=True)
+
+def get_store() -> Optional[RecommendationStore]:
+    """Current store, reopened automatically after each refresh."""
+    return load_model(os.path.join(settings.RECOMMENDATION_STORE_DIR, META_FILE), loader=RecommendationStore.load)
+
+_refresh_lock = threading.Lock()
+
+def embed_texts(embedder, texts: List[str]) -> np.ndarray:
+    """Embed in batches, so the TF-IDF matrix of a whole table is never built at once."""
+    vectors = np.empty((len(texts), embedder.dim), dtype=np.float32)
+    embedder.transform_to(texts, vectors, batch_size=settings.RECOMMENDATION_EMBED_BATCH)
+    return vectors
+
+def merge_top_k(top_idx: np.ndarray, top_scores: np.ndarray, new_idx: np.ndarray, new_scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Best len(top_idx[0]) of existing sorted top-k rows and extra candidates per row."""
+    k = top_idx.shape[1]
+    cand_scores = np.concatenate([top_scores.astype(np.float32), new_scores], axis=1)
+    cand_idx = np.concatenate([top_idx, np.broadcast_to(new_idx, new_scores.shape)], axis=1)
+    order = np.argsort(-cand_scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(cand_idx, order, axis=1), np.take_along_axis(cand_scores, order, axis=1)
+
+def refresh_recommendations(dataset_path: str = None, incremental: bool = True) -> Dict[str, Any]:
+    """
+    Recompute recommendations from a CSV of `id`, `kind` ("profile"/"job"), `text`
+    and optional `title` columns (the job_matching training format).
+
+    With `incremental`, users whose text hash is unchanged and whose top-K jobs all
+    still exist unchanged keep their stored rows, merged with scores against new and
+    edited jobs only. A new embedder or a different K forces a full refresh.
+    """
+    with _refresh_lock:
+        started = time.perf_counter()
+        dataset_path = dataset_path or settings.RECOMMENDATION_DATASET_PATH
+        embedder = load_model(settings.MATCHING_LSA_MODEL_PATH)
+        if embedder is None:
+            raise RuntimeError("Matching embedder has not been trained (model_type=job_matching)")
+
+        df = pd.read_csv(dataset_path, dtype=str).fillna("")
+        users = df[df["kind"] == "profile"].drop_duplicates("id", keep="last")
+        jobs = df[df["kind"] == "job"].drop_duplicates("id", keep="last")
+        if users.empty or jobs.empty:
+            raise ValueError("Dataset needs at least one profile and one job")
+
+        job_ids = jobs["id"].tolist()
+        job_texts = jobs["text"].tolist()
+        titles = jobs["title"].tolist() if "title" in jobs.columns else [""] * len(jobs)
+        user_ids = users["id"].tolist()
+        user_texts = users["text"].tolist()
+        hashes = np.array([text_hash(t) for t in user_texts], dtype=np.uint64)
+        job_hashes = np.array([text_hash(t) for t in job_texts], dtype=np.uint64)
+        source = {
+            "jobs_digest": jobs_digest(job_ids, job_texts),
+            "embedder_version": model_version(settings.MATCHING_LSA_MODEL_PATH)
+        }
+
+        k = settings.RECOMMENDATION_TOP_K
+        top_idx = np.empty((len(user_ids), min(k, len(job_ids))), dtype=np.int32)
+        top_scores = np.empty(top_idx.shape, dtype=np.float16)
+
+        previous = None
+        if incremental:
+            try:
+                previous = RecommendationStore(settings.RECOMMENDATION_STORE_DIR)
+            except (OSError, ValueError):
+                previous = None
+            if previous is not None and (
+                previous.meta.get("embedder_version") != source["embedder_version"]
+                or previous.job_hashes is None
+                or previous.top_idx.shape[1] != top_idx.shape[1]
+            ):
+                logger.info("Embedder or top-K changed; running a full recommendation refresh")
+                previous = None
+
+        stale = np.ones(len(user_ids), dtype=bool)
+        # New and edited jobs, which every kept user still has to be scored against
+        changed_jobs = np.arange(len(job_ids))
+        if previous is not None:
+            # Previous job row -> current row, or -1 for jobs removed or edited since
+            current_rows = {job_id: row for row, job_id in enumerate(job_ids)}
+            old_job_rows = np.array([current_rows.get(str(job_id), -1) for job_id in previous.job_ids], dtype=np.int64)
+            found = old_job_rows >= 0
+            found[found] = job_hashes[old_job_rows[found]] == previous.job_hashes[found]
+            old_job_rows[~found] = -1
+            changed_jobs = np.setdiff1d(changed_jobs, old_job_rows[found])
+
+            old_rows = np.array([previous.rows.get(user_id, -1) for user_id in user_ids], dtype=np.int64)
+            kept = np.flatnonzero(old_rows >= 0)
+            kept = kept[previous.user_hashes[old_rows[kept]] == hashes[kept]]
+            mapped = old_job_rows[previous.top_idx[old_rows[kept]]]
+            # A removed or edited job leaves a gap in the top-K that only a full rescore can fill
+            intact = (mapped >= 0).all(axis=1)
+            kept, mapped = kept[intact], mapped[intact]
+            top_idx[kept] = mapped
+            top_scores[kept] = previous.top_scores[old_rows[kept]]
+            stale[kept] = False
+
+        merged = 0
+        kept = np.flatnonzero(~stale)
+        if len(kept) and len(changed_jobs):
+            changed_vectors = embed_texts(embedder, [job_texts[j] for j in changed_jobs])
+            batch = settings.RECOMMENDATION_EMBED_BATCH
+            for start in range(0, len(kept), batch):
+                rows = kept[start:start + batch]
+                scores = embed_texts(embedder, [user_texts[i] for i in rows]) @ changed_vectors.T
+                # Only users for whom a new or edited job beats their K-th are touched
+                beaten = (scores > top_scores[rows, -1:].astype(np.float32)).any(axis=1)
+                rows, scores = rows[beaten], scores[beaten]
+                if len(rows):
+                    top_idx[rows], top_scores[rows] = merge_top_k(top_idx[rows], top_scores[rows], changed_jobs, scores)
+                    merged += len(rows)
+
+        rescored = int(stale.sum())
+        if rescored:
+            job_vectors = embed_texts(embedder, job_texts)
+            stale_rows = np.flatnonzero(stale)
+            user_vectors = embed_texts(embedder, [user_texts[i] for i in stale_rows])
+            idx, scores = top_k_scores(user_vectors, job_vectors, k)
+            top_idx[stale_rows] = idx
+            top_scores[stale_rows] = scores
+
+        meta = {**source, "users": len(user_ids), "jobs": len(job_ids), "top_k": int(top_idx.shape[1]), "refreshed_at": time.time()}
+        RecommendationStore.publish(
+            settings.RECOMMENDATION_STORE_DIR,
+            {
+                "user_ids": np.asarray(user_ids, dtype=np.str_),
+                "user_hashes": hashes,
+                "job_ids": np.asarray(job_ids, dtype=np.str_),
+                "job_hashes": job_hashes,
+                "job_titles": np.asarray(titles, dtype=np.str_),
+                "top_idx": top_idx,
+                "top_scores": top_scores
+            },
+            meta
+        )
+        summary = {
+            "status": "success",
+            "users": len(user_ids),
+            "jobs": len(job_ids),
+            "rescored_users": rescored,
+            "merged_users": merged,
+            "changed_jobs": int(len(changed_jobs)),
+            "incremental": previous is not None,
+            "seconds": round(time.perf_counter() - started, 2)
+        }
+        logger.info(f"Recommendations refreshed: {summary}")
+        return summary
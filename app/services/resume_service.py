@@ -1,8 +1,52 @@
+import io
+import time
+import hashlib
+import asyncio
+import logging
+import zipfile
 from fastapi import UploadFile
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Iterator, Tuple
+from app.utils.config import settings
+from app.utils.cache import ResultCache, get_shared_store
+from app.utils.tokenizer import tokenize
+
+logger = logging.getLogger(__name__)
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed", "application/x-zip"}
+HASH_CHUNK_SIZE = 64 * 1024
+
+# Shared by every service instance in this worker
+result_cache = ResultCache(
+    "resume",
+    max_entries=settings.RESUME_CACHE_MAX_ENTRIES,
+    ttl=settings.RESUME_CACHE_TTL_SECONDS,
+    shared_store=get_shared_store()
+)
 
 class ResumeParserService:
     async def parse_resume(self, file: UploadFile) -> Dict[str, Any]:
+        """Parse a resume, reusing the stored result for byte-identical uploads"""
+        key = f"parse:{settings.RESUME_PARSER_VERSION}:{await self._content_hash(file)}"
+        return await result_cache.get_or_compute(key, lambda: self._parse_resume(file))
+
+    async def analyze_resume(self, file: UploadFile) -> Dict[str, Any]:
+        """Analyze a resume, reusing the stored result for byte-identical uploads"""
+        key = f"analyze:{settings.RESUME_PARSER_VERSION}:{await self._content_hash(file)}"
+        return await result_cache.get_or_compute(key, lambda: self._analyze_resume(file))
+
+    async def _content_hash(self, file: UploadFile) -> str:
+        """SHA-256 of the upload, read in chunks so large files never sit in memory twice"""
+        digest = hashlib.sha256()
+        await file.seek(0)
+        while True:
+            chunk = await file.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+        await file.seek(0)
+        return digest.hexdigest()
+
+    async def _parse_resume(self, file: UploadFile) -> Dict[str, Any]:
         # Mock implementation
         return {
             "name": "John Doe",
@@ -26,10 +70,11 @@ class ResumeParserService:
     async def extract_skills(self, text: str) -> List[str]:
         # Mock skill extraction
         common_skills = ["python", "javascript", "java", "sql", "react", "node", "aws"]
-        text_lower = text.lower()
-        return [skill for skill in common_skills if skill in text_lower]
+        # Whole tokens only, so "java" is not found inside "javascript"
+        tokens = set(tokenize(text))
+        return [skill for skill in common_skills if skill in tokens]
 
-    async def analyze_resume(self, file: UploadFile) -> Dict[str, Any]:
+    async def _analyze_resume(self, file: UploadFile) -> Dict[str, Any]:
         return {
             "score": 85,
             "level": "Senior",
@@ -38,3 +83,144 @@ class ResumeParserService:
                 "Highlight leadership experience"
             ]
         }
+
+    async def iter_bulk_results(self, files: List[UploadFile], analyze: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Parse (and optionally analyze) many resumes with a pool of workers.
+
+        Uploaded zip archives are expanded entry by entry. Both the work queue and the
+        result queue are bounded, so at most ~queue size + worker count resumes are held
+        in memory no matter how large the archive is. One result is yielded per resume as
+        soon as it finishes, followed by a final summary.
+        """
+        concurrency = max(1, settings.RESUME_BULK_CONCURRENCY)
+        queue_size = max(1, settings.RESUME_BULK_QUEUE_SIZE)
+        work_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        result_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        started = time.perf_counter()
+
+        async def produce():
+            count = 0
+            uploads = self._iter_uploads(files)
+            loop = asyncio.get_running_loop()
+            try:
+                while True:
+                    # Unzipping and reading entries is blocking I/O; keep it off the event loop
+                    item = await loop.run_in_executor(None, next, uploads, None)
+                    if item is None:
+                        break
+                    name, payload = item
+                    count += 1
+                    if count > settings.RESUME_BULK_MAX_FILES:
+                        await result_queue.put(self._error_line(name, f"File limit of {settings.RESUME_BULK_MAX_FILES} reached"))
+                        break
+                    await work_queue.put((name, payload))
+            except asyncio.CancelledError:
+                # The consumers are gone too; waiting to hand them sentinels would never end
+                raise
+            except Exception as e:
+                logger.error(f"Failed to read bulk resume upload: {e}")
+                await result_queue.put(self._error_line(None, f"Could not read upload: {e}"))
+            for _ in range(concurrency):
+                await work_queue.put(None)
+
+        async def work():
+            while True:
+                item = await work_queue.get()
+                if item is None:
+                    await result_queue.put(None)
+                    return
+                name, payload = item
+                await result_queue.put(await self._process_one(name, payload, analyze))
+
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(work()) for _ in range(concurrency)]
+
+        succeeded = failed = 0
+        finished_workers = 0
+        try:
+            while finished_workers < concurrency:
+                line = await result_queue.get()
+                if line is None:
+                    finished_workers += 1
+                    continue
+                if line["status"] == "ok":
+                    succeeded += 1
+                else:
+                    failed += 1
+                yield line
+        finally:
+            # Stops the pool early if the client goes away mid-stream, and waits for it
+            # so no task is left holding resume bytes
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        elapsed = time.perf_counter() - started
+        total = succeeded + failed
+        yield {
+            "type": "summary",
+            "total": total,
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "files_per_second": round(total / elapsed, 2) if elapsed > 0 else 0.0
+        }
+
+    async def _process_one(self, name: str, payload, analyze: bool) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            if isinstance(payload, str):
+                # Entries we refused to read carry the reason instead of bytes
+                raise ValueError(payload)
+            upload = UploadFile(file=io.BytesIO(payload), filename=name, size=len(payload))
+            result = {"type": "result", "file": name, "status": "ok", "parsed": await self.parse_resume(upload)}
+            if analyze:
+                await upload.seek(0)
+                result["analysis"] = await self.analyze_resume(upload)
+        except Exception as e:
+            logger.error(f"Bulk resume processing failed for {name}: {e}")
+            result = self._error_line(name, str(e))
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    def _iter_uploads(self, files: List[UploadFile]) -> Iterator[Tuple[str, Any]]:
+        """Yield (name, bytes) per resume, expanding zip archives lazily."""
+        max_bytes = settings.RESUME_BULK_MAX_FILE_BYTES
+        for upload in files:
+            name = upload.filename or "upload"
+            if self._is_zip(upload):
+                upload.file.seek(0)
+                try:
+                    archive = zipfile.ZipFile(upload.file)
+                except zipfile.BadZipFile as e:
+                    yield name, f"Invalid zip archive: {e}"
+                    continue
+                with archive:
+                    for info in archive.infolist():
+                        if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                            continue
+                        entry_name = f"{name}/{info.filename}"
+                        if info.file_size > max_bytes:
+                            yield entry_name, f"File exceeds {max_bytes} bytes"
+                            continue
+                        try:
+                            with archive.open(info) as entry:
+                                data = entry.read()
+                        except Exception as e:
+                            yield entry_name, f"Could not extract entry: {e}"
+                            continue
+                        yield entry_name, data
+            else:
+                upload.file.seek(0)
+                data = upload.file.read(max_bytes + 1)
+                if len(data) > max_bytes:
+                    yield name, f"File exceeds {max_bytes} bytes"
+                else:
+                    yield name, data
+
+    def _is_zip(self, upload: UploadFile) -> bool:
+        return upload.content_type in ZIP_CONTENT_TYPES or (upload.filename or "").lower().endswith(".zip")
+
+    def _error_line(self, name, error: str) -> Dict[str, Any]:
+        return {"type": "result", "file": name, "status": "error", "error": error}
@@ -1,9 +1,18 @@
 import os
+import json
+import math
+import time
+import shutil
+import asyncio
 import joblib
+import tempfile
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 import logging
-from typing import List, Optional
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.pipeline import Pipeline
@@ -11,18 +20,250 @@ from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.svm import SVC
 from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
 
 import tensorflow as tf
 from tensorflow.keras import layers, models
+from app.utils.config import settings
+from app.utils.feature_cache import FeatureCache, file_digest
+from app.utils.embeddings import LSAEmbedder
+from app.utils.ann_index import ANNIndex, benchmark_recall
+from app.utils.intent_model import export_compact
+from app.utils.sparse_features import sparse_batches, predict_sparse, matrix_nbytes
+from app.utils.quantiles import SALARY_QUANTILES, QuantileForest, pinball_loss
 
 logger = logging.getLogger(__name__)
 
+# What train_salary_model fits: fixed epochs, no validation split, all threads.
+# search_salary_model times this exact configuration as its baseline.
+SALARY_BASELINE_CONFIG = {"layers": [64, 32], "dropout": 0.2, "batch_size": 32, "epochs": 50}
+
+# Candidates for search_salary_model (early stopping on a validation split)
+SALARY_SEARCH_SPACE = [
+    {"family": "mlp", "layers": [64, 32], "dropout": 0.2},
+    {"family": "mlp", "layers": [32], "dropout": 0.0},
+    {"family": "mlp", "layers": [128, 64], "dropout": 0.2},
+    {"family": "mlp", "layers": [256, 128, 64], "dropout": 0.3},
+    {"family": "random_forest", "n_estimators": 200, "max_depth": None},
+    {"family": "random_forest", "n_estimators": 400, "max_depth": 20},
+]
+
+# Feature settings; any change here produces new feature cache keys
+SALARY_FEATURE_CONFIG = {
+    "name": "salary",
+    "skills_max_features": 100,
+    "categorical": ["experience_level", "location"],
+    "sparse": True
+}
+# The search caches its train/validation split; rows are stored train-first
+SALARY_SEARCH_SPLIT = {"test_size": 0.2, "random_state": 42}
+SALARY_SEARCH_FEATURE_CONFIG = {**SALARY_FEATURE_CONFIG, "name": "salary_search", "split": SALARY_SEARCH_SPLIT}
+INTENT_FEATURE_CONFIG = {
+    "name": "intent",
+    "ngram_range": [1, 2],
+    "max_features": 5000
+}
+
+# _generate_dummy_data is seeded, so its output can be identified without building it.
+# Bump this whenever the generator changes.
+DUMMY_DATASET_DIGEST = "dummy-salary-v1"
+
+def build_salary_preprocessor(max_features: Optional[int] = None, sparse: bool = True) -> ColumnTransformer:
+    """
+    TF-IDF skills + one-hot categoricals. The output is always CSR: with the default
+    sparse_threshold the type depended on how dense a given dataset happened to be.
+    `sparse=False` reproduces the former dense preprocessor for benchmarking.
+    """
+    return ColumnTransformer(
+        transformers=[
+            ('skills', TfidfVectorizer(max_features=max_features or SALARY_FEATURE_CONFIG["skills_max_features"]), 'skills'),
+            ('cat', OneHotEncoder(sparse_output=sparse), SALARY_FEATURE_CONFIG["categorical"])
+        ],
+        sparse_threshold=1.0 if sparse else 0.3
+    )
+
+def build_salary_network(
+    n_features: int,
+    hidden: List[int],
+    dropout: float,
+    sparse: bool = True,
+    target_scale: float = 1.0,
+    dropout_every_layer: bool = False
+):
+    """
+    MLP with one output per SALARY_QUANTILES entry, trained with the pinball loss.
+    Outputs are learned in units of `target_scale` (e.g. the median salary) and scaled
+    back inside the model, so serving gets dollars from the same forward pass.
+    """
+    # A sparse Input makes the first Dense layer multiply SparseTensor batches directly
+    model = models.Sequential([layers.Input(shape=(n_features,), sparse=sparse)])
+    for i, units in enumerate(hidden):
+        model.add(layers.Dense(units, activation='relu'))
+        if dropout and (i == 0 or dropout_every_layer):
+            model.add(layers.Dropout(dropout))
+    model.add(layers.Dense(len(SALARY_QUANTILES)))
+    model.add(layers.Rescaling(target_scale))
+    model.compile(optimizer='adam', loss=pinball_loss(SALARY_QUANTILES))
+    return model
+
+def interval_metrics(quantiles: np.ndarray, y: np.ndarray) -> Dict[str, float]:
+    """Validation MAE of the median and how often the p10-p90 interval covers the truth."""
+    median = quantiles[:, SALARY_QUANTILES.index(0.5)]
+    return {
+        "val_mae": float(np.mean(np.abs(median - y))),
+        "val_rmse": float(np.sqrt(np.mean((median - y) ** 2))),
+        "val_interval_coverage": float(np.mean((y >= quantiles[:, 0]) & (y <= quantiles[:, -1])))
+    }
+
+def fit_salary_candidate(index: int, config: Dict[str, Any], X_train, y_train, X_val, y_val, out_dir: str) -> Dict[str, Any]:
+    """
+    Train one search candidate in a worker process and save it under `out_dir`.
+
+    MLPs stop early once validation loss stops improving and keep their best weights.
+    Each process is limited to one thread so the pool, not TensorFlow, spreads work
+    across cores.
+    """
+    started = time.perf_counter()
+    if config["family"] == "random_forest":
+        model = RandomForestRegressor(
+            n_estimators=config["n_estimators"],
+            max_depth=config["max_depth"],
+            n_jobs=1,
+            random_state=42
+        )
+        model.fit(X_train, y_train)
+        # Served as a quantile forest: same trees, plus the training targets per leaf
+        model = QuantileForest(model, SALARY_QUANTILES).fit_leaves(X_train, y_train)
+        predictions = model.predict_quantiles(X_val)
+        path = os.path.join(out_dir, f"candidate_{index}.joblib")
+        joblib.dump(model, path)
+        epochs = None
+    else:
+        tf.config.threading.set_intra_op_parallelism_threads(1)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+        tf.random.set_seed(42)
+        model = build_salary_network(
+            X_train.shape[1],
+            config["layers"],
+            config["dropout"],
+            target_scale=float(np.median(y_train)),
+            dropout_every_layer=True
+        )
+        history = model.fit(
+            sparse_batches(X_train, y_train, batch_size=64, shuffle=True, seed=42),
+            validation_data=sparse_batches(X_val, y_val, batch_size=1024),
+            epochs=200,
+            verbose=0,
+            callbacks=[tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=8, restore_best_weights=True)]
+        )
+        predictions = predict_sparse(model, X_val)
+        path = os.path.join(out_dir, f"candidate_{index}.h5")
+        model.save(path)
+        epochs = len(history.history['loss'])
+
+    return {
+        "index": index,
+        "config": config,
+        **interval_metrics(np.sort(predictions, axis=1), y_val),
+        "epochs": epochs,
+        "train_seconds": round(time.perf_counter() - started, 2),
+        "path": path
+    }
+
+def fit_salary_network(X, y, config: Dict[str, Any] = SALARY_BASELINE_CONFIG):
+    """The salary network as train_salary_model trains it."""
+    model = build_salary_network(X.shape[1], config["layers"], dropout=config["dropout"], target_scale=float(np.median(y)))
+    model.fit(sparse_batches(X, y, batch_size=config["batch_size"], shuffle=True, seed=42), epochs=config["epochs"], verbose=0)
+    return model
+
+def fit_salary_baseline(X_train, y_train, X_val, y_val) -> Dict[str, Any]:
+    """Time train_salary_model's configuration on the search split, in a process of its own."""
+    tf.random.set_seed(42)
+    started = time.perf_counter()
+    model = fit_salary_network(X_train, y_train)
+    train_seconds = time.perf_counter() - started
+    return {
+        "config": SALARY_BASELINE_CONFIG,
+        **interval_metrics(np.sort(predict_sparse(model, X_val), axis=1), y_val),
+        "train_seconds": round(train_seconds, 2)
+    }
+
+def synthetic_salary_frame(n_rows: int, vocab_size: int, seed: int = 0) -> pd.DataFrame:
+    """Salary rows with 3-8 skills drawn (Zipf-like) from `vocab_size` distinct terms, for benchmarks."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, vocab_size + 1)
+    weights /= weights.sum()
+    counts = rng.integers(3, 9, size=n_rows)
+    terms = rng.choice(vocab_size, size=int(counts.sum()), p=weights)
+    skills, start = [], 0
+    for n in counts:
+        skills.append(", ".join(f"skill{t}" for t in terms[start:start + n]))
+        start += n
+    return pd.DataFrame({
+        "skills": skills,
+        "experience_level": rng.choice(["entry", "mid", "senior", "lead"], size=n_rows),
+        "location": rng.choice(["Remote", "NY", "SF", "London", "Berlin", "Singapore", "Phnom Penh", "Bangkok"], size=n_rows),
+        "salary": rng.normal(85000, 20000, size=n_rows).astype("float32")
+    })
+
+def benchmark_salary_pipeline(row_counts=(5000, 50000), max_features_grid=(100, 1000, 10000), epochs: int = 1) -> List[Dict[str, Any]]:
+    """
+    Compare the former dense salary path with the sparse one for each dataset size and
+    skills vocabulary: feature memory (matrix bytes and peak allocation while building
+    it), training throughput and single-row serving latency.
+    """
+    import tracemalloc
+    results = []
+    for n_rows in row_counts:
+        for max_features in max_features_grid:
+            df = synthetic_salary_frame(n_rows, vocab_size=max_features * 2)
+            X_raw, y = df[["skills", "experience_level", "location"]], df["salary"].values
+            row = {"rows": n_rows, "max_features": max_features}
+            for mode, sparse in (("dense", False), ("sparse", True)):
+                tracemalloc.start()
+                started = time.perf_counter()
+                preprocessor = build_salary_preprocessor(max_features, sparse=sparse)
+                X = preprocessor.fit_transform(X_raw)
+                if not sparse and hasattr(X, "toarray"):
+                    # The dense path fed Keras an ndarray whenever the threshold let it through
+                    X = X.toarray()
+                build_seconds = time.perf_counter() - started
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                model = build_salary_network(X.shape[1], [64, 32], dropout=0.2, sparse=sparse)
+                data = sparse_batches(X, y, batch_size=32) if sparse else tf.data.Dataset.from_tensor_slices((X.astype("float32"), y)).batch(32)
+                started = time.perf_counter()
+                model.fit(data, epochs=epochs, verbose=0)
+                train_seconds = time.perf_counter() - started
+
+                sample = X_raw.iloc[[0]]
+                latencies = []
+                for _ in range(50):
+                    started = time.perf_counter()
+                    predict_sparse(model, preprocessor.transform(sample))
+                    latencies.append(time.perf_counter() - started)
+
+                row[mode] = {
+                    "features": X.shape[1],
+                    "matrix_bytes": matrix_nbytes(X),
+                    "build_peak_bytes": peak,
+                    "build_seconds": round(build_seconds, 3),
+                    "train_samples_per_second": round(n_rows * epochs / train_seconds, 1),
+                    "serve_ms_p50": round(float(np.median(latencies)) * 1000, 3)
+                }
+            row["memory_ratio"] = round(row["dense"]["matrix_bytes"] / max(1, row["sparse"]["matrix_bytes"]), 1)
+            results.append(row)
+            logger.info(f"Salary feature benchmark: {json.dumps(row)}")
+    return results
+
 class TrainingService:
     def __init__(self):
         self.model_dir = "app/ml_models"
         self.data_dir = "app/data"
         os.makedirs(self.model_dir, exist_ok=True)
         os.makedirs(self.data_dir, exist_ok=True)
+        self.feature_cache = FeatureCache()
 
     def _generate_dummy_data(self) -> pd.DataFrame:
         """Generate a large synthetic dataset for demonstration"""
@@ -92,42 +333,30 @@ class TrainingService:
         }
         return pd.DataFrame(data)
 
+    def _salary_source(self, dataset_path: Optional[str]):
+        """Feature cache digest and loader for the salary dataset, or the dummy data when it is missing."""
+        if dataset_path and os.path.exists(dataset_path):
+            return file_digest(dataset_path), lambda: pd.read_csv(dataset_path)
+        return DUMMY_DATASET_DIGEST, self._generate_dummy_data
+
     async def train_salary_model(self, dataset_path: Optional[str] = None):
         try:
             logger.info("Starting ADVANCED Salary Neural Network training...")
             
-            if dataset_path and os.path.exists(dataset_path):
-                df = pd.read_csv(dataset_path)
-            else:
-                df = self._generate_dummy_data()
-
-            # 1. Feature Engineering
-            X = df[["skills", "experience_level", "location"]]
-            y = df["salary"].values
-
-            preprocessor = ColumnTransformer(
-                transformers=[
-                    ('skills', TfidfVectorizer(max_features=100), 'skills'),
-                    ('cat', OneHotEncoder(sparse_output=False), ['experience_level', 'location'])
-                ]
-            )
+            digest, load_frame = self._salary_source(dataset_path)
 
-            # 2. Transform Data
-            X_encoded = preprocessor.fit_transform(X)
-            
-            # 3. Build Neural Network
-            model = models.Sequential([
-                layers.Dense(64, activation='relu', input_shape=(X_encoded.shape[1],)),
-                layers.Dropout(0.2),
-                layers.Dense(32, activation='relu'),
-                layers.Dense(1) # Salary prediction output
-            ])
-
-            model.compile(optimizer='adam', loss='mse', metrics=['mae'])
+            # 1-2. Feature Engineering, skipped entirely when this dataset was seen before
+            def build_features():
+                df = load_frame()
+                preprocessor = build_salary_preprocessor()
+                X_encoded = preprocessor.fit_transform(df[["skills", "experience_level", "location"]])
+                return X_encoded, df["salary"].values, preprocessor
+
+            X_encoded, y, preprocessor, _ = self.feature_cache.get_or_build(digest, SALARY_FEATURE_CONFIG, build_features)
             
-            # 4. Train
-            logger.info(f"Training on {len(X_encoded)} samples...")
-            model.fit(X_encoded, y, epochs=50, verbose=0)
+            # 3-4. Build the network and train on sparse batches; the feature matrix is never densified
+            logger.info(f"Training on {X_encoded.shape[0]} samples ({matrix_nbytes(X_encoded)} feature bytes)...")
+            model = fit_salary_network(X_encoded, y)
 
             # 5. Save Model AND Preprocessor
             model_path = os.path.join(self.model_dir, "salary_dl_model.h5")
@@ -143,6 +372,156 @@ class TrainingService:
             logger.error(f"Error training advanced salary model: {str(e)}")
             raise e
 
+    async def search_salary_model(self, dataset_path: Optional[str] = None):
+        """
+        Train every SALARY_SEARCH_SPACE candidate in parallel processes, validate on a
+        held-out split and keep only the best model and its metrics.
+        """
+        try:
+            logger.info("Starting salary model hyperparameter search...")
+            search_started = time.perf_counter()
+
+            digest, load_frame = self._salary_source(dataset_path)
+
+            def build_features():
+                df = load_frame()
+                X = df[["skills", "experience_level", "location"]]
+                y = df["salary"].values.astype("float32")
+                X_train_raw, X_val_raw, y_train, y_val = train_test_split(X, y, **SALARY_SEARCH_SPLIT)
+                # Fit on the training split only so validation scores are honest
+                preprocessor = build_salary_preprocessor()
+                X_split = sp.vstack([preprocessor.fit_transform(X_train_raw), preprocessor.transform(X_val_raw)], format="csr")
+                return X_split, np.concatenate([y_train, y_val]), preprocessor
+
+            X_split, y_split, preprocessor, _ = self.feature_cache.get_or_build(digest, SALARY_SEARCH_FEATURE_CONFIG, build_features)
+            # train_test_split rounds the validation share up
+            n_train = X_split.shape[0] - math.ceil(X_split.shape[0] * SALARY_SEARCH_SPLIT["test_size"])
+            X_train, X_val = X_split[:n_train], X_split[n_train:]
+            y_train, y_val = y_split[:n_train], y_split[n_train:]
+
+            workers = min(len(SALARY_SEARCH_SPACE), os.cpu_count() or 1)
+            out_dir = tempfile.mkdtemp(prefix="salary_search_", dir=self.model_dir)
+            loop = asyncio.get_running_loop()
+            try:
+                # "spawn": TensorFlow is already initialised in this process and is not fork-safe
+                with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                    results = await asyncio.gather(*(
+                        loop.run_in_executor(pool, fit_salary_candidate, i, config, X_train, y_train, X_val, y_val, out_dir)
+                        for i, config in enumerate(SALARY_SEARCH_SPACE)
+                    ))
+                best = min(results, key=lambda r: r["val_mae"])
+                self._publish_salary_candidate(best, preprocessor)
+            finally:
+                shutil.rmtree(out_dir, ignore_errors=True)
+            search_seconds = round(time.perf_counter() - search_started, 2)
+
+            # The baseline runs alone afterwards, so its timing is not skewed by the search
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                baseline = await loop.run_in_executor(pool, fit_salary_baseline, X_train, y_train, X_val, y_val)
+
+            report = {
+                "status": "success",
+                "best": {k: v for k, v in best.items() if k != "path"},
+                "candidates": [{k: v for k, v in r.items() if k != "path"} for r in results],
+                "workers": workers,
+                "search_wall_seconds": search_seconds,
+                "baseline": baseline,
+                "baseline_train_seconds": baseline["train_seconds"],
+                "baseline_val_mae": baseline["val_mae"]
+            }
+            with open(os.path.join(self.model_dir, "salary_model_metrics.json"), "w") as f:
+                json.dump(report, f, indent=2)
+
+            logger.info(
+                f"Salary search finished in {report['search_wall_seconds']}s on {workers} workers "
+                f"(train_salary_model config alone: {baseline['train_seconds']}s); best {best['config']} "
+                f"val MAE {best['val_mae']:.0f} vs baseline {baseline['val_mae']:.0f}"
+            )
+            return report
+
+        except Exception as e:
+            logger.error(f"Error in salary model search: {str(e)}")
+            raise e
+
+    def _publish_salary_candidate(self, best: Dict[str, Any], preprocessor: ColumnTransformer):
+        dl_path = os.path.join(self.model_dir, "salary_dl_model.h5")
+        preprocessor_path = os.path.join(self.model_dir, "salary_preprocessor.joblib")
+        if best["config"]["family"] == "mlp":
+            shutil.move(best["path"], dl_path)
+            joblib.dump(preprocessor, preprocessor_path)
+        else:
+            # PredictionService feeds raw frames to the scikit model, so ship it as a pipeline
+            forest = joblib.load(best["path"])  # a QuantileForest
+            pipeline = Pipeline([('preprocessor', preprocessor), ('model', forest)])
+            joblib.dump(pipeline, os.path.join(self.model_dir, "salary_model.joblib"))
+            # The DL model takes precedence at serving time; drop it so the winner is used
+            for path in (dl_path, preprocessor_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    async def train_matching_model(self, dataset_path: Optional[str] = None):
+        """
+        Fit the LSA embedder on job and profile text and build one ANN index per kind.
+
+        The dataset is a CSV with `id`, `kind` ("job" or "profile") and `text` columns.
+        Embeddings are written to a memory-mapped scratch file so corpora larger than
+        RAM can be indexed; recall against exact search is recorded per nprobe.
+        """
+        try:
+            logger.info("Starting matching embedder and index training...")
+            if not dataset_path or not os.path.exists(dataset_path):
+                return {"status": "error", "message": "Dataset not found"}
+
+            df = pd.read_csv(dataset_path, dtype={"id": str, "kind": str, "text": str}).fillna("")
+            texts = df["text"].tolist()
+            fit_size = min(len(texts), settings.MATCHING_LSA_FIT_SAMPLE)
+            fit_rows = np.random.default_rng(42).choice(len(texts), fit_size, replace=False)
+            embedder = LSAEmbedder(dim=settings.MATCHING_LSA_DIM).fit([texts[i] for i in fit_rows])
+
+            scratch = tempfile.mkdtemp(prefix="matching_", dir=self.model_dir)
+            report = {"status": "success", "dim": embedder.dim, "indexes": {}}
+            try:
+                embedded = {}
+                for kind in ("job", "profile"):
+                    rows = df[df["kind"] == kind]
+                    if rows.empty:
+                        continue
+                    vectors = np.lib.format.open_memmap(
+                        os.path.join(scratch, f"{kind}.npy"), mode="w+", dtype=np.float32, shape=(len(rows), embedder.dim)
+                    )
+                    embedder.transform_to(rows["text"].tolist(), vectors)
+                    embedded[kind] = (vectors, rows["id"].tolist())
+
+                rng = np.random.default_rng(7)
+                for kind, (vectors, ids) in embedded.items():
+                    index = ANNIndex.build(
+                        os.path.join(settings.MATCHING_INDEX_DIR, f"{kind}s"),
+                        vectors,
+                        ids,
+                        nlist=settings.MATCHING_IVF_NLIST,
+                        pq_m=settings.MATCHING_PQ_M,
+                        nprobe=settings.MATCHING_NPROBE
+                    )
+                    # Realistic queries come from the other side (resumes search jobs and vice versa)
+                    other = embedded.get("profile" if kind == "job" else "job", (vectors, ids))[0]
+                    queries = other[np.sort(rng.choice(len(other), min(200, len(other)), replace=False))]
+                    report["indexes"][kind] = {**index.meta, "benchmark": benchmark_recall(index, vectors, ids, queries)}
+            finally:
+                shutil.rmtree(scratch, ignore_errors=True)
+
+            tmp_path = settings.MATCHING_LSA_MODEL_PATH + ".tmp"
+            joblib.dump(embedder, tmp_path)
+            os.replace(tmp_path, settings.MATCHING_LSA_MODEL_PATH)
+            with open(os.path.join(self.model_dir, "matching_metrics.json"), "w") as f:
+                json.dump(report, f, indent=2)
+
+            logger.info(f"Matching model trained: {json.dumps(report['indexes'])}")
+            return report
+
+        except Exception as e:
+            logger.error(f"Error training matching model: {str(e)}")
+            raise e
+
     async def train_fraud_model(self, dataset_path: Optional[str] = None):
         # Implementation for fraud detection training
         logger.info("Starting fraud model training...")
@@ -155,18 +534,36 @@ class TrainingService:
             if not os.path.exists(dataset_path):
                 return {"status": "error", "message": "Dataset not found"}
 
-            df = pd.read_csv(dataset_path)
-            pipeline = Pipeline([
-                ('tfidf', TfidfVectorizer(ngram_range=(1, 2), max_features=5000)),
-                ('clf', LogisticRegression(max_iter=1000, multi_class='ovr'))
-            ])
+            def build_features():
+                df = pd.read_csv(dataset_path)
+                tfidf = TfidfVectorizer(
+                    ngram_range=tuple(INTENT_FEATURE_CONFIG["ngram_range"]),
+                    max_features=INTENT_FEATURE_CONFIG["max_features"]
+                )
+                return tfidf.fit_transform(df['text']), df['intent'].values, tfidf
 
-            pipeline.fit(df['text'], df['intent'])
+            X, y, tfidf, _ = self.feature_cache.get_or_build(
+                file_digest(dataset_path), INTENT_FEATURE_CONFIG, build_features
+            )
+            clf = LogisticRegression(max_iter=1000, multi_class='ovr')
+            clf.fit(X, y)
+            # Same artifact as before: a pipeline that accepts raw text
+            pipeline = Pipeline([('tfidf', tfidf), ('clf', clf)])
             model_path = os.path.join(self.model_dir, "intent_model.joblib")
             joblib.dump(pipeline, model_path)
-            
             logger.info(f"Intent model trained and saved to {model_path}")
-            return {"status": "success", "samples": len(df)}
+
+            # Serving prefers the compact export; it is only published if it agrees with the pipeline
+            compact_path = settings.INTENT_COMPACT_MODEL_PATH
+            texts = pd.read_csv(dataset_path, usecols=['text'])['text'].astype(str)
+            try:
+                agreement = export_compact(pipeline, compact_path, texts.sample(min(len(texts), 2000), random_state=42).tolist())
+            except Exception as e:
+                logger.error(f"Compact intent export failed, serving the pipeline instead: {e}")
+                agreement = None
+                if os.path.exists(compact_path):
+                    os.remove(compact_path)
+            return {"status": "success", "samples": X.shape[0], "compact_export": agreement}
         except Exception as e:
             logger.error(f"Error training intent model: {str(e)}")
             raise e
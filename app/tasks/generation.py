@@ -0,0 +1,22 @@
+import asyncio
+from typing import Any, Dict, List
+from app.celery_app import celery_app
+from app.services.bulk_generation_service import create_job_store, run_items
+
+@celery_app.task(bind=True, name="generation.bulk")
+def run_bulk_generation(self, job_id: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run a large bulk generation batch, appending each result to the shared job store"""
+
+    async def run() -> int:
+        # A new store per task: its Redis connections belong to this event loop
+        store = create_job_store()
+        await store.set_status(job_id, "running")
+        try:
+            await run_items(items, lambda result: store.add_result(job_id, result))
+        except Exception:
+            await store.set_status(job_id, "failed")
+            raise
+        await store.set_status(job_id, "completed")
+        return len(items)
+
+    return {"total": asyncio.run(run())}
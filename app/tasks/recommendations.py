@@ -0,0 +1,8 @@
+from typing import Any, Dict, Optional
+from app.celery_app import celery_app
+from app.services.recommendation_service import refresh_recommendations
+
+@celery_app.task(name="recommendations.refresh")
+def refresh_recommendations_task(dataset_path: Optional[str] = None, incremental: bool = True) -> Dict[str, Any]:
+    """Rebuild the precomputed recommendation store (scheduled by Celery beat)"""
+    return refresh_recommendations(dataset_path, incremental)
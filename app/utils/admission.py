@@ -0,0 +1,218 @@
+import re
+import json
+import heapq
+import asyncio
+import itertools
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+class PriorityClass:
+    def __init__(self, name: str, priority: int, max_concurrency: int, max_queue: int, shares_budget: bool = True):
+        self.name = name
+        self.priority = priority  # lower is served first
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        # Classes outside the shared budget are only limited by their own cap and never queue
+        self.shares_budget = shares_budget
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "priority": self.priority,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "shares_budget": self.shares_budget,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out
+        }
+
+class AdmissionController:
+    """
+    Shared concurrency budget with per-class caps and bounded wait queues.
+
+    When a slot frees up it goes to the highest-priority waiter whose class is
+    still under its own cap, so cheap local-model requests overtake queued LLM calls.
+    A request whose class queue is full is rejected immediately.
+    """
+
+    def __init__(self, classes: List[PriorityClass], max_concurrency: int, queue_timeout: float):
+        self.classes = {c.name: c for c in classes}
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future, PriorityClass]] = []
+        self._seq = itertools.count()
+
+    def _can_run(self, cls: PriorityClass) -> bool:
+        return self.in_flight < self.max_concurrency and cls.in_flight < cls.max_concurrency
+
+    def _start(self, cls: PriorityClass):
+        if cls.shares_budget:
+            self.in_flight += 1
+        cls.in_flight += 1
+        cls.admitted += 1
+
+    async def acquire(self, cls: PriorityClass) -> bool:
+        if not cls.shares_budget:
+            if cls.in_flight >= cls.max_concurrency:
+                cls.rejected += 1
+                return False
+            self._start(cls)
+            return True
+        # Waiters of equal or higher priority that could run go first
+        ahead = any(
+            priority <= cls.priority and waiting.in_flight < waiting.max_concurrency
+            for priority, _, _, waiting in self._waiters
+        )
+        if self._can_run(cls) and not ahead:
+            self._start(cls)
+            return True
+        if cls.queued >= cls.max_queue:
+            cls.rejected += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (cls.priority, next(self._seq), future, cls)
+        heapq.heappush(self._waiters, entry)
+        cls.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            if future.done():
+                return True
+            cls.timed_out += 1
+            cls.rejected += 1
+            return False
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just as the client went away
+                self.release(cls)
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                cls.queued -= 1
+
+    def release(self, cls: PriorityClass):
+        cls.in_flight -= 1
+        if cls.shares_budget:
+            self.in_flight -= 1
+            self._grant()
+
+    def _grant(self):
+        skipped = []
+        while self._waiters and self.in_flight < self.max_concurrency:
+            entry = heapq.heappop(self._waiters)
+            _, _, future, cls = entry
+            if cls.in_flight >= cls.max_concurrency:
+                skipped.append(entry)
+                continue
+            cls.queued -= 1
+            self._start(cls)
+            future.set_result(True)
+        for entry in skipped:
+            heapq.heappush(self._waiters, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "classes": {name: cls.stats() for name, cls in self.classes.items()}
+        }
+
+# Long-lived streams and status polls, matched before the prefixes below. A stream holds
+# its slot for the whole job, so streams get their own class outside the shared budget
+# instead of starving the requests that do the work; polls are cheap reads.
+ROUTE_PATTERNS = [
+    (re.compile(r"^/api/(ai|v1)/generation/bulk/[^/]+/stream$"), "streaming"),
+    (re.compile(r"^/api/ai/resume/bulk$"), "streaming"),
+    (re.compile(r"^/api/(ai|v1)/generation/bulk/[^/]+$"), "cheap"),
+    (re.compile(r"^/api/(ai|v1)/training/model-status/"), "cheap"),
+]
+# Route prefix -> priority class. Unlisted routes count as "cheap"; /health and /
+# always bypass admission so probes keep answering under overload.
+ROUTE_CLASSES = [
+    ("/api/ai/generation", "expensive"),
+    ("/api/v1/generation", "expensive"),
+    ("/api/ai/resume", "expensive"),
+    ("/api/ai/training", "expensive"),
+    ("/api/v1/training", "expensive"),
+]
+BYPASS_PATHS = {"/", "/health", "/api/ai/metrics/admission"}
+
+def build_controller() -> AdmissionController:
+    return AdmissionController(
+        [
+            PriorityClass("cheap", 0, settings.ADMISSION_CHEAP_CONCURRENCY, settings.ADMISSION_CHEAP_QUEUE),
+            PriorityClass("expensive", 1, settings.ADMISSION_EXPENSIVE_CONCURRENCY, settings.ADMISSION_EXPENSIVE_QUEUE),
+            PriorityClass("streaming", 2, settings.ADMISSION_STREAMING_CONCURRENCY, 0, shares_budget=False),
+        ],
+        max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+    )
+
+controller = build_controller()
+
+def classify(path: str) -> Optional[str]:
+    if path in BYPASS_PATHS:
+        return None
+    for pattern, name in ROUTE_PATTERNS:
+        if pattern.match(path):
+            return name
+    for prefix, name in ROUTE_CLASSES:
+        if path.startswith(prefix):
+            return name
+    return "cheap"
+
+class AdmissionMiddleware:
+    """ASGI middleware; the slot is held until the response body is fully sent."""
+
+    def __init__(self, app, controller: AdmissionController = controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        name = classify(scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        cls = self.controller.classes[name]
+        if not await self.controller.acquire(cls):
+            await self._reject(send, cls)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(cls)
+
+    async def _reject(self, send, cls: PriorityClass):
+        logger.warning(f"Shedding {cls.name} request: in_flight={cls.in_flight} queued={cls.queued}")
+        body = json.dumps({"detail": "Service is overloaded, please retry shortly"}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(settings.ADMISSION_RETRY_AFTER_SECONDS).encode()),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
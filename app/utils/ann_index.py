@@ -0,0 +1,210 @@
+"""
+Approximate nearest-neighbour index over unit-length embeddings (inner product).
+
+IVF: vectors are clustered into `nlist` coarse lists and stored sorted by list, so a
+query scans only the `nprobe` lists closest to it, each a contiguous slice. With
+product quantization (`pq_m` > 0) each vector's residual from its list centroid is
+stored as `pq_m` one-byte codes and scored from per-query lookup tables, cutting
+memory ~4*dim/pq_m times.
+
+Every array is a plain .npy file opened with mmap_mode="r": loading is near-instant,
+and all workers on a host share the same pages through the OS page cache. Raise
+`nprobe` for recall, lower it for latency; `benchmark_recall` measures both.
+"""
+import os
+import json
+import time
+import shutil
+import logging
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sklearn.cluster import MiniBatchKMeans
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+# Cap on vectors used to train the coarse and PQ codebooks
+TRAIN_SAMPLE = 100000
+
+def _kmeans(data: np.ndarray, clusters: int) -> np.ndarray:
+    km = MiniBatchKMeans(n_clusters=clusters, random_state=42, batch_size=4096, n_init=3)
+    km.fit(data)
+    return km.cluster_centers_.astype(np.float32)
+
+def _batched_argmax(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 50000) -> np.ndarray:
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), batch_size):
+        out[start:start + batch_size] = np.argmax(vectors[start:start + batch_size] @ centroids.T, axis=1)
+    return out
+
+class ANNIndex:
+    def __init__(self, path: str, meta: Dict[str, Any], arrays: Dict[str, np.ndarray], nprobe: int = 8):
+        self.path = path
+        self.meta = meta
+        self.nprobe = nprobe
+        self.centroids = arrays["centroids"]
+        self.offsets = arrays["offsets"]
+        self.ids = arrays["ids"]
+        self.vectors = arrays.get("vectors")
+        self.codes = arrays.get("codes")
+        self.codebooks = arrays.get("codebooks")
+
+    @property
+    def size(self) -> int:
+        return int(self.meta["count"])
+
+    @classmethod
+    def build(
+        cls,
+        path: str,
+        vectors: np.ndarray,
+        ids: Sequence[str],
+        nlist: int = 0,
+        pq_m: int = 0,
+        nprobe: int = 8
+    ) -> "ANNIndex":
+        """
+        Build an index from unit-length `vectors` and publish it at `path`.
+
+        The new index is written to a sibling directory and swapped in, so workers
+        still reading the previous one keep valid mappings.
+        """
+        count, dim = vectors.shape
+        if count == 0:
+            raise ValueError("Cannot build an index over zero vectors")
+        nlist = nlist or int(4 * np.sqrt(count))
+        if pq_m and dim % pq_m:
+            raise ValueError(f"pq_m={pq_m} must divide the embedding dimension {dim}")
+
+        rng = np.random.default_rng(42)
+        sample = np.asarray(vectors[np.sort(rng.choice(count, min(count, TRAIN_SAMPLE), replace=False))])
+        nlist = max(1, min(nlist, len(sample)))
+        centroids = _kmeans(sample, nlist) if nlist > 1 else sample.mean(axis=0, keepdims=True).astype(np.float32)
+        assignment = _batched_argmax(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=nlist), out=offsets[1:])
+
+        staging = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        np.save(os.path.join(staging, "centroids.npy"), centroids)
+        np.save(os.path.join(staging, "offsets.npy"), offsets)
+        np.save(os.path.join(staging, "ids.npy"), np.asarray(ids, dtype=np.str_)[order])
+
+        if pq_m:
+            dsub = dim // pq_m
+            ksub = min(256, len(sample))
+            # Quantize residuals: q.x = q.centroid + q.residual, and residuals are far
+            # easier to approximate than the raw vectors
+            sample_residuals = sample - centroids[_batched_argmax(sample, centroids)]
+            codebooks = np.stack([_kmeans(sample_residuals[:, m * dsub:(m + 1) * dsub], ksub) for m in range(pq_m)])
+            codes = np.lib.format.open_memmap(os.path.join(staging, "codes.npy"), mode="w+", dtype=np.uint8, shape=(count, pq_m))
+            for start in range(0, count, 50000):
+                rows = order[start:start + 50000]
+                block = vectors[rows] - centroids[assignment[rows]]
+                for m in range(pq_m):
+                    sub = block[:, m * dsub:(m + 1) * dsub]
+                    # Nearest codeword by squared distance (|c|^2 - 2 x.c; |x|^2 is constant)
+                    dist = (codebooks[m] ** 2).sum(axis=1) - 2 * sub @ codebooks[m].T
+                    codes[start:start + len(block), m] = np.argmin(dist, axis=1)
+            codes.flush()
+            del codes
+            np.save(os.path.join(staging, "codebooks.npy"), codebooks)
+        else:
+            stored = np.lib.format.open_memmap(os.path.join(staging, "vectors.npy"), mode="w+", dtype=np.float32, shape=(count, dim))
+            for start in range(0, count, 50000):
+                stored[start:start + 50000] = vectors[order[start:start + 50000]]
+            stored.flush()
+            del stored
+
+        meta = {"count": int(count), "dim": int(dim), "nlist": int(nlist), "pq_m": int(pq_m), "built_at": time.time()}
+        with open(os.path.join(staging, META_FILE), "w") as f:
+            json.dump(meta, f)
+
+        previous = f"{path}.old-{os.getpid()}"
+        if os.path.exists(path):
+            os.replace(path, previous)
+        os.replace(staging, path)
+        shutil.rmtree(previous, ignore_errors=True)
+        logger.info(f"Built ANN index at {path}: {count} vectors, nlist={nlist}, pq_m={pq_m}")
+        return cls.load(path, nprobe=nprobe)
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = 8) -> "ANNIndex":
+        if os.path.basename(path) == META_FILE:
+            path = os.path.dirname(path)
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {}
+        for name in ("centroids", "offsets", "ids", "vectors", "codes", "codebooks"):
+            file = os.path.join(path, f"{name}.npy")
+            if os.path.exists(file):
+                arrays[name] = np.load(file, mmap_mode="r")
+        return cls(path, meta, arrays, nprobe=nprobe)
+
+    def search(self, query: np.ndarray, k: int = 10, nprobe: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Top-k (id, score) by inner product, scanning the `nprobe` closest lists."""
+        q = np.asarray(query, dtype=np.float32).ravel()
+        nlist = len(self.centroids)
+        nprobe = max(1, min(nprobe or self.nprobe, nlist))
+        coarse = self.centroids @ q
+        probes = np.argpartition(-coarse, nprobe - 1)[:nprobe] if nprobe < nlist else np.arange(nlist)
+
+        if self.codes is not None:
+            pq_m, ksub, dsub = self.codebooks.shape
+            # table[m, c] = <q_m, codeword c of subspace m>
+            table = np.einsum("mkd,md->mk", self.codebooks, q.reshape(pq_m, dsub))
+            columns = np.arange(pq_m)
+
+        scores, positions = [], []
+        for probe in probes:
+            start, end = int(self.offsets[probe]), int(self.offsets[probe + 1])
+            if start == end:
+                continue
+            if self.codes is not None:
+                scores.append(coarse[probe] + table[columns, self.codes[start:end]].sum(axis=1))
+            else:
+                scores.append(self.vectors[start:end] @ q)
+            positions.append(np.arange(start, end))
+        if not scores:
+            return []
+        scores = np.concatenate(scores)
+        positions = np.concatenate(positions)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(str(self.ids[positions[i]]), float(scores[i])) for i in top]
+
+def exact_search(vectors: np.ndarray, ids: Sequence[str], query: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+    """Brute-force reference for benchmark_recall."""
+    scores = vectors @ np.asarray(query, dtype=np.float32).ravel()
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [(str(ids[i]), float(scores[i])) for i in top]
+
+def benchmark_recall(
+    index: ANNIndex,
+    vectors: np.ndarray,
+    ids: Sequence[str],
+    queries: np.ndarray,
+    k: int = 10,
+    nprobes: Sequence[int] = (1, 2, 4, 8, 16, 32)
+) -> Dict[str, Any]:
+    """
+    Recall@k and mean latency of `index` against exact search over the original
+    vectors, for each nprobe setting.
+    """
+    started = time.perf_counter()
+    truth = [{i for i, _ in exact_search(vectors, ids, q, k)} for q in queries]
+    exact_ms = (time.perf_counter() - started) * 1000 / max(1, len(queries))
+
+    results = []
+    for nprobe in sorted({min(n, len(index.centroids)) for n in nprobes}):
+        started = time.perf_counter()
+        found = [{i for i, _ in index.search(q, k, nprobe)} for q in queries]
+        latency_ms = (time.perf_counter() - started) * 1000 / max(1, len(queries))
+        recall = float(np.mean([len(f & t) / max(1, len(t)) for f, t in zip(found, truth)]))
+        results.append({"nprobe": nprobe, f"recall@{k}": round(recall, 4), "latency_ms": round(latency_ms, 3)})
+    return {"queries": len(queries), "k": k, "exact_latency_ms": round(exact_ms, 3), "ann": results}
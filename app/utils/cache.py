@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import hashlib
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU map of key -> serialized value with optional TTL."""
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at and expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at)
+            self.nbytes += len(key) + len(value)
+            while len(self._data) > self.max_entries:
+                self._remove(next(iter(self._data)))
+
+    def _remove(self, key: str):
+        value, _ = self._data.pop(key)
+        self.nbytes -= len(key) + len(value)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class RedisStore:
+    """Shared cache tier backed by Redis. Errors degrade to cache misses."""
+
+    def __init__(self, url: str, timeout: float = 0.2, retry_after: float = 30.0):
+        import redis.asyncio as aioredis
+        self.client = aioredis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self.retry_after = retry_after
+        self._down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _mark_down(self, op: str, error: Exception):
+        # Skip Redis for a while instead of paying the timeout on every request
+        logger.warning(f"Shared cache {op} failed, bypassing for {self.retry_after}s: {error}")
+        self._down_until = time.monotonic() + self.retry_after
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not self.available:
+            return None
+        try:
+            return await self.client.get(key)
+        except Exception as e:
+            self._mark_down("get", e)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if not self.available:
+            return
+        try:
+            await self.client.set(key, value, ex=int(ttl) if ttl else None)
+        except Exception as e:
+            self._mark_down("set", e)
+
+class InMemoryStore:
+    """Stand-in for the shared tier in tests and single-process setups."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, float]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at and expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        self._data[key] = (value, time.monotonic() + ttl if ttl else 0.0)
+
+_shared_store = None
+
+def get_shared_store() -> Optional[RedisStore]:
+    """Process-wide shared store, or None when no Redis is configured."""
+    global _shared_store
+    if _shared_store is None and settings.CACHE_REDIS_URL:
+        try:
+            _shared_store = RedisStore(settings.CACHE_REDIS_URL)
+        except Exception as e:
+            logger.error(f"Could not create shared cache store: {e}")
+    return _shared_store
+
+_registry: List["ResultCache"] = []
+
+class ResultCache:
+    """
+    Local LRU in front of an optional shared store, for JSON-serializable results.
+
+    Concurrent misses for the same key within a process wait on a single computation,
+    which keeps running as long as any of them is still waiting.
+    Every instance registers itself so its hit ratios show up in `cache_stats()`.
+    """
+
+    def __init__(self, namespace: str, max_entries: int, ttl: Optional[float] = None, shared_store=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LRUCache(max_entries, ttl)
+        self.shared = shared_store
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        _registry.append(self)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        should_cache: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        key = f"{self.namespace}:{key}"
+        raw = self.local.get(key)
+        if raw is not None:
+            self.local_hits += 1
+            return json.loads(raw)
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # The computation runs in its own task so a cancelled caller cannot take
+            # it down for the others waiting on the same key
+            task = asyncio.ensure_future(self._fill(key, compute, should_cache))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return json.loads(await asyncio.shield(task))
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                # Every caller gave up; stop the computation
+                if not task.done():
+                    task.cancel()
+
+    async def _fill(self, key: str, compute: Callable[[], Awaitable[Any]], should_cache: Optional[Callable[[Any], bool]]) -> bytes:
+        raw = await self.shared.get(key) if self.shared is not None else None
+        if raw is not None:
+            self.shared_hits += 1
+            self.local.set(key, raw)
+            return raw
+        self.misses += 1
+        value = await compute()
+        raw = json.dumps(value, default=str).encode("utf-8")
+        if should_cache is None or should_cache(value):
+            self.local.set(key, raw)
+            if self.shared is not None:
+                await self.shared.set(key, raw, self.ttl)
+        return raw
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Nobody may be waiting any more; avoid "exception was never retrieved" noise
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.local_hits + self.shared_hits + self.coalesced + self.misses
+        hits = lookups - self.misses
+        return {
+            "namespace": self.namespace,
+            "lookups": lookups,
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "local_entries": len(self.local),
+            "local_bytes": self.local.nbytes,
+            "shared_tier": type(self.shared).__name__ if self.shared is not None else None
+        }
+
+def cache_stats() -> List[Dict[str, Any]]:
+    return [cache.stats() for cache in _registry]
+
+def make_key(*parts: Any) -> str:
+    """Stable digest of canonicalized inputs (dict ordering and whitespace do not matter)."""
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def model_version(*paths: str) -> str:
+    """
+    Fingerprint of model artifacts on disk.
+
+    Publishing a new model changes its mtime/size, so keys built from this
+    version stop matching old entries without any explicit invalidation.
+    """
+    stamps = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamps.append(f"{stat.st_mtime_ns}-{stat.st_size}")
+        except OSError:
+            stamps.append("missing")
+    return hashlib.sha1("|".join(stamps).encode("utf-8")).hexdigest()[:12]
@@ -0,0 +1,101 @@
+"""
+Extractive compression of long free-text inputs before they go into LLM prompts.
+
+When a field is over its token budget, its sentences are ranked by TF-IDF cosine
+similarity to a query (the job title and skills) and the best ones are kept, in their
+original order, until the budget is filled. Everything runs locally and in-process.
+"""
+import re
+import math
+import logging
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+from app.utils.tokenizer import tokenize
+from app.utils.tokens import estimate_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Sentence ends (Latin punctuation, Khmer khan/bariyoosan) and line breaks / bullets
+_SENTENCE_RE = re.compile(r"(?<=[.!?។៕])\s+|\s*[\r\n]+\s*(?:[-*•]\s*)?")
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences with bullet markers stripped; repeated sentences are kept once."""
+    seen, sentences = set(), []
+    for part in _SENTENCE_RE.split(text):
+        sentence = (part or "").strip().lstrip("-*• ").strip()
+        if sentence and sentence not in seen:
+            seen.add(sentence)
+            sentences.append(sentence)
+    return sentences
+
+def _tfidf(counts: Counter, idf: Dict[str, float]) -> Dict[str, float]:
+    vector = {term: (1 + math.log(n)) * idf.get(term, 0.0) for term, n in counts.items()}
+    norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+    return {term: v / norm for term, v in vector.items()}
+
+def rank_sentences(sentences: Sequence[str], query: str) -> List[float]:
+    """Cosine similarity of each sentence to the query, with idf over the sentences."""
+    docs = [Counter(tokenize(s)) for s in sentences]
+    df = Counter(term for doc in docs for term in doc)
+    total = len(docs)
+    idf = {term: math.log((1 + total) / (1 + n)) + 1 for term, n in df.items()}
+    q = _tfidf(Counter(tokenize(query)), idf)
+    return [sum(weight * q.get(term, 0.0) for term, weight in _tfidf(doc, idf).items()) for doc in docs]
+
+def compress_text(text: str, query: str, budget: int) -> Tuple[str, int, int]:
+    """Return (text, original_tokens, final_tokens); text is unchanged when it fits."""
+    original = estimate_tokens(text)
+    if not text or original <= budget:
+        return text, original, original
+    sentences = split_sentences(text)
+    scores = rank_sentences(sentences, query)
+    # Most relevant first; earlier sentences win ties (postings tend to lead with the essentials)
+    order = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+    chosen, used = [], 0
+    for i in order:
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost <= budget:
+            chosen.append(i)
+            used += cost
+    if chosen:
+        compressed = " ".join(sentences[i] for i in sorted(chosen))
+    else:
+        # A single sentence larger than the whole budget
+        compressed = truncate_to_tokens(sentences[order[0]], budget)
+    return compressed, original, estimate_tokens(compressed)
+
+class CompressionStats:
+    def __init__(self):
+        self.endpoints: Dict[str, Dict[str, int]] = {}
+
+    def record(self, endpoint: str, original: int, final: int):
+        stats = self.endpoints.setdefault(endpoint, {"requests": 0, "compressed": 0, "tokens_in": 0, "tokens_saved": 0})
+        stats["requests"] += 1
+        stats["tokens_in"] += original
+        if final < original:
+            stats["compressed"] += 1
+            stats["tokens_saved"] += original - final
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            endpoint: {**s, "saved_ratio": round(s["tokens_saved"] / s["tokens_in"], 3) if s["tokens_in"] else 0.0}
+            for endpoint, s in self.endpoints.items()
+        }
+
+compression_stats = CompressionStats()
+
+def compress_fields(endpoint: str, query: str, fields: Dict[str, Tuple[str, int]]) -> Dict[str, str]:
+    """
+    Compress each (text, budget) field against `query`, logging and recording the
+    tokens saved for this request.
+    """
+    result, original_total, final_total = {}, 0, 0
+    for name, (text, budget) in fields.items():
+        compressed, original, final = compress_text(text or "", query, budget)
+        result[name] = compressed if text else text
+        original_total += original
+        final_total += final
+    compression_stats.record(endpoint, original_total, final_total)
+    if final_total < original_total:
+        logger.info(f"Compressed {endpoint} prompt inputs: {original_total} -> {final_total} tokens ({original_total - final_total} saved)")
+    return result
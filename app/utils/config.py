@@ -17,17 +17,175 @@ class Settings(BaseSettings):
     
     # AI Models
     INTENT_MODEL_PATH: str = "app/ml_models/intent_model.joblib"
+    # Array-only export of the intent pipeline, preferred at serving time (see utils/intent_model.py)
+    INTENT_COMPACT_MODEL_PATH: str = "app/ml_models/intent_model.npz"
     SALARY_MODEL_PATH: str = "app/ml_models/salary_model.joblib"
+    SALARY_DL_MODEL_PATH: str = "app/ml_models/salary_dl_model.h5"
+    SALARY_PREPROCESSOR_PATH: str = "app/ml_models/salary_preprocessor.joblib"
     MATCHING_MODEL_PATH: str = "app/ml_models/matching_model.pkl"
+    # Dense matching: LSA embedder and per-kind ANN indexes (jobs/, profiles/)
+    MATCHING_LSA_MODEL_PATH: str = "app/ml_models/matching_lsa.joblib"
+    MATCHING_INDEX_DIR: str = "app/ml_models/matching_index"
+    MATCHING_LSA_DIM: int = 256
+    MATCHING_LSA_FIT_SAMPLE: int = 200000
+    # 0 picks ~4*sqrt(corpus size) lists
+    MATCHING_IVF_NLIST: int = 0
+    # Product-quantization sub-vectors per embedding (must divide the dimension; 0 stores raw float32)
+    MATCHING_PQ_M: int = 0
+    # Lists scanned per query: higher is better recall, lower is faster
+    MATCHING_NPROBE: int = 8
+    
+    # Job event stream consumer (python -m app.job_events); "memory" is an in-process stand-in
+    JOB_EVENTS_BACKEND: str = "redis"
+    JOB_EVENTS_REDIS_URL: str = os.getenv("JOB_EVENTS_REDIS_URL", "redis://localhost:6379/0")
+    JOB_EVENTS_STREAM: str = "jobs:events"
+    JOB_EVENTS_GROUP: str = "ai-matching"
+    # Must stay stable across restarts so pending entries are redelivered to it
+    JOB_EVENTS_CONSUMER: str = os.getenv("JOB_EVENTS_CONSUMER", "matching-1")
+    JOB_EVENTS_BATCH_SIZE: int = 256
+    JOB_EVENTS_BLOCK_MS: int = 2000
+    JOB_EVENTS_DELTA_DIR: str = "app/ml_models/matching_index/jobs_delta"
+    # After a rebuild, changes older than (build time - margin) are assumed to be in the index
+    JOB_EVENTS_REBASE_MARGIN_SECONDS: int = 3600
+    JOB_EVENTS_MAX_DELTA: int = 50000
+    # Precomputed recommendations (app/services/recommendation_service.py)
+    RECOMMENDATION_DATASET_PATH: str = "app/data/matching_dataset.csv"
+    RECOMMENDATION_STORE_DIR: str = "app/ml_models/recommendations"
+    RECOMMENDATION_TOP_K: int = 50
+    # Rows per embedder call during a refresh
+    RECOMMENDATION_EMBED_BATCH: int = 10000
+    # Celery beat interval for incremental refreshes; off by default, as the dataset
+    # at RECOMMENDATION_DATASET_PATH has to be exported first (0 disables the schedule)
+    RECOMMENDATION_REFRESH_MINUTES: int = 0
+    KHMER_DICTIONARY_PATH: str = "app/data/khmer_words.txt"
+    # Canonical skill names and aliases; misspellings within the edit distance are corrected
+    SKILL_VOCABULARY_PATH: str = "app/data/skills.txt"
+    SKILL_MAX_EDIT_DISTANCE: int = 2
+    SKILL_NORMALIZE_MAX_ITEMS: int = 1000
+    # Fitted preprocessors + feature matrices, keyed by dataset hash (see utils/feature_cache.py)
+    FEATURE_CACHE_DIR: str = "app/ml_models/feature_cache"
+    FEATURE_CACHE_MAX_ENTRIES: int = 8
     
     # OpenAI
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
+    # Upper bound for one LLM call; the request deadline may cut it shorter
+    LLM_TIMEOUT_SECONDS: float = 20.0
+    # Serve the local fallback if the LLM has not answered after this long (0 disables)
+    LLM_HEDGE_DELAY_SECONDS: float = 0.0
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_RECOVERY_SECONDS: float = 30.0
+    LLM_BREAKER_HALF_OPEN_PROBES: int = 1
+    # Default per-request budget; clients may lower it with X-Request-Timeout-Ms
+    REQUEST_DEADLINE_SECONDS: float = 30.0
+    # Prompt input budgets (estimated tokens); longer inputs are extractively compressed
+    PROPOSAL_DESCRIPTION_TOKEN_BUDGET: int = 600
+    PROPOSAL_BIO_TOKEN_BUDGET: int = 250
+    INTERVIEW_DESCRIPTION_TOKEN_BUDGET: int = 600
+    INTERVIEW_BIO_TOKEN_BUDGET: int = 250
     
     # Redis & Celery
     CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
     CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+    # Shared result cache tier; leave unset to use only the in-process cache
+    CACHE_REDIS_URL: Optional[str] = None
+    CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    CACHE_TTL_SECONDS: int = 3600
+    
+    # Bulk resume ingestion
+    RESUME_BULK_CONCURRENCY: int = 4
+    RESUME_BULK_QUEUE_SIZE: int = 16
+    RESUME_BULK_MAX_FILES: int = 5000
+    RESUME_BULK_MAX_FILE_BYTES: int = 10 * 1024 * 1024
+    
+    # Resume result cache (bump the version whenever parsing/analysis logic changes)
+    RESUME_PARSER_VERSION: str = "1"
+    RESUME_CACHE_MAX_ENTRIES: int = 2048
+    RESUME_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    
+    # Bulk generation jobs
+    GENERATION_BULK_CONCURRENCY: int = 8
+    GENERATION_BULK_MAX_ITEMS: int = 500
+    GENERATION_BULK_MAX_RETRIES: int = 2
+    # Batches with at least this many items run on Celery workers (0 keeps everything in-process)
+    GENERATION_BULK_CELERY_THRESHOLD: int = 50
+    GENERATION_BULK_JOB_TTL_SECONDS: int = 3600
+    # Job state: "redis" is shared by all server workers and Celery, "memory" stays in one process,
+    # "auto" uses redis when app/server.py runs several workers. Celery offload needs redis.
+    GENERATION_BULK_JOB_BACKEND: str = "auto"
+    GENERATION_BULK_REDIS_URL: str = os.getenv("GENERATION_BULK_REDIS_URL", "redis://localhost:6379/0")
+    
+    # Chat sessions ("memory" per worker, "redis" shared by all workers, "auto" uses redis when
+    # app/server.py runs several workers)
+    CHAT_SESSION_BACKEND: str = "auto"
+    CHAT_SESSION_REDIS_URL: str = os.getenv("CHAT_SESSION_REDIS_URL", "redis://localhost:6379/0")
+    CHAT_MAX_SESSIONS: int = 10000
+    CHAT_SESSION_IDLE_SECONDS: int = 1800
+    CHAT_SESSION_MAX_TURNS: int = 12
+    CHAT_SUMMARY_MAX_TOKENS: int = 300
+    CHAT_CONTEXT_TOKEN_BUDGET: int = 2000
+    # Semantic cache of LLM fallback answers. The threshold only shortlists candidates by cosine
+    # similarity of hashed question vectors; a hit also needs every content word to match
+    CHAT_SEMANTIC_CACHE_ENABLED: bool = True
+    CHAT_SEMANTIC_CACHE_THRESHOLD: float = 0.6
+    CHAT_SEMANTIC_CACHE_MAX_ENTRIES: int = 2000
+    CHAT_SEMANTIC_CACHE_MAX_NAMESPACES: int = 64
+    CHAT_SEMANTIC_CACHE_TTL_SECONDS: int = 24 * 3600
+    
+    # Chat WebSocket (/api/ai/chat/ws)
+    CHAT_WS_MAX_CONNECTIONS: int = 500
+    CHAT_WS_HEARTBEAT_SECONDS: float = 20.0
+    CHAT_WS_IDLE_TIMEOUT_SECONDS: float = 600.0
+    CHAT_WS_MESSAGES_PER_MINUTE: float = 20.0
+    CHAT_WS_BURST: int = 5
+    
+    # Admission control / load shedding
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 64
+    ADMISSION_CHEAP_CONCURRENCY: int = 64
+    ADMISSION_CHEAP_QUEUE: int = 256
+    ADMISSION_EXPENSIVE_CONCURRENCY: int = 16
+    ADMISSION_EXPENSIVE_QUEUE: int = 32
+    # Open bulk streams (NDJSON); outside the shared budget, rejected rather than queued when full
+    ADMISSION_STREAMING_CONCURRENCY: int = 32
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 2
+    
+    # Inference executor (app/utils/inference.py); the thread pool is per server worker
+    INFERENCE_THREAD_WORKERS: int = os.cpu_count() or 1
+    INFERENCE_SALARY_CONCURRENCY: int = 4
+    INFERENCE_EMBEDDING_CONCURRENCY: int = 8
+    INFERENCE_INTENT_CONCURRENCY: int = 8
+    INFERENCE_SIMILARITY_CONCURRENCY: int = 8
+    # Cancel a request's pending work when its client disconnects
+    INFERENCE_CANCEL_ON_DISCONNECT: bool = True
+    
+    # Production server (app/server.py)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: int = os.cpu_count() or 1
+    # Set by app/server.py to the number of workers it forks
+    SERVER_WORKERS: int = 1
+    SERVER_PRELOAD: bool = True
+    WORKER_MAX_REQUESTS: int = 10000
+    WORKER_MAX_REQUESTS_JITTER: int = 1000
+    WORKER_GRACEFUL_TIMEOUT: int = 30
+    
+    # Profiling (app/utils/profiling.py); off unless enabled AND an admin token is set
+    PROFILING_ENABLED: bool = False
+    PROFILING_ADMIN_TOKEN: Optional[str] = None
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+    # Capture stacks of requests running longer than this (0 disables the watchdog)
+    SLOW_REQUEST_THRESHOLD_SECONDS: float = 2.0
+    SLOW_REQUEST_MAX_RECORDS: int = 50
+    TRACEMALLOC_FRAMES: int = 10
     
     # Cors
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:3001", "https://remote-work-frontend-flame.vercel.app"]
 
 settings = Settings()
+
+def shared_state_backend(backend: str) -> str:
+    """Resolve an "auto" state backend: redis when several server workers must share state."""
+    if backend == "auto":
+        return "redis" if settings.SERVER_WORKERS > 1 else "memory"
+    return backend
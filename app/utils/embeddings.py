@@ -0,0 +1,50 @@
+"""
+Dense text embeddings for job and resume matching.
+
+LSA (TF-IDF followed by TruncatedSVD) trained on our own corpus: fully local, no
+network, and it places co-occurring vocabulary ("frontend", "react", "javascript")
+close together even when two texts share no exact words.
+"""
+import numpy as np
+from typing import List, Optional, Sequence
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from app.utils.tokenizer import tokenize
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+class LSAEmbedder:
+    def __init__(self, dim: int = 256, max_features: int = 50000):
+        self.dim = dim
+        self.vectorizer = TfidfVectorizer(
+            tokenizer=tokenize,
+            lowercase=False,
+            token_pattern=None,
+            sublinear_tf=True,
+            max_features=max_features
+        )
+        self.svd: Optional[TruncatedSVD] = None
+
+    def fit(self, texts: Sequence[str]) -> "LSAEmbedder":
+        X = self.vectorizer.fit_transform(texts)
+        # SVD needs fewer components than terms/documents on small corpora
+        dim = max(1, min(self.dim, X.shape[0] - 1, X.shape[1] - 1))
+        self.svd = TruncatedSVD(n_components=dim, random_state=42)
+        self.svd.fit(X)
+        self.dim = dim
+        return self
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        """Unit-length float32 vectors, so inner product is cosine similarity."""
+        return l2_normalize(self.svd.transform(self.vectorizer.transform(texts)))
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.transform([text])[0]
+
+    def transform_to(self, texts: List[str], out: np.ndarray, batch_size: int = 10000):
+        """Embed a large corpus into a preallocated (possibly memory-mapped) array."""
+        for start in range(0, len(texts), batch_size):
+            out[start:start + batch_size] = self.transform(texts[start:start + batch_size])
@@ -0,0 +1,127 @@
+"""
+On-disk cache of fitted preprocessors and their transformed feature matrices.
+
+Entries are keyed by the dataset's content hash plus the feature configuration, so
+retraining on unchanged data with new model hyperparameters skips both CSV parsing
+and feature extraction. Matrices are stored as compressed .npz (sparse or dense).
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import joblib
+import numpy as np
+import scipy.sparse as sp
+import sklearn
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class FeatureCache:
+    def __init__(self, cache_dir: str = None, max_entries: int = None):
+        self.cache_dir = cache_dir or settings.FEATURE_CACHE_DIR
+        self.max_entries = max_entries or settings.FEATURE_CACHE_MAX_ENTRIES
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, dataset_digest: str, feature_config: Dict[str, Any]) -> str:
+        # The sklearn version is part of the key: pickled preprocessors are not portable across it
+        config = json.dumps(feature_config, sort_keys=True)
+        raw = f"{dataset_digest}|{config}|sklearn-{sklearn.__version__}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def _paths(self, key: str) -> Dict[str, str]:
+        base = os.path.join(self.cache_dir, key)
+        return {
+            "X": base + ".X.npz",
+            "y": base + ".y.npz",
+            "preprocessor": base + ".preprocessor.joblib",
+            "manifest": base + ".json"
+        }
+
+    def load(self, key: str) -> Optional[Tuple[Any, np.ndarray, Any]]:
+        paths = self._paths(key)
+        # The manifest is written last, so its presence means the entry is complete
+        if not os.path.exists(paths["manifest"]):
+            return None
+        try:
+            with open(paths["manifest"]) as f:
+                manifest = json.load(f)
+            if manifest["sparse"]:
+                X = sp.load_npz(paths["X"])
+            else:
+                with np.load(paths["X"]) as data:
+                    X = data["X"]
+            with np.load(paths["y"], allow_pickle=True) as data:
+                y = data["y"]
+            preprocessor = joblib.load(paths["preprocessor"])
+            os.utime(paths["manifest"])
+            return X, y, preprocessor
+        except Exception as e:
+            logger.warning(f"Discarding unreadable feature cache entry {key}: {e}")
+            self._remove(key)
+            return None
+
+    def save(self, key: str, X, y, preprocessor):
+        paths = self._paths(key)
+        sparse = sp.issparse(X)
+        if sparse:
+            sp.save_npz(paths["X"], sp.csr_matrix(X), compressed=True)
+        else:
+            np.savez_compressed(paths["X"], X=np.asarray(X))
+        np.savez_compressed(paths["y"], y=np.asarray(y))
+        joblib.dump(preprocessor, paths["preprocessor"], compress=3)
+        tmp = paths["manifest"] + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"sparse": sparse, "shape": list(X.shape), "created": time.time()}, f)
+        os.replace(tmp, paths["manifest"])
+        self._prune()
+
+    def get_or_build(
+        self,
+        dataset_digest: str,
+        feature_config: Dict[str, Any],
+        build: Callable[[], Tuple[Any, np.ndarray, Any]]
+    ) -> Tuple[Any, np.ndarray, Any, bool]:
+        """
+        Return (X, y, fitted preprocessor, cache_hit). `build` runs only on a miss
+        and must return the same triple.
+        """
+        key = self.key(dataset_digest, feature_config)
+        cached = self.load(key)
+        if cached is not None:
+            logger.info(f"Feature cache hit for {feature_config.get('name')} ({key})")
+            return (*cached, True)
+        started = time.perf_counter()
+        X, y, preprocessor = build()
+        logger.info(f"Built features for {feature_config.get('name')} in {time.perf_counter() - started:.2f}s")
+        try:
+            self.save(key, X, y, preprocessor)
+        except Exception as e:
+            logger.warning(f"Could not write feature cache entry {key}: {e}")
+            self._remove(key)
+        return X, y, preprocessor, False
+
+    def _remove(self, key: str):
+        for path in self._paths(key).values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _prune(self):
+        """Drop least recently used entries beyond max_entries."""
+        manifests = [
+            os.path.join(self.cache_dir, name)
+            for name in os.listdir(self.cache_dir)
+            if name.endswith(".json")
+        ]
+        manifests.sort(key=os.path.getmtime, reverse=True)
+        for path in manifests[self.max_entries:]:
+            self._remove(os.path.basename(path)[:-len(".json")])
@@ -0,0 +1,213 @@
+"""
+Shared executor for CPU-bound model inference.
+
+Async handlers must not run model code on the event loop. Every workload runs on one
+per-worker thread pool: the models spend their time in native code that releases the
+GIL (NumPy/BLAS, TensorFlow), and the rest is too short to pay for a process boundary.
+
+Workload functions are module-level and take artifact paths rather than loaded
+models, which are loaded once per process via the model registry. Each workload has
+its own concurrency cap, and queue time (waiting for the cap and for a pool slot) is
+reported separately from run time.
+
+Cancelling the awaiting coroutine, e.g. when CancelOnDisconnectMiddleware sees the
+client go away, drops work that has not started yet; work already running in a
+thread finishes in the background and its result is discarded. It keeps its
+concurrency slot until it actually finishes.
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+def _timed_call(fn: Callable, args: tuple):
+    started = time.time()
+    result = fn(*args)
+    return started, time.time(), result
+
+def _percentile(samples, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class Workload:
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.queue_ms = deque(maxlen=1000)
+        self.run_ms = deque(maxlen=1000)
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running loop of the worker process
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "waiting": self.waiting,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "queue_ms_p50": round(_percentile(self.queue_ms, 0.5), 3),
+            "queue_ms_p95": round(_percentile(self.queue_ms, 0.95), 3),
+            "run_ms_p50": round(_percentile(self.run_ms, 0.5), 3),
+            "run_ms_p95": round(_percentile(self.run_ms, 0.95), 3)
+        }
+
+class InferenceExecutor:
+    def __init__(self, thread_workers: int):
+        self.thread_workers = max(1, thread_workers)
+        self.workloads: Dict[str, Workload] = {}
+        self._threads: Optional[ThreadPoolExecutor] = None
+
+    def register(self, name: str, max_concurrency: int):
+        self.workloads[name] = Workload(name, max_concurrency)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # The pool starts on first use, i.e. inside each server worker after the fork
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="inference")
+        return self._threads
+
+    async def run(self, workload: str, fn: Callable, *args) -> Any:
+        w = self.workloads[workload]
+        enqueued = time.time()
+        w.waiting += 1
+        try:
+            await w.semaphore.acquire()
+        except asyncio.CancelledError:
+            w.cancelled += 1
+            raise
+        finally:
+            w.waiting -= 1
+        w.running += 1
+        loop = asyncio.get_running_loop()
+
+        def finished_running():
+            w.running -= 1
+            w.semaphore.release()
+
+        def on_done(_: Future):
+            # Runs in the pool thread, or inline when queued work is cancelled
+            try:
+                loop.call_soon_threadsafe(finished_running)
+            except RuntimeError:
+                pass  # The loop is closed; nothing is left to release
+
+        try:
+            future = self._pool().submit(_timed_call, fn, args)
+        except Exception:
+            finished_running()
+            w.failed += 1
+            raise
+        # Released when the thread is done, not when the caller stops waiting
+        future.add_done_callback(on_done)
+        try:
+            started, finished, result = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            w.cancelled += 1
+            raise
+        except Exception:
+            w.failed += 1
+            raise
+        w.completed += 1
+        w.queue_ms.append((started - enqueued) * 1000)
+        w.run_ms.append((finished - started) * 1000)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "thread_workers": self.thread_workers,
+            "workloads": {name: w.stats() for name, w in self.workloads.items()}
+        }
+
+    def shutdown(self):
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+
+executor = InferenceExecutor(settings.INFERENCE_THREAD_WORKERS)
+# TensorFlow, scikit-learn transforms and NumPy matrix products release the GIL;
+# intent prediction and token overlap take a few milliseconds at most
+executor.register("salary", settings.INFERENCE_SALARY_CONCURRENCY)
+executor.register("embedding", settings.INFERENCE_EMBEDDING_CONCURRENCY)
+executor.register("intent", settings.INFERENCE_INTENT_CONCURRENCY)
+executor.register("similarity", settings.INFERENCE_SIMILARITY_CONCURRENCY)
+
+class CancelOnDisconnectMiddleware:
+    """
+    Cancels the handler when the client disconnects before the response is sent,
+    so queued inference for abandoned requests is dropped.
+
+    A watcher task becomes the only reader of `receive`. It forwards request body
+    messages only as the app asks for them, so uploads keep their backpressure, and
+    keeps listening for `http.disconnect` once the body has been read.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.INFERENCE_CANCEL_ON_DISCONNECT:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        has_body = headers.get(b"content-length", b"0") != b"0" or b"transfer-encoding" in headers
+        messages: asyncio.Queue = asyncio.Queue()
+        demand = asyncio.Event()
+        state = {"response_done": False, "disconnected": False}
+
+        async def app_receive():
+            demand.set()
+            return await messages.get()
+
+        async def app_send(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                state["response_done"] = True
+            await send(message)
+
+        task = asyncio.ensure_future(self.app(scope, app_receive, app_send))
+
+        async def watch():
+            body_done = not has_body
+            while True:
+                if not body_done:
+                    await demand.wait()
+                    demand.clear()
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    state["disconnected"] = True
+                    if not state["response_done"] and not task.done():
+                        logger.info(f"Client disconnected, cancelling {scope['method']} {scope['path']}")
+                        task.cancel()
+                    await messages.put(message)
+                    return
+                if message["type"] == "http.request" and not message.get("more_body", False):
+                    body_done = True
+                await messages.put(message)
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await task
+        except asyncio.CancelledError:
+            if not state["disconnected"]:
+                task.cancel()
+                raise
+        finally:
+            watcher.cancel()
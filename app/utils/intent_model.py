@@ -0,0 +1,196 @@
+"""
+Compact export of the intent pipeline (TfidfVectorizer + LogisticRegression).
+
+The sklearn pipeline unpickles a Python dict vocabulary and float64 coefficients.
+The export keeps only flat arrays in one uncompressed .npz:
+
+- 64-bit hashes of the vocabulary terms, sorted, with their column indices (lookup
+  is a binary search);
+- idf weights, coefficients and intercepts as contiguous float32;
+- the class labels and the vectorizer settings needed to reproduce tokenization.
+
+CompactIntentModel exposes predict / predict_proba like the pipeline, and
+export_compact refuses to publish an export that disagrees with it.
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+import numpy as np
+from collections import Counter
+from typing import Any, Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+def _resolve_multi_class(clf, n_classes: int) -> str:
+    multi_class = getattr(clf, "multi_class", "auto")
+    if n_classes <= 2:
+        return "binary"
+    if multi_class == "auto":
+        return "ovr" if clf.solver == "liblinear" else "multinomial"
+    return multi_class
+
+class CompactIntentModel:
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        config = json.loads(str(arrays["config"]))
+        self.lowercase = config["lowercase"]
+        self.min_n, self.max_n = config["ngram_range"]
+        self.sublinear_tf = config["sublinear_tf"]
+        self.norm = config["norm"]
+        self.multi_class = config["multi_class"]
+        self._pattern = re.compile(config["token_pattern"])
+        self.hashes = arrays["hashes"]
+        self.columns = arrays["columns"]
+        self.idf = arrays["idf"]
+        self.coef = np.ascontiguousarray(arrays["coef"])
+        self.intercept = arrays["intercept"]
+        self.classes_ = arrays["classes"]
+
+    @classmethod
+    def load(cls, path: str) -> "CompactIntentModel":
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files})
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.hashes, self.columns, self.idf, self.coef, self.intercept, self.classes_))
+
+    def _ngrams(self, text: str) -> List[str]:
+        # Mirrors TfidfVectorizer's word analyzer: regex tokens, then n-grams joined by spaces
+        tokens = self._pattern.findall(text.lower() if self.lowercase else text)
+        grams = list(tokens) if self.min_n == 1 else []
+        for n in range(max(2, self.min_n), self.max_n + 1):
+            grams.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def _features(self, text: str):
+        counts = Counter(self._ngrams(text))
+        if not counts:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        hashes = np.fromiter((term_hash(g) for g in counts), dtype=np.uint64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        pos = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+        found = self.hashes[pos] == hashes
+        cols = self.columns[pos[found]]
+        tf = tf[found]
+        if self.sublinear_tf:
+            tf = 1 + np.log(tf)
+        values = tf * self.idf[cols]
+        if self.norm == "l2" and values.size:
+            values /= np.sqrt(np.dot(values, values))
+        elif self.norm == "l1" and values.size:
+            values /= np.abs(values).sum()
+        return cols, values
+
+    def decision_function(self, texts: Sequence[str]) -> np.ndarray:
+        scores = np.empty((len(texts), self.coef.shape[0]), dtype=np.float32)
+        for i, text in enumerate(texts):
+            cols, values = self._features(text)
+            scores[i] = self.coef[:, cols] @ values + self.intercept
+        return scores
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        scores = self.decision_function(texts)
+        if self.multi_class == "binary":
+            positive = 1 / (1 + np.exp(-scores[:, 0]))
+            return np.column_stack([1 - positive, positive])
+        if self.multi_class == "multinomial":
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+        else:
+            scores = 1 / (1 + np.exp(-scores))
+        return scores / scores.sum(axis=1, keepdims=True)
+
+    def predict(self, texts: Sequence[str]) -> np.ndarray:
+        scores = self.decision_function(texts)
+        if self.multi_class == "binary":
+            return self.classes_[(scores[:, 0] > 0).astype(int)]
+        return self.classes_[np.argmax(scores, axis=1)]
+
+def compact_arrays(pipeline) -> Dict[str, np.ndarray]:
+    tfidf, clf = pipeline.steps[0][1], pipeline.steps[-1][1]
+    unsupported = {
+        "analyzer": tfidf.analyzer != "word",
+        "tokenizer": tfidf.tokenizer is not None,
+        "preprocessor": tfidf.preprocessor is not None,
+        "stop_words": tfidf.stop_words is not None,
+        "strip_accents": tfidf.strip_accents is not None,
+        "binary": tfidf.binary,
+        "use_idf": not tfidf.use_idf
+    }
+    if any(unsupported.values()):
+        raise ValueError(f"Unsupported vectorizer settings for compact export: {[k for k, v in unsupported.items() if v]}")
+
+    terms = list(tfidf.vocabulary_.items())
+    hashes = np.array([term_hash(term) for term, _ in terms], dtype=np.uint64)
+    columns = np.array([column for _, column in terms], dtype=np.int32)
+    order = np.argsort(hashes)
+    if np.any(hashes[order][1:] == hashes[order][:-1]):
+        raise ValueError("Vocabulary hash collision; cannot export compact intent model")
+
+    classes = np.asarray([str(c) for c in clf.classes_])
+    config = {
+        "lowercase": bool(tfidf.lowercase),
+        "token_pattern": tfidf.token_pattern,
+        "ngram_range": list(tfidf.ngram_range),
+        "sublinear_tf": bool(tfidf.sublinear_tf),
+        "norm": tfidf.norm,
+        "multi_class": _resolve_multi_class(clf, len(classes))
+    }
+    return {
+        "config": np.array(json.dumps(config)),
+        "hashes": hashes[order],
+        "columns": columns[order],
+        "idf": tfidf.idf_.astype(np.float32),
+        "coef": np.ascontiguousarray(clf.coef_, dtype=np.float32),
+        "intercept": np.asarray(clf.intercept_, dtype=np.float32),
+        "classes": classes
+    }
+
+def verify_agreement(pipeline, compact: CompactIntentModel, texts: Sequence[str]) -> Dict[str, Any]:
+    """Prediction agreement and largest probability gap between the two models."""
+    texts = list(texts)
+    expected = np.asarray([str(c) for c in pipeline.predict(texts)])
+    actual = compact.predict(texts)
+    proba_gap = float(np.abs(pipeline.predict_proba(texts) - compact.predict_proba(texts)).max()) if texts else 0.0
+    agreement = float(np.mean(expected == actual)) if texts else 1.0
+    return {"samples": len(texts), "agreement": agreement, "max_proba_diff": proba_gap}
+
+def export_compact(pipeline, path: str, texts: Sequence[str], min_agreement: float = 0.999) -> Dict[str, Any]:
+    """
+    Write the compact model to `path` after checking it against the pipeline on
+    `texts`. Only float32 rounding separates the two, so near-ties are the only
+    expected disagreements.
+    """
+    arrays = compact_arrays(pipeline)
+    report = verify_agreement(pipeline, CompactIntentModel(arrays), texts)
+    if report["agreement"] < min_agreement:
+        raise ValueError(f"Compact intent model disagrees with the pipeline: {report}")
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+    logger.info(f"Exported compact intent model to {path}: {report}")
+    return report
+
+if __name__ == "__main__":
+    # Convert an existing pipeline: python -m app.utils.intent_model
+    import time
+    import joblib
+    import pandas as pd
+    from app.utils.config import settings
+
+    logging.basicConfig(level=logging.INFO)
+    pipeline = joblib.load(settings.INTENT_MODEL_PATH)
+    texts = pd.read_csv("app/data/chatbot_dataset.csv")["text"].astype(str).tolist()
+    report = export_compact(pipeline, settings.INTENT_COMPACT_MODEL_PATH, texts)
+    started = time.perf_counter()
+    model = CompactIntentModel.load(settings.INTENT_COMPACT_MODEL_PATH)
+    print(json.dumps({
+        **report,
+        "load_ms": round((time.perf_counter() - started) * 1000, 2),
+        "array_bytes": model.nbytes,
+        "file_bytes": os.path.getsize(settings.INTENT_COMPACT_MODEL_PATH)
+    }, indent=2))
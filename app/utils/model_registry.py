@@ -0,0 +1,50 @@
+import os
+import joblib
+import logging
+import threading
+from typing import Any, Callable, Dict, Tuple
+from app.utils.config import settings
+from app.utils.cache import model_version
+
+logger = logging.getLogger(__name__)
+
+# path -> (file fingerprint, loaded object). Module level so every service instance in a
+# process reuses the same objects, and so a preloading master can share them with
+# forked workers copy-on-write.
+_models: Dict[str, Tuple[str, Any]] = {}
+_lock = threading.Lock()
+
+def load_model(path: str, loader: Callable[[str], Any] = joblib.load) -> Any:
+    """Return the artifact at `path`, loading it at most once per published version."""
+    if not os.path.exists(path):
+        return None
+    version = model_version(path)
+    entry = _models.get(path)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    with _lock:
+        entry = _models.get(path)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        logger.info(f"Loading model artifact from {path}")
+        model = loader(path)
+        _models[path] = (version, model)
+        return model
+
+def preload_models():
+    """
+    Load the joblib artifacts used at serving time.
+
+    The Keras model is intentionally left out: TensorFlow starts thread pools on load,
+    which must not happen before forking. Workers load it lazily instead.
+    """
+    for path in (settings.INTENT_MODEL_PATH, settings.SALARY_MODEL_PATH, settings.SALARY_PREPROCESSOR_PATH):
+        try:
+            load_model(path)
+        except Exception as e:
+            logger.error(f"Failed to preload {path}: {e}")
+    try:
+        from app.utils.intent_model import CompactIntentModel
+        load_model(settings.INTENT_COMPACT_MODEL_PATH, loader=CompactIntentModel.load)
+    except Exception as e:
+        logger.error(f"Failed to preload {settings.INTENT_COMPACT_MODEL_PATH}: {e}")
@@ -0,0 +1,246 @@
+"""
+On-demand profiling for live workers. Everything is off unless PROFILING_ENABLED is set
+and an admin token is configured.
+
+- Per-request CPU profile: send `X-Profile: <admin token>` and the response is replaced
+  by a folded-stack file (flamegraph.pl / speedscope / inferno format) sampled while
+  that request ran. Sampling reads the event-loop thread, so concurrent requests on the
+  same worker show up too; profile on a quiet worker for a clean picture.
+- Slow-request sampler: a watchdog thread captures the stack of any request still
+  running after SLOW_REQUEST_THRESHOLD_SECONDS. Fast requests cost two dict operations.
+- tracemalloc snapshots with diffs against the previous snapshot, per worker.
+"""
+import os
+import sys
+import hmac
+import time
+import asyncio
+import itertools
+import threading
+import tracemalloc
+import traceback
+from collections import Counter, deque
+from typing import Any, Dict, Optional
+from app.utils.config import settings
+
+def is_enabled() -> bool:
+    return settings.PROFILING_ENABLED and bool(settings.PROFILING_ADMIN_TOKEN)
+
+def check_token(token: Optional[str]) -> bool:
+    return is_enabled() and token is not None and hmac.compare_digest(token, settings.PROFILING_ADMIN_TOKEN)
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def fold_stack(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval into folded-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        self._thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self.counts.most_common()) + "\n"
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[fold_stack(frame)] += 1
+
+class SlowRequestSampler:
+    """Watchdog that records stacks of requests running past the threshold."""
+
+    def __init__(self, threshold: float, max_records: int):
+        self.threshold = threshold
+        self.records: deque = deque(maxlen=max(1, max_records))
+        self._active: Dict[int, Dict[str, Any]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, method: str, path: str) -> int:
+        request_id = next(self._ids)
+        self._active[request_id] = {
+            "method": method,
+            "path": path,
+            "started": time.monotonic(),
+            "thread_id": threading.get_ident(),
+            "task": asyncio.current_task(),
+            "captured": False
+        }
+        self._ensure_thread()
+        return request_id
+
+    def end(self, request_id: int):
+        entry = self._active.pop(request_id, None)
+        if entry is not None and entry["captured"]:
+            # Update the record with the final duration
+            for record in reversed(self.records):
+                if record["request_id"] == request_id:
+                    record["duration_seconds"] = round(time.monotonic() - entry["started"], 3)
+                    break
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="slow-request-sampler", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        interval = max(0.05, self.threshold / 2)
+        while True:
+            time.sleep(interval)
+            now = time.monotonic()
+            for request_id, entry in list(self._active.items()):
+                if entry["captured"] or now - entry["started"] < self.threshold:
+                    continue
+                entry["captured"] = True
+                self.records.append(self._capture(request_id, entry, now))
+
+    def _capture(self, request_id: int, entry: Dict[str, Any], now: float) -> Dict[str, Any]:
+        # The thread stack shows what is blocking the loop; the task stack shows
+        # where the request's coroutine is suspended.
+        frame = sys._current_frames().get(entry["thread_id"])
+        task = entry["task"]
+        try:
+            task_frames = task.get_stack() if task is not None else []
+        except Exception:
+            task_frames = []
+        return {
+            "request_id": request_id,
+            "pid": os.getpid(),
+            "method": entry["method"],
+            "path": entry["path"],
+            "elapsed_at_capture": round(now - entry["started"], 3),
+            "duration_seconds": None,
+            "captured_at": time.time(),
+            "thread_stack": traceback.format_stack(frame) if frame is not None else [],
+            "task_stack": [line for f in task_frames for line in traceback.format_stack(f, limit=1)]
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "threshold_seconds": self.threshold,
+            "in_flight": len(self._active),
+            "records": list(self.records)
+        }
+
+slow_sampler = SlowRequestSampler(settings.SLOW_REQUEST_THRESHOLD_SECONDS, settings.SLOW_REQUEST_MAX_RECORDS)
+
+_previous_snapshot: Optional[tracemalloc.Snapshot] = None
+_snapshot_lock = threading.Lock()
+
+def start_tracemalloc():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(settings.TRACEMALLOC_FRAMES)
+
+def stop_tracemalloc():
+    global _previous_snapshot
+    with _snapshot_lock:
+        _previous_snapshot = None
+    tracemalloc.stop()
+
+def tracemalloc_report(top: int = 25) -> Dict[str, Any]:
+    """Top allocation sites now, and the biggest changes since the previous call."""
+    global _previous_snapshot
+    if not tracemalloc.is_tracing():
+        return {"pid": os.getpid(), "tracing": False}
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+    ])
+    current, peak = tracemalloc.get_traced_memory()
+    report = {
+        "pid": os.getpid(),
+        "tracing": True,
+        "traced_bytes": current,
+        "peak_bytes": peak,
+        "top": [
+            {"location": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:top]
+        ]
+    }
+    with _snapshot_lock:
+        if _previous_snapshot is not None:
+            report["diff"] = [
+                {"location": str(stat.traceback[0]), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+                for stat in snapshot.compare_to(_previous_snapshot, "lineno")[:top]
+            ]
+        _previous_snapshot = snapshot
+    return report
+
+class ProfilingMiddleware:
+    """Per-request CPU profiles on demand and the slow-request watchdog."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not is_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-profile":
+                token = value.decode("latin-1")
+                break
+
+        request_id = slow_sampler.begin(scope["method"], scope["path"]) if settings.SLOW_REQUEST_THRESHOLD_SECONDS > 0 else None
+        try:
+            if token is not None and check_token(token):
+                await self._profile(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            if request_id is not None:
+                slow_sampler.end(request_id)
+
+    async def _profile(self, scope, receive, send):
+        status = {"code": 500}
+
+        async def capture(message):
+            # The real response is discarded; only its status is reported
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL_MS / 1000)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            folded = sampler.stop()
+        body = folded.encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                (b"content-disposition", b'attachment; filename="profile.folded"'),
+                (b"x-profiled-status", str(status["code"]).encode()),
+                (b"x-profiled-seconds", f"{time.perf_counter() - started:.3f}".encode()),
+                (b"x-profiled-samples", str(sum(sampler.counts.values())).encode()),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
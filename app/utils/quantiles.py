@@ -0,0 +1,91 @@
+"""
+Salary quantiles from a single model pass.
+
+- Neural networks end in one output per quantile and are trained with the pinball
+  (quantile) loss, so p10/p50/p90 come out of the same forward pass.
+- Random forests are served as quantile regression forests (Meinshausen, 2006): the
+  training targets in the leaves a row falls into, weighted by 1 / leaf size per tree,
+  form its predictive distribution. Training rows are stored sorted by leaf for every
+  tree, so a lookup is one `apply` pass plus index arithmetic, no per-tree Python loop.
+
+The spread of the distribution gives the salary range and the confidence score.
+"""
+import numpy as np
+from typing import Dict, Sequence
+
+SALARY_QUANTILES = (0.1, 0.5, 0.9)
+
+def quantile_names(quantiles: Sequence[float] = SALARY_QUANTILES):
+    return [f"p{int(round(q * 100))}" for q in quantiles]
+
+def pinball_loss(quantiles: Sequence[float] = SALARY_QUANTILES):
+    """Keras loss for a model with one output column per quantile."""
+    import tensorflow as tf
+    q = tf.constant(list(quantiles), dtype=tf.float32)
+
+    def loss(y_true, y_pred):
+        error = tf.reshape(tf.cast(y_true, tf.float32), (-1, 1)) - y_pred
+        return tf.reduce_mean(tf.maximum(q * error, (q - 1) * error), axis=-1)
+
+    return loss
+
+def interval_confidence(low: float, median: float, high: float) -> float:
+    """
+    1 minus the relative half-width of the p10-p90 interval, clipped to [0, 1]:
+    a +/-10% interval scores 0.9, one as wide as the median itself scores 0.
+    """
+    if median <= 0:
+        return 0.0
+    return round(float(np.clip(1 - (high - low) / (2 * median), 0.0, 1.0)), 3)
+
+def summarize(values: Sequence[float], quantiles: Sequence[float] = SALARY_QUANTILES) -> Dict[str, float]:
+    """Sorted quantile values keyed by name ("p10", ...); sorting repairs crossed network outputs."""
+    return dict(zip(quantile_names(quantiles), (float(v) for v in np.sort(np.asarray(values, dtype=np.float64)))))
+
+class QuantileForest:
+    """Wraps a fitted RandomForestRegressor; `fit_leaves` must see the forest's training data."""
+
+    def __init__(self, forest, quantiles: Sequence[float] = SALARY_QUANTILES):
+        self.forest = forest
+        self.quantiles = tuple(quantiles)
+
+    def fit_leaves(self, X, y) -> "QuantileForest":
+        leaves = self.forest.apply(X)
+        n_samples, n_trees = leaves.shape
+        max_nodes = max(tree.tree_.node_count for tree in self.forest.estimators_)
+        self.y = np.asarray(y, dtype=np.float32)
+        self.n_samples = n_samples
+        # Per tree: training rows ordered by leaf, and where each node's rows start
+        self.sample_order = np.empty((n_trees, n_samples), dtype=np.int32)
+        self.node_offsets = np.zeros((n_trees, max_nodes + 1), dtype=np.int32)
+        for t in range(n_trees):
+            order = np.argsort(leaves[:, t], kind="stable")
+            self.sample_order[t] = order
+            counts = np.bincount(leaves[:, t], minlength=max_nodes)
+            np.cumsum(counts, out=self.node_offsets[t, 1:])
+        return self
+
+    def predict_quantiles(self, X) -> np.ndarray:
+        leaves = self.forest.apply(X)
+        n_trees = leaves.shape[1]
+        trees = np.arange(n_trees)
+        out = np.empty((leaves.shape[0], len(self.quantiles)), dtype=np.float64)
+        flat_order = self.sample_order.ravel()
+        for row, leaf in enumerate(leaves):
+            starts = self.node_offsets[trees, leaf]
+            sizes = self.node_offsets[trees, leaf + 1] - starts
+            # Concatenated index ranges [start, start + size) of every tree, in one shot
+            total = int(sizes.sum())
+            within = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            positions = np.repeat(trees * self.n_samples + starts, sizes) + within
+            values = self.y[flat_order[positions]]
+            weights = np.repeat(1.0 / np.maximum(sizes, 1), sizes)
+            order = np.argsort(values, kind="stable")
+            cumulative = np.cumsum(weights[order])
+            cumulative /= cumulative[-1]
+            picks = np.minimum(np.searchsorted(cumulative, self.quantiles), total - 1)
+            out[row] = values[order][picks]
+        return out
+
+    def predict(self, X) -> np.ndarray:
+        return self.forest.predict(X)
@@ -0,0 +1,182 @@
+import time
+import asyncio
+import logging
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Absolute monotonic time by which the current request must be answered
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+@contextmanager
+def deadline_scope(seconds: float, replace: bool = False):
+    """
+    Run the enclosed block under a deadline. Nested scopes can only shorten it,
+    unless `replace` is set (for background work that outlives its request).
+    """
+    expires_at = time.monotonic() + seconds
+    current = None if replace else _deadline.get()
+    token = _deadline.set(min(expires_at, current) if current else expires_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def remaining_budget(default: float) -> float:
+    """Seconds left for an upstream call: the default, capped by the request deadline."""
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return default
+    return max(0.0, min(default, expires_at - time.monotonic()))
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker.
+
+    After `failure_threshold` consecutive failures calls are refused for
+    `recovery_timeout` seconds; then up to `half_open_probes` trial calls are let
+    through, and the first success closes the breaker again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float, half_open_probes: int = 1):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self.half_open_probes = max(1, half_open_probes)
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.short_circuited = 0
+        self.successes = 0
+        self.failures = 0
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self.state = self.HALF_OPEN
+            self.probes_in_flight = 0
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and self.probes_in_flight < self.half_open_probes:
+            self.probes_in_flight += 1
+            return True
+        self.short_circuited += 1
+        return False
+
+    def release_probe(self):
+        """Give back a half-open probe slot whose call was abandoned without an outcome."""
+        if self.state == self.HALF_OPEN and self.probes_in_flight > 0:
+            self.probes_in_flight -= 1
+
+    def record_success(self):
+        self.successes += 1
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed after successful probe")
+        self.state = self.CLOSED
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit '{self.name}' opened after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited
+        }
+
+llm_breaker = CircuitBreaker(
+    "openai",
+    failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=settings.LLM_BREAKER_RECOVERY_SECONDS,
+    half_open_probes=settings.LLM_BREAKER_HALF_OPEN_PROBES
+)
+
+async def call_with_fallback(
+    call: Callable[[], Awaitable[Any]],
+    fallback: Callable[[], Any],
+    label: str,
+    breaker: CircuitBreaker = llm_breaker,
+    timeout: Optional[float] = None,
+    hedge_delay: Optional[float] = None
+) -> Any:
+    """
+    Run an upstream call within the request's deadline budget, answering with the
+    local fallback when the breaker is open, the call fails or the budget runs out.
+
+    With a hedge delay, the fallback is returned as soon as the delay passes; the
+    upstream call keeps running in the background only to update the breaker.
+    """
+    timeout = remaining_budget(settings.LLM_TIMEOUT_SECONDS if timeout is None else timeout)
+    hedge_delay = settings.LLM_HEDGE_DELAY_SECONDS if hedge_delay is None else hedge_delay
+    if timeout <= 0 or not breaker.allow():
+        return fallback()
+
+    async def guarded():
+        try:
+            result = await asyncio.wait_for(call(), timeout)
+        except asyncio.CancelledError:
+            breaker.release_probe()
+            raise
+        except Exception as e:
+            reason = "timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+            logger.error(f"Error {label}: {reason}")
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
+
+    task = asyncio.ensure_future(guarded())
+    try:
+        if hedge_delay and hedge_delay < timeout:
+            done, _ = await asyncio.wait({task}, timeout=hedge_delay)
+            if not done:
+                logger.info(f"Hedging {label}: upstream slower than {hedge_delay}s, serving fallback")
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                return fallback()
+        return await task
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    except Exception:
+        return fallback()
+
+class DeadlineMiddleware:
+    """
+    Starts each request's deadline budget. Clients may shorten it with the
+    `X-Request-Timeout-Ms` header; it never exceeds REQUEST_DEADLINE_SECONDS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        seconds = settings.REQUEST_DEADLINE_SECONDS
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-timeout-ms":
+                try:
+                    seconds = min(seconds, max(0.0, int(value) / 1000))
+                except ValueError:
+                    pass
+                break
+        with deadline_scope(seconds):
+            await self.app(scope, receive, send)
@@ -0,0 +1,183 @@
+"""
+Semantic answer cache: reuse an LLM answer for a question that is phrased differently
+but means the same ("how do I withdraw money" / "how to withdraw my earnings").
+
+Questions are reduced to their content words: stop words are dropped, plurals
+folded and a few synonyms mapped to one word ("earnings" -> "money"). Similarity
+alone cannot tell "delete my account" from "create my account", so it only
+shortlists: the candidates are embedded with feature hashing over the content words
+and their character trigrams, scored with one matrix-vector product over a
+fixed-size array, and those above the threshold in the same namespace (locale/page)
+are checked in order. A candidate is served only if every content word on either
+side has a counterpart on the other, equal or one typo away.
+
+Entries expire after a TTL and the least recently used one is evicted when the
+cache is full; the least recently used namespace is dropped, with its entries, when
+there are too many.
+"""
+import time
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.utils.skills import edit_distance
+from app.utils.tokenizer import tokenize
+
+# Function words carry no meaning for matching and would make unrelated questions look alike
+STOP_WORDS = {
+    "a", "an", "and", "are", "be", "can", "could", "do", "does", "for", "from", "how", "i",
+    "in", "is", "it", "me", "my", "of", "on", "or", "please", "should", "the", "to",
+    "what", "when", "where", "will", "with", "would", "you", "your"
+}
+
+# Words asked about interchangeably on the platform, mapped to one of them
+SYNONYMS = {
+    "earning": "money", "fund": "money", "payout": "money", "cash": "money",
+    "remove": "delete", "erase": "delete",
+    "cv": "resume",
+    "cost": "price", "pricing": "price",
+    "position": "job", "vacancy": "job", "opening": "job"
+}
+
+# Candidates verified per lookup, best scores first
+SHORTLIST_SIZE = 5
+
+def content_words(text: str) -> Tuple[str, ...]:
+    """Sorted distinct content words of a question, plurals folded and synonyms mapped."""
+    tokens = tokenize(text)
+    words = set()
+    for token in [t for t in tokens if t not in STOP_WORDS] or tokens:
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        words.add(SYNONYMS.get(token, token))
+    return tuple(sorted(words))
+
+def _words_match(a: str, b: str) -> bool:
+    # One typo is tolerated in longer words that agree on the first character
+    return a == b or (max(len(a), len(b)) >= 5 and a[0] == b[0] and edit_distance(a, b, 1) <= 1)
+
+def same_question(a: Sequence[str], b: Sequence[str]) -> bool:
+    """Every content word on either side matches one on the other."""
+    return all(any(_words_match(x, y) for y in b) for x in a) and all(any(_words_match(y, x) for x in a) for y in b)
+
+def embed_question(text: str, dim: int) -> np.ndarray:
+    return embed_words(content_words(text), dim)
+
+def embed_words(words: Sequence[str], dim: int) -> np.ndarray:
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in words:
+        padded = f"#{token}#"
+        features = [(f"w:{token}", 1.0)] + [(f"c:{padded[i:i + 3]}", 0.5) for i in range(len(padded) - 2)]
+        for feature, weight in features:
+            h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            # Signed hashing keeps collisions from only ever adding similarity
+            vector[h % dim] += weight if h >> 63 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class SemanticCache:
+    def __init__(self, name: str, max_entries: int, ttl: float, threshold: float, dim: int = 512, max_namespaces: int = 64):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.max_namespaces = max(1, max_namespaces)
+        self.ttl = ttl
+        self.threshold = threshold
+        self.dim = dim
+        self._vectors = np.zeros((self.max_entries, dim), dtype=np.float32)
+        self._namespaces = np.full(self.max_entries, -1, dtype=np.int32)
+        self._expires = np.zeros(self.max_entries, dtype=np.float64)
+        self._last_used = np.zeros(self.max_entries, dtype=np.float64)
+        self._answers: List[Optional[str]] = [None] * self.max_entries
+        self._words: List[Tuple[str, ...]] = [()] * self.max_entries
+        # Namespaces come from client-supplied context, so only the most recent are kept
+        self._namespace_ids: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def _match(self, namespace_id: int, words: Tuple[str, ...], vector: np.ndarray, now: float) -> Optional[int]:
+        scores = self._vectors @ vector
+        scores[(self._namespaces != namespace_id) | (self._expires <= now)] = -1.0
+        shortlist = np.argpartition(-scores, min(SHORTLIST_SIZE, scores.size) - 1)[:SHORTLIST_SIZE]
+        for slot in shortlist[np.argsort(-scores[shortlist])]:
+            if scores[slot] < self.threshold:
+                break
+            if same_question(words, self._words[slot]):
+                return int(slot)
+        return None
+
+    def _namespace_id(self, namespace: str) -> int:
+        namespace_id = self._namespace_ids.get(namespace)
+        if namespace_id is not None:
+            self._namespace_ids.move_to_end(namespace)
+            return namespace_id
+        if len(self._namespace_ids) < self.max_namespaces:
+            namespace_id = len(self._namespace_ids)
+        else:
+            # Drop the least recently used namespace and its entries, and reuse its id
+            _, namespace_id = self._namespace_ids.popitem(last=False)
+            dropped = self._namespaces == namespace_id
+            self._namespaces[dropped] = -1
+            self._expires[dropped] = 0.0
+        self._namespace_ids[namespace] = namespace_id
+        return namespace_id
+
+    def lookup(self, namespace: str, question: str) -> Optional[str]:
+        words = content_words(question)
+        vector = embed_words(words, self.dim)
+        now = time.time()
+        with self._lock:
+            namespace_id = self._namespace_ids.get(namespace)
+            if namespace_id is not None and vector.any():
+                self._namespace_ids.move_to_end(namespace)
+                slot = self._match(namespace_id, words, vector, now)
+                if slot is not None:
+                    self._last_used[slot] = now
+                    self.hits += 1
+                    return self._answers[slot]
+            self.misses += 1
+            return None
+
+    def store(self, namespace: str, question: str, answer: str):
+        words = content_words(question)
+        vector = embed_words(words, self.dim)
+        if not vector.any() or not answer:
+            return
+        now = time.time()
+        with self._lock:
+            namespace_id = self._namespace_id(namespace)
+            slot = self._match(namespace_id, words, vector, now)
+            if slot is None:
+                # Reuse an empty or expired slot, else evict the least recently used entry
+                free = np.flatnonzero(self._expires <= now)
+                if free.size:
+                    slot = int(free[0])
+                else:
+                    slot = int(np.argmin(self._last_used))
+                    self.evictions += 1
+            self._vectors[slot] = vector
+            self._namespaces[slot] = namespace_id
+            self._expires[slot] = now + self.ttl
+            self._last_used[slot] = now
+            self._answers[slot] = answer
+            self._words[slot] = words
+            self.stores += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "entries": int(np.count_nonzero(self._expires > time.time())),
+            "max_entries": self.max_entries,
+            "namespaces": len(self._namespace_ids),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "memory_bytes": int(self._vectors.nbytes)
+        }
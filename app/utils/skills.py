@@ -0,0 +1,170 @@
+"""
+Typo-tolerant canonicalization of free-text skills ("reactjs", "React.js", "recat" -> "React").
+
+Skills are first reduced to a key (lowercased, without spaces, dots, dashes,
+underscores or slashes) and looked up among the canonical names and aliases of the
+vocabulary file. Misspellings are resolved with a symmetric-delete (SymSpell) index:
+every key is stored under all strings obtained by deleting up to N characters from
+its prefix, and a query generates its own deletes and only verifies the keys sharing
+one of them. Lookup cost depends on the length of the query, not the vocabulary size.
+
+Skill names are short and many sit a couple of edits apart ("Java"/"Lava",
+"Figma"/"Sigma"), so corrections are conservative: one edit below 8 characters,
+the first character must match, and a misspelling close to two different skills
+is left as typed. Real words that sit near a skill without being a misspelling of it
+("copyediting" is two edits from the "copywriting" alias) are listed on "!" lines of
+the vocabulary file and never corrected.
+"""
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.utils.config import settings
+from app.utils.tokenizer import normalize
+
+# Only the first characters are indexed; the full key is verified on candidates
+PREFIX_LENGTH = 7
+
+_KEY_STRIP_RE = re.compile(r"[\s._\-/]+")
+_SPLIT_RE = re.compile(r"\s*[,;]\s*")
+
+def skill_key(text: str) -> str:
+    return _KEY_STRIP_RE.sub("", normalize(text).strip())
+
+def allowed_distance(key: str, max_distance: int) -> int:
+    # Short names are too close to each other ("go"/"c"/"r") to correct safely
+    if len(key) <= 3:
+        return 0
+    if len(key) < 8:
+        return min(1, max_distance)
+    return max_distance
+
+def _deletes(key: str, distance: int) -> Set[str]:
+    results = {key}
+    frontier = {key}
+    for _ in range(distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))} - results
+        results |= frontier
+    return results
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent transpositions count once); limit + 1 if above limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+class SkillIndex:
+    def __init__(self, entries: Iterable[Tuple[str, List[str]]], max_distance: int = 2, keep: Iterable[str] = ()):
+        self.max_distance = max_distance
+        # Words that are left as typed rather than corrected
+        self.keep = {skill_key(word) for word in keep}
+        self.canonical: Dict[str, str] = {}
+        for name, aliases in entries:
+            for variant in [name] + aliases:
+                key = skill_key(variant)
+                # The first entry wins, so a canonical name is never shadowed by a later alias
+                if key and key not in self.canonical:
+                    self.canonical[key] = name
+        self.deletes: Dict[str, List[str]] = {}
+        for key in self.canonical:
+            for deleted in _deletes(key[:PREFIX_LENGTH], allowed_distance(key, max_distance)):
+                self.deletes.setdefault(deleted, []).append(key)
+
+    @classmethod
+    def load(cls, path: str, max_distance: int = 2) -> "SkillIndex":
+        entries = []
+        keep = []
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    if line.startswith("!"):
+                        keep.extend(w for w in _SPLIT_RE.split(line[1:].strip()) if w)
+                        continue
+                    name, _, aliases = line.partition("|")
+                    entries.append((name.strip(), [a for a in _SPLIT_RE.split(aliases.strip()) if a]))
+        return cls(entries, max_distance, keep)
+
+    def lookup(self, skill: str) -> Optional[Tuple[str, int]]:
+        """(canonical name, edit distance) for a skill, or None if nothing or more than one skill is close enough."""
+        key = skill_key(skill)
+        if not key:
+            return None
+        if key in self.canonical:
+            return self.canonical[key], 0
+        if key in self.keep:
+            return None
+        limit = allowed_distance(key, self.max_distance)
+        if limit == 0:
+            return None
+        best: Dict[str, int] = {}
+        seen = set()
+        for deleted in _deletes(key[:PREFIX_LENGTH], limit):
+            for candidate in self.deletes.get(deleted, ()):
+                if candidate in seen or candidate[0] != key[0]:
+                    continue
+                seen.add(candidate)
+                bound = min(limit, allowed_distance(candidate, self.max_distance))
+                distance = edit_distance(key, candidate, bound)
+                if distance <= bound:
+                    name = self.canonical[candidate]
+                    best[name] = min(distance, best.get(name, distance))
+        # Aliases of one skill agree; two different skills make the correction a guess
+        if len(best) != 1:
+            return None
+        return next(iter(best.items()))
+
+    def resolve(self, skills: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        Canonical skills in input order without duplicates, plus the inputs that did not
+        match the vocabulary (kept as given, so nothing the user typed is dropped).
+        Items holding a comma-separated list are split first.
+        """
+        resolved: List[str] = []
+        unmatched: List[str] = []
+        seen = set()
+        for item in skills:
+            for raw in _SPLIT_RE.split(item or ""):
+                raw = " ".join(raw.split())
+                if not raw:
+                    continue
+                match = self.lookup(raw)
+                if match is None:
+                    unmatched.append(raw)
+                name = match[0] if match else raw
+                if name.lower() not in seen:
+                    seen.add(name.lower())
+                    resolved.append(name)
+        return resolved, unmatched
+
+@lru_cache(maxsize=4)
+def _compiled_index(path: str, mtime: float, max_distance: int) -> SkillIndex:
+    return SkillIndex.load(path, max_distance)
+
+def load_skill_index(path: str = None) -> SkillIndex:
+    """Index for the skill vocabulary; rebuilt only when the file changes."""
+    path = path or settings.SKILL_VOCABULARY_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = 0.0
+    return _compiled_index(path, mtime, settings.SKILL_MAX_EDIT_DISTANCE)
+
+def canonicalize_skills(skills: Optional[Iterable[str]]) -> List[str]:
+    if not skills:
+        return []
+    return load_skill_index().resolve(skills)[0]
@@ -0,0 +1,65 @@
+"""
+Sparse feature matrices for the salary network.
+
+The salary preprocessor (TF-IDF skills + one-hot categoricals) produces CSR matrices
+where only a handful of columns per row are non-zero. These helpers keep them sparse
+up to the model: the CSR matrix becomes one tf.SparseTensor, tf.data slices and
+batches it in native code, and the first Dense layer multiplies each sparse batch
+without densifying. Memory follows the number of non-zeros rather than
+rows x vocabulary.
+
+TensorFlow is imported lazily so serving processes without the DL model never load it.
+"""
+import numpy as np
+import scipy.sparse as sp
+from typing import Optional
+
+def as_csr(X) -> sp.csr_matrix:
+    """float32 CSR with sorted indices, as tf.SparseTensor expects."""
+    X = sp.csr_matrix(X, dtype=np.float32)
+    X.sort_indices()
+    return X
+
+def matrix_nbytes(X) -> int:
+    if sp.issparse(X):
+        X = sp.csr_matrix(X)
+        return int(X.data.nbytes + X.indices.nbytes + X.indptr.nbytes)
+    return int(np.asarray(X).nbytes)
+
+def to_sparse_tensor(X):
+    import tensorflow as tf
+    coo = as_csr(X).tocoo()
+    indices = np.column_stack([coo.row, coo.col]).astype(np.int64)
+    return tf.SparseTensor(indices, coo.data, dense_shape=coo.shape)
+
+def sparse_batches(X, y, batch_size: int = 32, shuffle: bool = False, seed: Optional[int] = None):
+    """
+    tf.data.Dataset of (SparseTensor, y) batches of a CSR matrix. With `shuffle`,
+    rows are reshuffled on every pass (i.e. every epoch).
+    """
+    import tensorflow as tf
+    dataset = tf.data.Dataset.from_tensor_slices((to_sparse_tensor(X), np.asarray(y, dtype=np.float32)))
+    if shuffle:
+        dataset = dataset.shuffle(X.shape[0], seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+def accepts_sparse(model) -> bool:
+    """Whether a Keras model was built with a sparse Input (models trained before were dense)."""
+    import tensorflow as tf
+    inputs = getattr(model, "inputs", None) or []
+    return bool(inputs) and isinstance(getattr(inputs[0], "type_spec", None), tf.SparseTensorSpec)
+
+def predict_sparse(model, X) -> np.ndarray:
+    """Predictions for a CSR batch; a direct call skips Model.predict's per-call overhead."""
+    if accepts_sparse(model):
+        return np.asarray(model(to_sparse_tensor(X), training=False))
+    return np.asarray(model(np.asarray(as_csr(X).todense()), training=False))
+
+if __name__ == "__main__":
+    # Dense vs sparse salary pipeline: python -m app.utils.sparse_features
+    import json
+    import logging
+    from app.services.training_service import benchmark_salary_pipeline
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(benchmark_salary_pipeline(), indent=2))
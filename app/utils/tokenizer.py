@@ -0,0 +1,122 @@
+"""
+Tokenization shared by matching, intent rules and skill extraction.
+
+Khmer is written without spaces between words, so Khmer runs are first split into
+orthographic syllables (a base character plus its subscripts and signs) and then
+segmented by longest match against a dictionary trie. Stretches the dictionary does
+not cover fall back to overlapping syllable bigrams, which still give partial overlap
+between related texts. Latin text is lowercased and split on word characters.
+"""
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+from app.utils.config import settings
+
+_END = ""  # marks the end of a word in the trie
+
+# Khmer letters, signs and digits; punctuation (U+17D4-U+17DA) is a separator
+_KHMER_RUN = "\u1780-\u17d3\u17dc\u17dd\u17e0-\u17e9\u19e0-\u19ff"
+_RUN_RE = re.compile(f"([{_KHMER_RUN}]+)|([^\\W{_KHMER_RUN}]+)")
+# Orthographic syllable: base + (coeng + consonant | dependent vowel / sign)*
+_SYLLABLE_RE = re.compile("[\u1780-\u17b3](?:\u17d2[\u1780-\u17b3]|[\u17b4-\u17d1\u17d3\u17dd])*|.", re.S)
+# Invisible characters Khmer writers use as word-break hints
+_ZERO_WIDTH_RE = re.compile("[\u200b\u200c\u200d\u2060\ufeff]")
+
+def normalize(text: str) -> str:
+    """NFC-normalize, lowercase Latin and turn zero-width break hints into spaces."""
+    text = unicodedata.normalize("NFC", text or "")
+    return _ZERO_WIDTH_RE.sub(" ", text).lower()
+
+@lru_cache(maxsize=8)
+def _compiled_trie(path: str, mtime: float) -> Dict:
+    trie: Dict = {}
+    if not os.path.exists(path):
+        return trie
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            word = unicodedata.normalize("NFC", line.strip())
+            if not word or word.startswith("#"):
+                continue
+            node = trie
+            for ch in word:
+                node = node.setdefault(ch, {})
+            node[_END] = True
+    return trie
+
+def load_dictionary(path: str = None) -> Dict:
+    """Compiled trie for a word list; recompiled only when the file changes."""
+    path = path or settings.KHMER_DICTIONARY_PATH
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = 0.0
+    return _compiled_trie(path, mtime)
+
+def _flush_unknown(syllables: List[str], tokens: List[str]):
+    if len(syllables) == 1:
+        tokens.append(syllables[0])
+    else:
+        tokens.extend(syllables[i] + syllables[i + 1] for i in range(len(syllables) - 1))
+    syllables.clear()
+
+def segment_khmer(run: str, trie: Dict = None) -> List[str]:
+    trie = trie if trie is not None else load_dictionary()
+    syllables = _SYLLABLE_RE.findall(run)
+    tokens: List[str] = []
+    unknown: List[str] = []
+    i, n = 0, len(syllables)
+    while i < n:
+        # Longest dictionary word starting here, only ending on syllable boundaries
+        node, j, best = trie, i, -1
+        while j < n and node is not None:
+            for ch in syllables[j]:
+                node = node.get(ch)
+                if node is None:
+                    break
+            if node is None:
+                break
+            j += 1
+            if _END in node:
+                best = j
+        if best > 0:
+            if unknown:
+                _flush_unknown(unknown, tokens)
+            tokens.append("".join(syllables[i:best]))
+            i = best
+        else:
+            unknown.append(syllables[i])
+            i += 1
+    if unknown:
+        _flush_unknown(unknown, tokens)
+    return tokens
+
+def tokenize(text: str) -> List[str]:
+    """Word tokens for mixed Khmer/Latin text."""
+    trie = load_dictionary()
+    tokens: List[str] = []
+    for khmer, other in _RUN_RE.findall(normalize(text)):
+        if khmer:
+            tokens.extend(segment_khmer(khmer, trie))
+        else:
+            tokens.append(other)
+    return tokens
+
+@lru_cache(maxsize=4096)
+def tokenize_phrase(phrase: str) -> Tuple[str, ...]:
+    """Cached tokenization for short, frequently reused strings such as keywords."""
+    return tuple(tokenize(phrase))
+
+def contains_phrase(tokens: Sequence[str], phrase: Tuple[str, ...], prefix: bool = False) -> bool:
+    """
+    True if `phrase` occurs as a contiguous token run. With `prefix`, a single-token
+    phrase also matches longer tokens it starts ("job" matches "jobs").
+    """
+    size = len(phrase)
+    if not size:
+        return False
+    if size == 1:
+        target = phrase[0]
+        return any(t == target or (prefix and t.startswith(target)) for t in tokens)
+    return any(tuple(tokens[i:i + size]) == phrase for i in range(len(tokens) - size + 1))
@@ -0,0 +1,28 @@
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap LLM token estimate without a tokenizer dependency.
+
+    BPE vocabularies average about 4 characters per token for English, while Khmer
+    and other non-Latin scripts come out close to one token per character.
+    """
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    ascii_chars = len(text) - non_ascii
+    return ascii_chars // 4 + non_ascii + 1
+
+def truncate_to_tokens(text: str, budget: int, keep: str = "head") -> str:
+    """Cut text to roughly `budget` tokens, keeping its start ("head") or end ("tail")."""
+    if budget <= 0:
+        return ""
+    if estimate_tokens(text) <= budget:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        part = text[:mid] if keep == "head" else text[-mid:]
+        if estimate_tokens(part) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo] if keep == "head" else text[len(text) - lo:]
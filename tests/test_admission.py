@@ -0,0 +1,90 @@
+import asyncio
+from app.utils.config import settings
+from app.utils.admission import AdmissionController, AdmissionMiddleware, PriorityClass, classify
+
+def make_controller(queue: int = 0, timeout: float = 0.05) -> AdmissionController:
+    return AdmissionController(
+        [
+            PriorityClass("cheap", 0, 4, 4),
+            PriorityClass("expensive", 1, 1, queue),
+            PriorityClass("streaming", 2, 1, 0, shares_budget=False),
+        ],
+        max_concurrency=2,
+        queue_timeout=timeout
+    )
+
+async def call(middleware, path: str):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware({"type": "http", "path": path, "method": "GET", "headers": []}, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"])
+
+def blocking_app(release: asyncio.Event):
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+def test_streams_and_polls_are_not_expensive():
+    assert classify("/api/ai/generation/bulk/abc/stream") == "streaming"
+    assert classify("/api/ai/resume/bulk") == "streaming"
+    assert classify("/api/ai/generation/bulk/abc") == "cheap"
+    assert classify("/api/v1/training/model-status/salary") == "cheap"
+    assert classify("/api/ai/generation/proposal") == "expensive"
+    assert classify("/health") is None
+
+def test_full_class_is_shed_with_retry_after():
+    async def scenario():
+        release = asyncio.Event()
+        middleware = AdmissionMiddleware(blocking_app(release), make_controller())
+        running = asyncio.create_task(call(middleware, "/api/ai/generation/proposal"))
+        await asyncio.sleep(0.01)
+        shed = await call(middleware, "/api/ai/generation/proposal")
+        release.set()
+        return shed, await running
+
+    (status, headers), (ok_status, _) = asyncio.run(scenario())
+    assert status == 503
+    assert headers[b"retry-after"] == str(settings.ADMISSION_RETRY_AFTER_SECONDS).encode()
+    assert ok_status == 200
+
+def test_queued_request_times_out():
+    async def scenario():
+        release = asyncio.Event()
+        middleware = AdmissionMiddleware(blocking_app(release), make_controller(queue=1))
+        running = asyncio.create_task(call(middleware, "/api/ai/generation/proposal"))
+        await asyncio.sleep(0.01)
+        timed_out = await call(middleware, "/api/ai/generation/proposal")
+        release.set()
+        await running
+        return timed_out, middleware.controller.classes["expensive"].timed_out
+
+    (status, _), timed_out = asyncio.run(scenario())
+    assert status == 503
+    assert timed_out == 1
+
+def test_open_streams_do_not_starve_generation():
+    async def scenario():
+        release = asyncio.Event()
+        middleware = AdmissionMiddleware(blocking_app(release), make_controller())
+        stream = asyncio.create_task(call(middleware, "/api/ai/generation/bulk/job/stream"))
+        await asyncio.sleep(0.01)
+        # A second stream is over the streaming cap; generation still gets its slot
+        second_stream = await call(middleware, "/api/ai/generation/bulk/job/stream")
+        generation = asyncio.create_task(call(middleware, "/api/ai/generation/proposal"))
+        await asyncio.sleep(0.01)
+        in_flight = middleware.controller.in_flight
+        release.set()
+        return second_stream, in_flight, await generation, await stream
+
+    (second_status, _), in_flight, (generation_status, _), (stream_status, _) = asyncio.run(scenario())
+    assert second_status == 503
+    assert in_flight == 1
+    assert generation_status == 200 and stream_status == 200
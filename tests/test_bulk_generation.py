@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from app.utils.config import settings
+from app.services import bulk_generation_service as bulk
+from app.services.bulk_generation_service import BulkGenerationService, InMemoryJobStore, RedisJobStore
+
+ITEMS = [
+    {"kind": bulk.PROPOSAL, "payload": {"job_title": "Backend Developer", "job_description": "APIs", "user_skills": ["Python"]}},
+    {"kind": bulk.INTERVIEW_QUESTIONS, "payload": {"job_title": "Designer", "job_description": "UI", "candidate_skills": ["Figma"]}},
+]
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    # Without an API key every item answers with the local fallback content
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", None)
+    monkeypatch.setattr(settings, "GENERATION_BULK_CELERY_THRESHOLD", 0)
+
+async def run_job(service: BulkGenerationService, watcher: BulkGenerationService):
+    submitted = await service.submit(ITEMS)
+    lines = [line async for line in watcher.stream_job(submitted["job_id"], poll_interval=0.01)]
+    return submitted, lines, await watcher.get_job(submitted["job_id"], offset=1)
+
+def check_job(submitted, lines, polled):
+    assert submitted["status"] == "running" and submitted["total"] == 2
+    results, summary = lines[:-1], lines[-1]
+    assert sorted(r["index"] for r in results) == [0, 1]
+    assert all(r["status"] == "fallback" for r in results)
+    assert summary["type"] == "summary" and summary["status"] == "completed"
+    assert (summary["completed"], summary["failed"], summary["fallback"]) == (0, 0, 2)
+    assert len(polled["results"]) == 1
+
+def test_local_job_streams_results_and_summary():
+    async def scenario():
+        service = BulkGenerationService(InMemoryJobStore(ttl=60))
+        return await run_job(service, service)
+
+    check_job(*asyncio.run(scenario()))
+
+def test_unknown_job_is_not_found():
+    async def scenario():
+        service = BulkGenerationService(InMemoryJobStore(ttl=60))
+        return await service.get_job("missing"), [line async for line in service.stream_job("missing")]
+
+    assert asyncio.run(scenario()) == (None, [])
+
+def test_shared_store_serves_jobs_started_by_another_worker():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def scenario():
+        server = fakeredis.FakeServer()
+        stores = []
+        for _ in range(2):
+            store = RedisJobStore("redis://localhost", ttl=60)
+            store.client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+            stores.append(store)
+        owner, other = BulkGenerationService(stores[0]), BulkGenerationService(stores[1])
+        missing = await other.get_job("missing")
+        return missing, await run_job(owner, other)
+
+    missing, job = asyncio.run(scenario())
+    assert missing is None
+    check_job(*job)
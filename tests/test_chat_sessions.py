@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from app.services.chat_session_service import ChatSessionService, InMemorySessionStore, RedisSessionStore
+
+def memory_store():
+    return InMemorySessionStore(max_sessions=100, idle_seconds=600)
+
+def redis_store():
+    fakeredis = pytest.importorskip("fakeredis")
+    store = RedisSessionStore("redis://localhost", idle_seconds=600)
+    store.client = fakeredis.FakeAsyncRedis()
+    return store
+
+def test_unknown_session_id_gets_a_fresh_id():
+    async def scenario():
+        sessions = ChatSessionService(memory_store())
+        session = await sessions.get_or_create("chosen-by-client")
+        await sessions.record_exchange(session, "hi", "hello")
+        again = await sessions.get_or_create(session.session_id)
+        return session, again
+
+    session, again = asyncio.run(scenario())
+    assert session.session_id != "chosen-by-client"
+    assert again.session_id == session.session_id
+    assert [t["content"] for t in again.turns] == ["hi", "hello"]
+
+@pytest.mark.parametrize("make_store", [memory_store, redis_store])
+def test_concurrent_exchanges_are_all_kept(make_store):
+    async def scenario():
+        sessions = ChatSessionService(make_store())
+        first = await sessions.get_or_create(None)
+        await sessions.record_exchange(first, "start", "ok")
+        # Two requests load the same session, then both record their exchange
+        a, b = await asyncio.gather(*(sessions.get_or_create(first.session_id) for _ in range(2)))
+        await asyncio.gather(sessions.record_exchange(a, "question a", "answer a"), sessions.record_exchange(b, "question b", "answer b"))
+        return a, await sessions.get_or_create(first.session_id)
+
+    a, stored = asyncio.run(scenario())
+    contents = [t["content"] for t in stored.turns]
+    assert contents[:2] == ["start", "ok"]
+    assert sorted(contents[2:]) == ["answer a", "answer b", "question a", "question b"]
+    # The in-memory session object is refreshed from the stored one
+    assert len(a.turns) >= 4
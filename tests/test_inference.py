@@ -0,0 +1,36 @@
+import asyncio
+import threading
+from app.utils.inference import InferenceExecutor
+
+def blocking(started: threading.Event, release: threading.Event) -> str:
+    started.set()
+    release.wait(5)
+    return "done"
+
+def test_cancelled_caller_keeps_slot_until_thread_finishes():
+    async def scenario():
+        executor = InferenceExecutor(thread_workers=2)
+        executor.register("model", max_concurrency=1)
+        workload = executor.workloads["model"]
+        started, release = threading.Event(), threading.Event()
+
+        abandoned = asyncio.ensure_future(executor.run("model", blocking, started, release))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        abandoned.cancel()
+        await asyncio.gather(abandoned, return_exceptions=True)
+        # The thread is still busy, so the next call waits for the slot
+        after_cancel = (workload.running, workload.semaphore.locked())
+        waiting = asyncio.ensure_future(executor.run("model", str.upper, "next"))
+        await asyncio.sleep(0.05)
+        blocked = not waiting.done()
+
+        release.set()
+        result = await asyncio.wait_for(waiting, 5)
+        executor.shutdown()
+        return after_cancel, blocked, result, workload.stats()
+
+    after_cancel, blocked, result, stats = asyncio.run(scenario())
+    assert after_cancel == (1, True)
+    assert blocked
+    assert result == "NEXT"
+    assert (stats["running"], stats["cancelled"], stats["completed"]) == (0, 1, 1)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from sklearn.pipeline import Pipeline
+from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import TfidfVectorizer
+from app.utils.intent_model import CompactIntentModel, export_compact
+
+TRAIN = [
+    ("how do I find remote jobs", "jobs"),
+    ("show me python developer jobs", "jobs"),
+    ("any new jobs for designers", "jobs"),
+    ("search for data science positions", "jobs"),
+    ("how much does the premium plan cost", "pricing"),
+    ("what is the price of a subscription", "pricing"),
+    ("are there any fees for freelancers", "pricing"),
+    ("how do I upgrade my plan", "pricing"),
+    ("how can I edit my profile", "profile"),
+    ("change my profile picture", "profile"),
+    ("update the skills on my profile", "profile"),
+    ("where do I add my portfolio", "profile"),
+]
+
+QUERIES = [
+    "find me remote python jobs",
+    "how much is the premium subscription",
+    "edit the skills in my profile",
+    "jobs for designers with a portfolio",
+    "upgrade plan price",
+    "something completely unrelated",
+    "",
+]
+
+@pytest.fixture(scope="module")
+def pipeline():
+    texts, labels = zip(*TRAIN)
+    return Pipeline([
+        ("tfidf", TfidfVectorizer(ngram_range=(1, 2))),
+        ("clf", LogisticRegression(max_iter=1000))
+    ]).fit(texts, labels)
+
+def test_exported_model_matches_pipeline(pipeline, tmp_path):
+    path = str(tmp_path / "intent_model.npz")
+    report = export_compact(pipeline, path, [text for text, _ in TRAIN] + QUERIES)
+    assert report["agreement"] == 1.0
+
+    model = CompactIntentModel.load(path)
+    assert list(model.predict(QUERIES)) == list(pipeline.predict(QUERIES))
+    np.testing.assert_allclose(model.predict_proba(QUERIES), pipeline.predict_proba(QUERIES), atol=1e-5)
+    assert list(model.classes_) == list(pipeline.classes_)
+
+def test_binary_model_matches_pipeline(tmp_path):
+    texts, labels = zip(*[(text, label) for text, label in TRAIN if label != "profile"])
+    pipeline = Pipeline([
+        ("tfidf", TfidfVectorizer(ngram_range=(1, 2))),
+        ("clf", LogisticRegression(max_iter=1000))
+    ]).fit(texts, labels)
+    path = str(tmp_path / "intent_model.npz")
+    export_compact(pipeline, path, texts)
+
+    model = CompactIntentModel.load(path)
+    assert list(model.predict(QUERIES)) == list(pipeline.predict(QUERIES))
+    np.testing.assert_allclose(model.predict_proba(QUERIES), pipeline.predict_proba(QUERIES), atol=1e-5)
+
+def test_export_rejects_unsupported_vectorizer(tmp_path):
+    texts, labels = zip(*TRAIN)
+    pipeline = Pipeline([
+        ("tfidf", TfidfVectorizer(stop_words="english")),
+        ("clf", LogisticRegression(max_iter=1000))
+    ]).fit(texts, labels)
+    with pytest.raises(ValueError):
+        export_compact(pipeline, str(tmp_path / "intent_model.npz"), texts)
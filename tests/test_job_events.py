@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import joblib
+import numpy as np
+import pytest
+from app.utils.config import settings
+from app.utils.embeddings import LSAEmbedder
+from app.services.job_events_service import InMemoryStreamSource, JobDelta, JobEventConsumer
+from app.services.recommendation_service import RecommendationStore
+
+TEXTS = [
+    "Python backend developer Django APIs",
+    "React frontend developer TypeScript",
+    "Graphic designer Figma branding",
+    "Data analyst SQL Excel reporting",
+    "Mobile developer Flutter Android",
+]
+
+@pytest.fixture(autouse=True)
+def matching_dirs(tmp_path, monkeypatch):
+    model_path = str(tmp_path / "matching_lsa.joblib")
+    joblib.dump(LSAEmbedder(dim=3).fit(TEXTS), model_path)
+    monkeypatch.setattr(settings, "MATCHING_LSA_MODEL_PATH", model_path)
+    monkeypatch.setattr(settings, "MATCHING_INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(settings, "JOB_EVENTS_DELTA_DIR", str(tmp_path / "index" / "jobs_delta"))
+    monkeypatch.setattr(settings, "JOB_EVENTS_BLOCK_MS", 0)
+    return tmp_path
+
+def event(kind: str, job_id: str, ts: int, title: str = "") -> dict:
+    return {"type": f"job.{kind}", "job_id": job_id, "title": title, "description": title, "ts": ts}
+
+def drain(consumer: JobEventConsumer):
+    while consumer.run_once():
+        pass
+
+def test_replayed_events_are_idempotent():
+    source = InMemoryStreamSource()
+    source.add(event("created", "a", 1000, "Python developer"))
+    source.add(event("updated", "a", 2000, "Senior Python developer"))
+    consumer = JobEventConsumer(source)
+    drain(consumer)
+    first = dict(consumer.state.jobs["a"], vector=None)
+
+    # The backend re-sends both events; neither brings back the older version
+    source.add(event("created", "a", 1000, "Python developer"))
+    source.add(event("updated", "a", 2000, "Senior Python developer"))
+    drain(consumer)
+
+    assert dict(consumer.state.jobs["a"], vector=None) == first
+    assert first["title"] == "Senior Python developer" and first["ts"] == 2000
+    assert consumer.skipped == 1 and consumer.applied == 3
+
+def test_delete_after_update_hides_the_job():
+    source = InMemoryStreamSource()
+    source.add(event("created", "a", 1000, "Python developer"))
+    source.add(event("created", "b", 1000, "React developer"))
+    source.add(event("updated", "a", 2000, "Senior Python developer"))
+    source.add(event("deleted", "a", 3000))
+    # A late update older than the delete is ignored
+    source.add(event("updated", "a", 2500, "Lead Python developer"))
+    consumer = JobEventConsumer(source)
+    drain(consumer)
+
+    delta = JobDelta(settings.JOB_EVENTS_DELTA_DIR)
+    assert set(consumer.state.jobs) == {"b"}
+    assert consumer.state.tombstones["a"] == 3000
+    assert delta.deleted == {"a"}
+    assert delta.ids.tolist() == ["b"]
+
+def test_restart_recovers_unacknowledged_entries():
+    source = InMemoryStreamSource()
+    source.add(event("created", "a", 1000, "Python developer"))
+    drain(JobEventConsumer(source))
+    # A consumer takes the next batch and dies before publishing and acknowledging it
+    source.add(event("created", "b", 1100, "React developer"))
+    source.add(event("deleted", "a", 1200))
+    source.read(settings.JOB_EVENTS_BATCH_SIZE, 0)
+    assert len(source.pending) == 2
+
+    restarted = JobEventConsumer(source)
+    assert set(restarted.state.jobs) == {"a"}
+    drain(restarted)
+
+    assert set(restarted.state.jobs) == {"b"}
+    assert source.backlog() == {"pending": 0, "lag": 0}
+    assert restarted.state.last_entry_id == source.entries[-1][0]
+
+def test_new_index_rebases_the_delta(matching_dirs, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_EVENTS_REBASE_MARGIN_SECONDS", 0)
+    now_ms = int(time.time() * 1000)
+    source = InMemoryStreamSource()
+    source.add(event("created", "old", now_ms - 60_000, "Python developer"))
+    source.add(event("deleted", "gone", now_ms - 60_000))
+    source.add(event("created", "new", now_ms + 60_000, "React developer"))
+    consumer = JobEventConsumer(source)
+    drain(consumer)
+    assert set(consumer.state.tombstones) == {"old", "gone", "new"}
+
+    # An index built now already contains the older changes
+    os.makedirs(matching_dirs / "index" / "jobs")
+    with open(matching_dirs / "index" / "jobs" / "meta.json", "w") as f:
+        json.dump({"built_at": now_ms / 1000}, f)
+    consumer.run_once()
+
+    delta = JobDelta(settings.JOB_EVENTS_DELTA_DIR)
+    assert set(consumer.state.jobs) == {"new"}
+    assert set(consumer.state.tombstones) == {"new"}
+    assert delta.meta["base_built_at"] == now_ms / 1000
+    assert delta.deleted == set()
+
+def test_recommendations_skip_hidden_jobs(tmp_path):
+    path = str(tmp_path / "recommendations")
+    RecommendationStore.publish(path, {
+        "user_ids": np.asarray(["u1"], dtype=np.str_),
+        "user_hashes": np.zeros(1, dtype=np.uint64),
+        "job_ids": np.asarray(["a", "b", "c"], dtype=np.str_),
+        "job_titles": np.asarray(["A", "B", "C"], dtype=np.str_),
+        "top_idx": np.asarray([[0, 1, 2]], dtype=np.int32),
+        "top_scores": np.asarray([[0.9, 0.8, 0.7]], dtype=np.float16)
+    }, {"users": 1, "jobs": 3, "top_k": 3})
+    store = RecommendationStore(path)
+
+    assert [r["job_id"] for r in store.get("u1", 2)] == ["a", "b"]
+    # A hidden job is backfilled from further down the row
+    assert [r["job_id"] for r in store.get("u1", 2, hidden={"a"})] == ["b", "c"]
+    assert store.get("u2", 2) is None
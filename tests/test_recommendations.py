@@ -0,0 +1,57 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.config import settings
+from app.utils.embeddings import LSAEmbedder
+from app.services.recommendation_service import RecommendationStore, refresh_recommendations
+
+WORDS = "python django react typescript figma branding sql excel flutter android kotlin swift docker aws seo marketing writing video editing accounting".split()
+
+def random_text(rng) -> str:
+    return " ".join(rng.choice(WORDS, size=5, replace=False))
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    users = pd.DataFrame({"id": [f"u{i}" for i in range(300)], "kind": "profile", "text": [random_text(rng) for _ in range(300)]})
+    jobs = pd.DataFrame({"id": [f"j{i}" for i in range(200)], "kind": "job", "text": [random_text(rng) for _ in range(200)]})
+    jobs["title"] = jobs["id"]
+    model_path = str(tmp_path / "matching_lsa.joblib")
+    joblib.dump(LSAEmbedder(dim=8).fit(pd.concat([users, jobs])["text"].tolist()), model_path)
+    monkeypatch.setattr(settings, "MATCHING_LSA_MODEL_PATH", model_path)
+    monkeypatch.setattr(settings, "RECOMMENDATION_TOP_K", 5)
+    monkeypatch.setattr(settings, "RECOMMENDATION_EMBED_BATCH", 64)
+    return tmp_path, users, jobs, rng
+
+def refresh(monkeypatch, tmp_path, frame: pd.DataFrame, store: str, incremental: bool):
+    path = str(tmp_path / f"{store}.csv")
+    frame.to_csv(path, index=False)
+    monkeypatch.setattr(settings, "RECOMMENDATION_STORE_DIR", str(tmp_path / store))
+    return refresh_recommendations(path, incremental=incremental), RecommendationStore(settings.RECOMMENDATION_STORE_DIR)
+
+def test_incremental_refresh_matches_full_refresh(dataset, monkeypatch):
+    tmp_path, users, jobs, rng = dataset
+    refresh(monkeypatch, tmp_path, pd.concat([users, jobs]), "incremental", incremental=False)
+
+    # A few jobs removed, edited and added, and a few profiles edited
+    jobs = jobs.drop(index=[3, 50]).copy()
+    jobs.loc[jobs.index[:2], "text"] = [random_text(rng), random_text(rng)]
+    added = pd.DataFrame({"id": ["j200", "j201"], "kind": "job", "text": [random_text(rng), random_text(rng)], "title": ["j200", "j201"]})
+    jobs = pd.concat([added, jobs])
+    users.loc[users.index[:3], "text"] = [random_text(rng) for _ in range(3)]
+    frame = pd.concat([users, jobs])
+
+    summary, incremental = refresh(monkeypatch, tmp_path, frame, "incremental", incremental=True)
+    _, full = refresh(monkeypatch, tmp_path, frame, "full", incremental=False)
+
+    assert summary["incremental"] and summary["changed_jobs"] == 4
+    assert summary["rescored_users"] < len(users)
+    assert summary["rescored_users"] + summary["merged_users"] < len(users)
+    current = set(jobs["id"])
+    for user_id in users["id"]:
+        expected = full.get(user_id, 5)
+        got = incremental.get(user_id, 5)
+        # Job ids may differ only between equally scored jobs
+        assert [r["score"] for r in got] == pytest.approx([r["score"] for r in expected], abs=1e-3)
+        assert {r["job_id"] for r in got} <= current
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from app.utils.cache import ResultCache
+
+def make_cache() -> ResultCache:
+    return ResultCache("test", max_entries=10)
+
+def test_follower_survives_leader_cancellation():
+    async def scenario():
+        cache = make_cache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"value": 42}
+
+        leader = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, calls, cache.stats()
+
+    value, calls, stats = asyncio.run(scenario())
+    assert value == {"value": 42}
+    assert len(calls) == 1
+    assert stats["coalesced"] == 1
+
+def test_computation_stops_when_every_caller_cancels():
+    async def scenario():
+        cache = make_cache()
+        finished = []
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+            return 1
+
+        callers = [asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0.1)
+        return finished, cache._inflight
+
+    finished, inflight = asyncio.run(scenario())
+    assert finished == []
+    assert inflight == {}
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    async def scenario():
+        cache = make_cache()
+        attempts = []
+
+        async def compute():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(3)), return_exceptions=True)
+        retry = await asyncio.gather(cache.get_or_compute("k", compute), return_exceptions=True)
+        return results + retry, attempts
+
+    results, attempts = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(attempts) == 2
@@ -0,0 +1,51 @@
+import io
+import asyncio
+import zipfile
+from fastapi import UploadFile
+from app.utils.config import settings
+from app.services.resume_service import ResumeParserService
+
+def make_zip(count: int) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for i in range(count):
+            archive.writestr(f"resume_{i}.txt", f"Resume {i}: Python developer")
+    return buffer.getvalue()
+
+def upload(data: bytes, filename: str) -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename, size=len(data))
+
+async def collect(files):
+    return [line async for line in ResumeParserService().iter_bulk_results(files, analyze=False)]
+
+def test_zip_entries_are_processed():
+    lines = asyncio.run(collect([upload(make_zip(3), "resumes.zip")]))
+    results, summary = lines[:-1], lines[-1]
+    assert sorted(line["file"] for line in results) == [f"resumes.zip/resume_{i}.txt" for i in range(3)]
+    assert all(line["status"] == "ok" for line in results)
+    assert summary == {**summary, "type": "summary", "total": 3, "succeeded": 3, "failed": 0}
+
+def test_bad_zip_is_reported_per_file():
+    files = [upload(b"not a zip archive", "broken.zip"), upload(b"plain resume", "resume.txt")]
+    lines = asyncio.run(collect(files))
+    by_file = {line["file"]: line for line in lines[:-1]}
+    assert by_file["broken.zip"]["status"] == "error"
+    assert "Invalid zip archive" in by_file["broken.zip"]["error"]
+    assert by_file["resume.txt"]["status"] == "ok"
+    assert lines[-1]["failed"] == 1 and lines[-1]["succeeded"] == 1
+
+def test_disconnect_stops_every_task(monkeypatch):
+    monkeypatch.setattr(settings, "RESUME_BULK_QUEUE_SIZE", 1)
+    monkeypatch.setattr(settings, "RESUME_BULK_CONCURRENCY", 2)
+
+    async def scenario():
+        stream = ResumeParserService().iter_bulk_results([upload(make_zip(50), "resumes.zip")], analyze=False)
+        first = await stream.__anext__()
+        # The client goes away while the producer is blocked on full queues
+        await stream.aclose()
+        leftover = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        return first, leftover
+
+    first, leftover = asyncio.run(scenario())
+    assert first["status"] == "ok"
+    assert leftover == []
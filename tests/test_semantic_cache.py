@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from app.utils.config import settings
+from app.utils.semantic_cache import SemanticCache
+from app.services import chat_service
+from app.services.chat_service import ChatService
+from app.services.chat_session_service import ChatSession
+
+PARAPHRASES = [
+    ("How do I withdraw money?", "How can I withdraw my earnings?"),
+    ("How do I delete my account?", "how to remove my account"),
+    ("Where do I upload my resume?", "Where can I upload my CV?"),
+    ("How do I withdraw mony?", "How do I withdraw money?"),
+    ("How do I cancel my subscription?", "how can I cancel the subscription"),
+    ("What does the premium plan cost?", "what is the price of the premium plan"),
+    ("How do I find remote jobs?", "where can I find remote jobs"),
+]
+
+DIFFERENT_QUESTIONS = [
+    ("How do I delete my account?", "How do I create my account?"),
+    ("How do I cancel my subscription?", "How do I renew my subscription?"),
+    ("Is it safe to work abroad?", "Is it legal to work abroad?"),
+    ("How do I withdraw in USD?", "How do I withdraw money?"),
+    ("How do I withdraw money?", "How do I deposit money?"),
+    ("How do I find remote jobs?", "How do I post remote jobs?"),
+    ("How do I withdraw money to my bank?", "How do I withdraw money?"),
+    ("what is the price of the premium plan", "what is the price of the basic plan"),
+]
+
+def make_cache(**kwargs) -> SemanticCache:
+    options = {"max_entries": 100, "ttl": 3600, "threshold": settings.CHAT_SEMANTIC_CACHE_THRESHOLD}
+    options.update(kwargs)
+    return SemanticCache("test", **options)
+
+@pytest.mark.parametrize("stored, asked", PARAPHRASES)
+def test_paraphrase_hits(stored, asked):
+    cache = make_cache()
+    cache.store("en|", stored, "answer")
+    assert cache.lookup("en|", asked) == "answer"
+
+@pytest.mark.parametrize("stored, asked", DIFFERENT_QUESTIONS)
+def test_different_question_misses(stored, asked):
+    cache = make_cache()
+    cache.store("en|", stored, "answer")
+    assert cache.lookup("en|", asked) is None
+
+def test_best_matching_entry_is_served():
+    cache = make_cache()
+    cache.store("en|", "How do I delete my account?", "delete")
+    cache.store("en|", "How do I create my account?", "create")
+    assert cache.lookup("en|", "how can I remove my account") == "delete"
+    assert cache.lookup("en|", "how can I create an account") == "create"
+
+def test_namespaces_are_separate_and_capped():
+    cache = make_cache(max_namespaces=2)
+    cache.store("en|", "How do I withdraw money?", "en")
+    assert cache.lookup("km|", "How do I withdraw money?") is None
+    cache.store("km|", "How do I withdraw money?", "km")
+    cache.lookup("en|", "How do I withdraw money?")
+    # A third namespace evicts the least recently used one, with its entries
+    cache.store("en|/jobs", "How do I withdraw money?", "jobs")
+    assert cache.stats()["namespaces"] == 2
+    assert cache.lookup("km|", "How do I withdraw money?") is None
+    assert cache.lookup("en|", "How do I withdraw money?") == "en"
+    assert cache.lookup("en|/jobs", "How do I withdraw money?") == "jobs"
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, messages, **kwargs):
+        self.calls.append(messages)
+        answer = f"answer {len(self.calls)}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer))])
+
+def test_follow_up_answers_are_not_shared(monkeypatch):
+    monkeypatch.setattr(chat_service, "answer_cache", make_cache())
+    service = ChatService()
+    completions = FakeCompletions()
+    service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    async def no_local_reply(message, locale):
+        return None
+    monkeypatch.setattr(service, "_local_reply", no_local_reply)
+
+    async def scenario():
+        question = "How do I withdraw money?"
+        opening = await service.get_response(question, session=ChatSession("a"))
+        paraphrase = await service.get_response("How can I withdraw my money?", session=ChatSession("b"))
+        # After earlier turns the answer depends on that conversation: no lookup, no store
+        ongoing = ChatSession("c")
+        ongoing.add_exchange("I work in Thailand", "Noted")
+        follow_up = await service.get_response(question, session=ongoing)
+        fresh = await service.get_response("How can I withdraw money?", session=ChatSession("d"))
+        return opening, paraphrase, follow_up, fresh
+
+    opening, paraphrase, follow_up, fresh = asyncio.run(scenario())
+    assert opening == paraphrase == fresh == "answer 1"
+    assert follow_up == "answer 2"
+    assert len(completions.calls) == 2
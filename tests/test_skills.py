@@ -0,0 +1,66 @@
+import pytest
+from app.utils.config import settings
+from app.utils.skills import SkillIndex, allowed_distance
+
+@pytest.fixture(scope="module")
+def index():
+    return SkillIndex.load(settings.SKILL_VOCABULARY_PATH, max_distance=2)
+
+@pytest.fixture(scope="module")
+def index_without_new_skills():
+    # The vocabulary before Erlang, MATLAB, SPSS and Jest were added
+    return SkillIndex([
+        ("Go", ["golang"]), ("Git", ["github", "gitlab"]), ("Sass", ["scss"]),
+        ("NestJS", ["nest", "nest.js"]), ("Java", ["java8"]), ("Figma", []),
+        ("Rust", []), ("Ruby", [])
+    ], max_distance=2)
+
+@pytest.mark.parametrize("typed, expected", [
+    ("recat", "React"),
+    ("Pyhton", "Python"),
+    ("kubernets", "Kubernetes"),
+    ("Javascrpt", "JavaScript"),
+    ("reactjs", "React"),
+    ("Node JS", "Node.js"),
+    ("Erlang", "Erlang"),
+    ("Matlab", "MATLAB"),
+    ("spss", "SPSS"),
+    ("Jest", "Jest"),
+])
+def test_resolves_to_canonical_name(index, typed, expected):
+    assert index.lookup(typed)[0] == expected
+
+@pytest.mark.parametrize("typed", ["Erlang", "Matlab", "Jest", "Lava", "Sigma"])
+def test_no_correction_to_a_different_skill(index_without_new_skills, typed):
+    assert index_without_new_skills.lookup(typed) is None
+
+def test_vocabulary_entry_wins_over_correction(index):
+    # "spss" is one edit from the "scss" alias of Sass
+    assert index.lookup("SPSS") == ("SPSS", 0)
+
+@pytest.mark.parametrize("typed", ["Copyediting", "copy-editor", "Illustration"])
+def test_listed_words_are_kept_as_typed(index, typed):
+    # Two edits from the "copywriting" alias and from "Adobe Illustrator"
+    assert index.lookup(typed) is None
+    assert index.resolve([typed]) == ([typed], [typed])
+
+def test_keep_list_only_blocks_correction():
+    index = SkillIndex([("Content Writing", ["copywriting"])], max_distance=2, keep=["copyediting"])
+    assert index.lookup("copyediting") is None
+    assert index.lookup("copywritting") == ("Content Writing", 1)
+
+def test_short_names_allow_one_edit():
+    assert allowed_distance("go", 2) == 0
+    assert allowed_distance("swift", 2) == 1
+    assert allowed_distance("angular", 2) == 1
+    assert allowed_distance("kubernetes", 2) == 2
+
+def test_ambiguous_correction_is_refused(index_without_new_skills):
+    # One edit from both "rust" and "ruby"
+    assert index_without_new_skills.lookup("rusy") is None
+    assert index_without_new_skills.lookup("rubi") == ("Ruby", 1)
+
+def test_resolve_keeps_unmatched_input(index):
+    resolved, unmatched = index.resolve(["reactjs, Lava", "React", "Sigma"])
+    assert resolved == ["React", "Lava", "Sigma"]
+    assert unmatched == ["Lava", "Sigma"]